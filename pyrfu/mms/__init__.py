@@ -4,6 +4,8 @@
 # @Louis Richard
 from .tokenize import tokenize
 from .list_files import list_files
+from .file_catalog import build_file_catalog
+from .download_data import download_data
 from .get_ts import get_ts
 from .get_dist import get_dist
 from .db_get_ts import db_get_ts
@@ -35,6 +37,11 @@ from .dsl2gsm import dsl2gsm
 from .vdf_projection import vdf_projection
 from .vdf_elim import vdf_elim
 from .get_data import get_data
+from .get_data_many import get_data_many
+from .iter_data import iter_data
+from .get_data_4sc import get_data_4sc
+from .prefetcher import Prefetcher
+from .cdf_cache import clear_cdf_cache
 from .get_variable import get_variable
 from .db_get_variable import db_get_variable
 from .make_model_kappa import make_model_kappa
@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import os
+import copy
+import pickle
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from collections import OrderedDict
+
+# 3rd party imports
+import numpy as np
+
+from cdflib import CDF
+
+# Local imports
+from .mms_config import CONFIG
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["CachedCDF", "clear_cdf_cache"]
+
+# Process-wide cache of the metadata of the files, keyed by path with the
+# modification time and the size of the file used to invalidate the entries.
+_metadata = OrderedDict()
+_metadata_lock = threading.Lock()
+
+# Estimate of the size in bytes of the caches, keyed by path. It is updated
+# with the bytes written by the process and the cache directory is only
+# walked when it exceeds the size budget.
+_cache_sizes = {}
+_cache_sizes_lock = threading.Lock()
+
+
+def _file_metadata(source):
+    r"""Returns the in memory metadata cache of the file and marks it as
+    recently used."""
+
+    with _metadata_lock:
+        entry = _metadata.get(source["path"])
+
+        if entry is None or entry[0] != source:
+            entry = (source, {})
+            _metadata[source["path"]] = entry
+
+        _metadata.move_to_end(source["path"])
+
+        while len(_metadata) > CONFIG["metadata_cache_size"]:
+            _metadata.popitem(last=False)
+
+    return entry[1]
+
+
+def _atomic_write(path, write, data):
+    r"""Writes data to path through a temporary file and returns the change
+    of the size of path in bytes."""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file, data)
+            n_bytes = file.tell()
+
+        try:
+            n_bytes -= os.path.getsize(path)
+        except FileNotFoundError:
+            pass
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return n_bytes
+
+
+def _save_pickle(file, data):
+    pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _save_npy(file, data):
+    np.save(file, data, allow_pickle=False)
+
+
+def _dir_size(path):
+    size = 0
+
+    for root, _, files in os.walk(path):
+        for file in files:
+            try:
+                size += os.path.getsize(os.path.join(root, file))
+            except FileNotFoundError:
+                pass
+
+    return size
+
+
+def _evict(cache_dir, cache_size, n_written: int = 0):
+    r"""Removes the least recently used entries until the cache fits in
+    cache_size bytes. n_written is the number of bytes written since the
+    last call, the cache is only walked when the estimate of its size
+    exceeds cache_size."""
+
+    cache_dir = os.path.abspath(cache_dir)
+
+    with _cache_sizes_lock:
+        if cache_dir in _cache_sizes:
+            _cache_sizes[cache_dir] += n_written
+
+            if _cache_sizes[cache_dir] <= cache_size:
+                return
+
+    entries = []
+
+    for entry in os.scandir(cache_dir):
+        if not entry.is_dir():
+            continue
+
+        try:
+            last_access = os.stat(os.path.join(entry.path,
+                                               "source.pkl")).st_mtime
+        except FileNotFoundError:
+            last_access = 0.
+
+        entries.append((last_access, _dir_size(entry.path), entry.path))
+
+    total_size = sum(entry[1] for entry in entries)
+
+    for _, size, path in sorted(entries):
+        if total_size <= cache_size:
+            break
+
+        shutil.rmtree(path, ignore_errors=True)
+        total_size -= size
+
+    with _cache_sizes_lock:
+        _cache_sizes[cache_dir] = total_size
+
+
+def clear_cdf_cache(cache_dir: str = ""):
+    r"""Removes all the decoded variables and metadata from the cache.
+
+    Parameters
+    ----------
+    cache_dir : str, Optional
+        Path of the cache. Default uses `pyrfu.mms.mms_config.py`
+
+    """
+
+    with _metadata_lock:
+        _metadata.clear()
+
+    with _cache_sizes_lock:
+        _cache_sizes.clear()
+
+    if not cache_dir:
+        cache_dir = CONFIG["cache_dir"]
+
+    if cache_dir and os.path.isdir(os.path.expanduser(cache_dir)):
+        shutil.rmtree(os.path.expanduser(cache_dir))
+
+
+class CachedCDF:
+    r"""Read-through cache of the decoded variables of a CDF file.
+
+    The variables (data, `varinq` and `varattsget`) are stored as npy/pickle
+    files in a directory of `CONFIG["cache_dir"]` per source file. The
+    entries are invalidated when the modification time or the size of the
+    source file change and the least recently used entries are evicted when
+    the cache grows over `CONFIG["cache_size"]` bytes. The CDF file is only
+    opened when a variable is not in the cache. If `CONFIG["cache_dir"]` is
+    None the reads go straight to the CDF file.
+
+    The metadata (`cdf_info`, `varinq`, `varattsget`, `globalattsget` and
+    the quantities cached with `memoize`) of the last
+    `CONFIG["metadata_cache_size"]` files are also kept in memory for the
+    whole process, whether `CONFIG["cache_dir"]` is set or not.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the cdf file.
+
+    """
+
+    def __init__(self, file_path):
+        self.file_path = os.path.abspath(str(file_path))
+        self._cdf = None
+        self._written = 0
+        self._entry = None
+
+        stat = os.stat(self.file_path)
+        source = {"path": self.file_path, "mtime": stat.st_mtime,
+                  "size": stat.st_size}
+
+        self._metadata = _file_metadata(source)
+
+        cache_dir = CONFIG["cache_dir"]
+
+        if not cache_dir:
+            return
+
+        self._cache_dir = os.path.expanduser(cache_dir)
+
+        key = hashlib.sha1(self.file_path.encode()).hexdigest()
+        self._entry = os.path.join(self._cache_dir, key)
+
+        source_path = os.path.join(self._entry, "source.pkl")
+
+        try:
+            with open(source_path, "rb") as file:
+                cached_source = pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            cached_source = None
+
+        if cached_source != source:
+            # New version of the file or new entry
+            shutil.rmtree(self._entry, ignore_errors=True)
+            os.makedirs(self._entry, exist_ok=True)
+            self._written += _atomic_write(source_path, _save_pickle,
+                                           source)
+        else:
+            # Mark as recently used
+            os.utime(source_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def cdf(self):
+        r"""Opened cdflib.CDF of the source file."""
+        if self._cdf is None:
+            self._cdf = CDF(self.file_path)
+
+        return self._cdf
+
+    def close(self):
+        r"""Closes the source file and evicts old entries if needed."""
+
+        if self._cdf is not None:
+            self._cdf.close()
+            self._cdf = None
+
+        if self._written:
+            _evict(self._cache_dir, CONFIG["cache_size"], self._written)
+            self._written = 0
+
+    def _path(self, name, ext):
+        return os.path.join(self._entry, f"{name}.{ext}")
+
+    def _read_metadata(self, name, func):
+        if self._entry is None:
+            return func()
+
+        path = self._path(name, "pkl")
+
+        try:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            out = func()
+
+        self._written += _atomic_write(path, _save_pickle, out)
+
+        return out
+
+    def _cached(self, name, func):
+        r"""Read-through cache of metadata. Returns a copy as the callers
+        modify the attributes."""
+
+        try:
+            out = self._metadata[name]
+        except KeyError:
+            out = self._read_metadata(name, func)
+            self._metadata[name] = out
+
+        return copy.deepcopy(out)
+
+    def memoize(self, name, func, *args):
+        r"""Caches the result of func(*args), which must only depend on the
+        content of the file, under name."""
+        return self._cached(name, lambda: func(*args))
+
+    def cdf_info(self):
+        return self._cached("cdf_info", self.cdf.cdf_info)
+
+    def varinq(self, variable):
+        return self._cached(f"{variable}.varinq",
+                            lambda: self.cdf.varinq(variable))
+
+    def varattsget(self, variable):
+        return self._cached(f"{variable}.varattsget",
+                            lambda: self.cdf.varattsget(variable))
+
+    def globalattsget(self):
+        return self._cached("globalattsget", self.cdf.globalattsget)
+
+    def varget(self, variable, startrec: int = 0, endrec: int = None):
+        r"""Reads the records startrec to endrec (included) of the variable.
+        Only the pages of the cached variable which contain these records
+        are read."""
+
+        if self._entry is None:
+            return self.cdf.varget(variable, startrec=startrec,
+                                   endrec=endrec)
+
+        path = self._path(variable, "npy")
+
+        try:
+            data = np.load(path, mmap_mode="r", allow_pickle=False)
+        except (FileNotFoundError, ValueError):
+            data = self.cdf.varget(variable)
+
+            if data is None:
+                return None
+
+            data = np.asarray(data)
+
+            if data.dtype.hasobject:
+                return self.cdf.varget(variable, startrec=startrec,
+                                       endrec=endrec)
+
+            self._written += _atomic_write(path, _save_npy, data)
+
+        if self.varinq(variable)["Rec_Vary"] and data.ndim > 0 \
+                and (startrec or endrec is not None):
+            stop = None if endrec is None else endrec + 1
+            data = data[startrec:stop]
+
+        return np.array(data)
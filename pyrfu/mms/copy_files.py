@@ -3,7 +3,12 @@
 
 # Built-in imports
 import os
-import subprocess
+import shutil
+import hashlib
+import logging
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
 
 # Local imports
 from .mms_config import CONFIG
@@ -16,9 +21,79 @@ __license__ = "MIT"
 __version__ = "2.3.7"
 __status__ = "Prototype"
 
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
+
+def _sha256(path):
+    sha256 = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2 ** 20), b""):
+            sha256.update(block)
+
+    return sha256.digest()
+
+
+def _up_to_date(source, target, compare):
+    r"""Checks whether target is a copy of source."""
+
+    if compare is None:
+        return False
+
+    try:
+        target_stat = os.stat(target)
+    except FileNotFoundError:
+        return False
+
+    source_stat = os.stat(source)
+
+    if source_stat.st_size != target_stat.st_size:
+        return False
+
+    if compare == "size":
+        return source_stat.st_mtime <= target_stat.st_mtime
+
+    return _sha256(source) == _sha256(target)
+
+
+def _copy_file(source, target, link):
+    r"""Hardlinks (if possible) or copies source to target atomically."""
 
-def copy_files(var, tint, mms_id, target_dir: str = "./data/"):
-    r"""Copy files from NAS24 to the target path
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(target))
+    os.close(fd)
+
+    try:
+        if link:
+            try:
+                os.remove(tmp_path)
+                os.link(source, tmp_path)
+            except OSError:
+                # Other filesystem
+                shutil.copy2(source, tmp_path)
+        else:
+            shutil.copy2(source, tmp_path)
+
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return target
+
+
+def copy_files(var, tint, mms_id, target_dir: str = "./data/",
+               data_path: str = "", compare: str = "size",
+               link: bool = False, dry_run: bool = False,
+               n_workers: int = 4, verbose: bool = True):
+    r"""Copy files from NAS24 to the target path. The files which are
+    already in the target path are skipped and the others are copied
+    concurrently.
 
     Parameters
     ----------
@@ -34,27 +109,70 @@ def copy_files(var, tint, mms_id, target_dir: str = "./data/"):
         Index of the spacecraft.
     target_dir : str, Optional
         Target path. Default is './data/'.
+    data_path : str, Optional
+        Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+    compare : {"size", "hash", None}, Optional
+        How to check if a file is already in the target path: same size and
+        not older than the source ("size"), same content ("hash") or never
+        (None). Default is "size".
+    link : bool, Optional
+        Hardlink the files instead of copying them when the target path is
+        on the same filesystem. Default is False.
+    dry_run : bool, Optional
+        Only returns the files which would be copied. Default is False.
+    n_workers : int, Optional
+        Number of files copied concurrently. Default is 4.
+    verbose : bool, Optional
+        Set to True to follow the copy. Default is True.
+
+    Returns
+    -------
+    plan : dict
+        Hash table with the (source, target) of the files to copy ("files")
+        and their total size in bytes ("size").
+
+    Examples
+    --------
+    >>> from pyrfu import mms
+
+    >>> tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+    >>> var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+
+    Size of the files to copy
+
+    >>> plan = mms.copy_files(var, tint, 1, "/scratch/mms", dry_run=True)
+    >>> plan["size"] / 2 ** 30
 
     """
 
-    mms_path = CONFIG["local_data_dir"] + "/"
+    if compare not in ["size", "hash", None]:
+        raise ValueError("compare must be 'size', 'hash' or None")
+
+    if not data_path:
+        data_path = CONFIG["local_data_dir"]
 
-    files = list_files(tint, mms_id, var)
+    files = list_files(tint, mms_id, var, data_path)
+
+    plan = {"files": [], "size": 0}
 
     for file in files:
-        relative_path = os.path.split(file)[0].replace(mms_path, "")
-        path = os.path.join(target_dir, relative_path)
-        target_file = os.path.join(path, os.path.split(file)[1])
+        target = os.path.join(target_dir, os.path.relpath(file, data_path))
+
+        if _up_to_date(file, target, compare):
+            continue
+
+        plan["files"].append((file, target))
+        plan["size"] += os.path.getsize(file)
 
-        if not os.path.exists(path):
-            os.makedirs(path)
+    if verbose:
+        logging.info(f"{len(plan['files']):d} files to copy "
+                     f"({plan['size'] / 2 ** 20:.1f} MiB), "
+                     f"{len(files) - len(plan['files']):d} up to date")
 
-        p = subprocess.Popen(f"cp {file} {target_file}",
-                             stdout=subprocess.PIPE,
-                             shell=True)
-        (_, _) = p.communicate()
+    if dry_run or not plan["files"]:
+        return plan
 
-        # This makes the wait possible
-        _ = p.wait()
+    with ThreadPoolExecutor(n_workers) as pool:
+        list(pool.map(lambda args: _copy_file(*args, link), plan["files"]))
 
-    return
+    return plan
@@ -5,10 +5,11 @@
 import logging
 
 # Local imports
-from ..pyrf import ts_append
+from ..pyrf import concat_many
 
 from .list_files import list_files
 from .get_ts import get_ts
+from .executor import map_files
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -39,7 +40,7 @@ def _tokenize(dataset_name):
 
 
 def db_get_ts(dataset_name, cdf_name, tint, verbose: bool = True,
-              data_path: str = ""):
+              data_path: str = "", n_workers: int = None, executor=None):
     r"""Get variable time series in the cdf file.
 
     Parameters
@@ -54,6 +55,11 @@ def db_get_ts(dataset_name, cdf_name, tint, verbose: bool = True,
         Status monitoring. Default is verbose = True
     data_path : str, Optional
         Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+    n_workers : int, Optional
+        Number of files read concurrently. Default uses
+        `pyrfu.mms.mms_config.py`
+    executor : {"thread", "process"} or concurrent.futures.Executor, Optional
+        Pool used to read the files. Default uses `pyrfu.mms.mms_config.py`
 
     Returns
     -------
@@ -69,8 +75,7 @@ def db_get_ts(dataset_name, cdf_name, tint, verbose: bool = True,
     if verbose:
         logging.info(f"Loading {cdf_name}...")
 
-    out = None
-    for i, file in enumerate(files):
-        out = ts_append(out, get_ts(file, cdf_name, tint))
+    out = concat_many(map_files(get_ts, files, cdf_name, tint,
+                                n_workers=n_workers, executor=executor))
 
     return out
@@ -0,0 +1,317 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import os
+import re
+import json
+import atexit
+import bisect
+import shutil
+import logging
+import threading
+import contextlib
+import http.client
+import urllib.parse
+
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+from dateutil import parser
+
+# Local imports
+from .mms_config import CONFIG
+from .file_catalog import (open_file_catalog, refresh_catalog_dirs,
+                           _time_key)
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
+_file_name_regex = re.compile(r"mms[1-4]_.*_([0-9]{8,14})_v(\d+).(\d+).(\d+)"
+                              r".cdf$")
+
+# Persistent connections to the SDC, one per thread and host. The download
+# workers are shared between calls so that their connections are reused
+_connections = threading.local()
+_opened, _opened_lock = [[], threading.Lock()]
+
+_download_pools = {}
+
+
+def _connection(url):
+    url = urllib.parse.urlsplit(url)
+
+    if not hasattr(_connections, "pool"):
+        _connections.pool = {}
+
+    key = (url.scheme, url.netloc)
+
+    if key not in _connections.pool:
+        if url.scheme == "https":
+            conn = http.client.HTTPSConnection(
+                url.netloc, timeout=CONFIG["download_timeout"])
+        else:
+            conn = http.client.HTTPConnection(
+                url.netloc, timeout=CONFIG["download_timeout"])
+
+        _connections.pool[key] = conn
+
+        with _opened_lock:
+            _opened.append(conn)
+
+    return _connections.pool[key]
+
+
+def _download_pool(n_workers):
+    r"""Download workers shared between the calls of download_data."""
+
+    if n_workers not in _download_pools:
+        _download_pools[n_workers] = ThreadPoolExecutor(
+            n_workers, thread_name_prefix="pyrfu-download")
+
+    return _download_pools[n_workers]
+
+
+@atexit.register
+def _close_connections():
+    r"""Shuts down the download workers and closes their connections."""
+
+    for pool in _download_pools.values():
+        pool.shutdown(wait=False)
+
+    _download_pools.clear()
+
+    with _opened_lock:
+        for conn in _opened:
+            conn.close()
+
+        _opened.clear()
+
+
+def _request(url, headers: dict = None, retries: int = 3):
+    r"""Sends a GET request on the persistent connection of the thread. The
+    response must be read before the next request."""
+
+    split = urllib.parse.urlsplit(url)
+    path = urllib.parse.urlunsplit(("", "", split.path, split.query, ""))
+
+    for i in range(retries):
+        conn = _connection(url)
+
+        try:
+            conn.request("GET", path, headers=headers or {})
+            return conn.getresponse()
+        except (http.client.HTTPException, OSError):
+            # Reconnects at the next request
+            conn.close()
+
+            if i + 1 == retries:
+                raise
+
+    return None
+
+
+def _file_info(tint, mms_id, var):
+    r"""Queries the SDC for the files of the dataset in the time interval
+    (and the one before to get the burst data)."""
+
+    query = {"sc_id": f"mms{mms_id}", "instrument_id": var["inst"],
+             "data_rate_mode": var["tmmode"], "data_level": var["lev"],
+             "start_date": parser.parse(tint[0]).strftime("%Y-%m-%d"),
+             "end_date": parser.parse(tint[1]).strftime("%Y-%m-%d-%H-%M-%S")}
+
+    if var.get("dtype"):
+        query["descriptor"] = var["dtype"]
+
+    url = f"{CONFIG['sdc_url']}file_info/science?" \
+          f"{urllib.parse.urlencode(query)}"
+
+    response = _request(url)
+    content = response.read()
+
+    if response.status != 200:
+        raise ConnectionError(f"{url}: {response.status} {response.reason}")
+
+    files = [file for file in json.loads(content)["files"]
+             if _file_name_regex.match(file["file_name"])]
+
+    files = sorted(files, key=lambda file: _time_key(
+        _file_name_regex.match(file["file_name"]).group(1)))
+
+    times = [_time_key(_file_name_regex.match(file["file_name"]).group(1))
+             for file in files]
+    t_min = _time_key(parser.parse(tint[0]).strftime("%Y%m%d%H%M%S"))
+
+    return files[max(bisect.bisect_left(times, t_min) - 1, 0):]
+
+
+def _local_dir(data_path, mms_id, var, file_name):
+    r"""Directory of the file in the local_data_dir layout."""
+
+    date = parser.parse(_file_name_regex.match(file_name).group(1)[:8])
+
+    if not var.get("dtype"):
+        level_and_dtype = var["lev"]
+    else:
+        level_and_dtype = os.sep.join([var["lev"], var["dtype"]])
+
+    local_dir = [data_path, f"mms{mms_id}", var["inst"], var["tmmode"],
+                 level_and_dtype, date.strftime("%Y"), date.strftime("%m")]
+
+    if var["tmmode"] == "brst":
+        local_dir.append(date.strftime("%d"))
+
+    return os.sep.join(local_dir)
+
+
+def _download_file(file_info, local_path, retries: int = 3):
+    r"""Downloads the file into local_path. The data are written to a .part
+    file which is resumed if the transfer is interrupted and moved to
+    local_path once its size has been checked."""
+
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+
+    part_path = f"{local_path}.part"
+
+    query = urllib.parse.urlencode({"file": file_info["file_name"]})
+    url = f"{CONFIG['sdc_url']}download/science?{query}"
+
+    for i in range(retries):
+        try:
+            offset = os.path.getsize(part_path)
+        except FileNotFoundError:
+            offset = 0
+
+        headers = {"Range": f"bytes={offset:d}-"} if offset else {}
+
+        try:
+            response = _request(url, headers)
+
+            if response.status == 416:
+                # Nothing left to download
+                response.read()
+                break
+
+            if response.status not in [200, 206]:
+                response.read()
+                raise ConnectionError(f"{url}: {response.status} "
+                                      f"{response.reason}")
+
+            # The server may ignore the range and send the whole file
+            mode = "ab" if response.status == 206 else "wb"
+
+            with open(part_path, mode) as file:
+                shutil.copyfileobj(response, file, 2 ** 20)
+
+            break
+        except (http.client.HTTPException, OSError):
+            _connection(url).close()
+
+            if i + 1 == retries:
+                raise
+
+    if os.path.getsize(part_path) != file_info["file_size"]:
+        os.remove(part_path)
+        raise IOError(f"Size of {file_info['file_name']} does not match the "
+                      f"SDC ({file_info['file_size']:d} bytes)")
+
+    os.replace(part_path, local_path)
+
+    return local_path
+
+
+def download_data(tint, mms_id, var, data_path: str = "",
+                  n_workers: int = None, verbose: bool = True):
+    r"""Downloads from the MMS Science Data Center (SDC) the files of the
+    target dataset in the time interval which are missing in `data_path`.
+
+    Parameters
+    ----------
+    tint : list of str
+        Time interval.
+    mms_id : str or int
+        Index of the spacecraft.
+    var : dict
+        Dictionary containing 4 keys
+            * var["inst"] : name of the instrument
+            * var["tmmode"] : data rate
+            * var["lev"] : data level
+            * var["dtype"] : data type
+    data_path : str, Optional
+        Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+    n_workers : int, Optional
+        Number of files downloaded concurrently. Default uses
+        `pyrfu.mms.mms_config.py`
+    verbose : bool, Optional
+        Set to True to follow the download. Default is True.
+
+    Returns
+    -------
+    files : list of str
+        Paths of the downloaded files.
+
+    Notes
+    -----
+    The files are written in the local_data_dir layout and the file catalog
+    (see `pyrfu.mms.build_file_catalog`) is updated. An interrupted download
+    is resumed from where it stopped and the size of the files is checked
+    against the SDC. If `pyrfu.mms.mms_config.CONFIG["no_download"]` is
+    False, `pyrfu.mms.list_files` calls this function before looking for
+    the local files.
+
+    Examples
+    --------
+    >>> from pyrfu import mms
+
+    >>> tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+    >>> var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+    >>> files = mms.download_data(tint, 1, var)
+
+    """
+
+    if not data_path:
+        data_path = CONFIG["local_data_dir"]
+
+    mms_id = str(mms_id)
+
+    to_download = []
+
+    for file_info in _file_info(tint, mms_id, var):
+        local_path = os.path.join(_local_dir(data_path, mms_id, var,
+                                             file_info["file_name"]),
+                                  file_info["file_name"])
+
+        if os.path.isfile(local_path) \
+                and os.path.getsize(local_path) == file_info["file_size"]:
+            continue
+
+        to_download.append((file_info, local_path))
+
+    if not to_download:
+        return []
+
+    if verbose:
+        logging.info(f"Downloading {len(to_download):d} files from "
+                     f"{CONFIG['sdc_url']}...")
+
+    pool = _download_pool(n_workers or CONFIG["download_workers"])
+    files = list(pool.map(lambda args: _download_file(*args), to_download))
+
+    catalog = open_file_catalog(data_path)
+
+    if catalog is not None:
+        with contextlib.closing(catalog):
+            refresh_catalog_dirs(catalog, data_path,
+                                 sorted({os.path.dirname(f) for f in files}),
+                                 force=True)
+
+    return files
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import atexit
+import itertools
+
+from concurrent.futures import (Executor, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
+
+# Local imports
+from .mms_config import CONFIG
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+# Pools shared by the loaders, keyed by (kind, n_workers)
+_executors = {}
+
+
+def get_executor(n_workers: int = None, executor=None):
+    r"""Returns the worker pool used to read files concurrently.
+
+    Parameters
+    ----------
+    n_workers : int, Optional
+        Number of workers. Default uses `pyrfu.mms.mms_config.py`
+    executor : {"thread", "process"} or concurrent.futures.Executor, Optional
+        Kind of pool or pool to use. Default uses `pyrfu.mms.mms_config.py`
+
+    Returns
+    -------
+    executor : concurrent.futures.Executor
+        Worker pool. The pools created here are shared between calls.
+
+    """
+
+    if executor is None:
+        executor = CONFIG["executor"] or "thread"
+
+    if isinstance(executor, Executor):
+        return executor
+
+    if n_workers is None:
+        n_workers = CONFIG["n_workers"]
+
+    key = (executor, n_workers)
+
+    if key not in _executors:
+        if executor == "thread":
+            _executors[key] = ThreadPoolExecutor(n_workers)
+        elif executor == "process":
+            _executors[key] = ProcessPoolExecutor(n_workers)
+        else:
+            raise ValueError(f"invalid executor : {executor}")
+
+    return _executors[key]
+
+
+def map_files(func, files, *args, n_workers: int = None, executor=None):
+    r"""Applies `func(file, *args)` to each file, concurrently if more than
+    one worker is requested.
+
+    Parameters
+    ----------
+    func : callable
+        Reader of a single file.
+    files : list of str
+        Paths of the files.
+    *args
+        Arguments passed to `func` after the file path.
+    n_workers : int, Optional
+        Number of workers. Default uses `pyrfu.mms.mms_config.py`
+    executor : {"thread", "process"} or concurrent.futures.Executor, Optional
+        Kind of pool or pool to use. Default uses `pyrfu.mms.mms_config.py`
+
+    Returns
+    -------
+    out : list
+        Outputs of `func` in the order of `files`.
+
+    """
+
+    if n_workers is None:
+        n_workers = CONFIG["n_workers"]
+
+    if not isinstance(executor, Executor) and (n_workers <= 1
+                                               or len(files) < 2):
+        return [func(file, *args) for file in files]
+
+    pool = get_executor(n_workers, executor)
+
+    return list(pool.map(func, files,
+                         *[itertools.repeat(arg, len(files)) for arg in args]))
+
+
+@atexit.register
+def shutdown_executors():
+    r"""Shuts down the worker pools shared by the loaders."""
+
+    for pool in _executors.values():
+        pool.shutdown(wait=False)
+
+    _executors.clear()
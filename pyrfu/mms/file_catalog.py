@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import os
+import re
+import sqlite3
+import logging
+import argparse
+import contextlib
+
+# Local imports
+from .mms_config import CONFIG
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["build_file_catalog", "open_file_catalog", "query_file_catalog",
+           "refresh_catalog_dirs"]
+
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
+CATALOG_NAME = ".pyrfu_catalog.sqlite"
+
+_file_name_regex = re.compile(r"mms([1-4])_.*_([0-9]{8,14})_v(\d+).(\d+).(\d+)"
+                              r".cdf$")
+
+_schema = ["CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, "
+           "value TEXT)",
+           "CREATE TABLE IF NOT EXISTS dirs (dir TEXT PRIMARY KEY, "
+           "mtime REAL)",
+           "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, "
+           "dir TEXT, probe TEXT, inst TEXT, tmmode TEXT, lev TEXT, "
+           "dtype TEXT, start_time INTEGER, version TEXT, mtime REAL, "
+           "size INTEGER)",
+           "CREATE INDEX IF NOT EXISTS files_dataset ON files (probe, inst, "
+           "tmmode, lev, dtype, start_time)",
+           "CREATE INDEX IF NOT EXISTS files_dir ON files (dir)"]
+
+
+def _catalog_path(data_path):
+    if CONFIG.get("catalog_path"):
+        return os.path.expanduser(CONFIG["catalog_path"])
+
+    return os.path.join(data_path, CATALOG_NAME)
+
+
+def _connect(catalog_path):
+    conn = sqlite3.connect(catalog_path, timeout=60.)
+
+    try:
+        with conn:
+            for statement in _schema:
+                conn.execute(statement)
+    except sqlite3.Error:
+        conn.close()
+        raise
+
+    return conn
+
+
+def _time_key(time_str):
+    r"""Converts a YYYYMMDD[hhmmss] string to a sortable integer."""
+    return int(f"{time_str:0<14}")
+
+
+def _dir_keys(data_path, local_dir):
+    r"""Dataset keys (probe, inst, tmmode, lev, dtype) of a data directory
+    spacecraft/instrument/rate/level[/datatype]/year/month[/day]"""
+
+    parts = os.path.relpath(local_dir, data_path).split(os.sep)
+
+    if len(parts) < 6 or not re.fullmatch(r"mms[1-4]", parts[0]):
+        return None
+
+    if re.fullmatch(r"[0-9]{4}", parts[4]):
+        dtype, dates = ["", parts[4:]]
+    else:
+        dtype, dates = [parts[4], parts[5:]]
+
+    n_dates = 3 if parts[2] == "brst" else 2
+
+    if len(dates) != n_dates or not all(d.isdigit() for d in dates):
+        return None
+
+    return parts[0][-1], parts[1], parts[2], parts[3], dtype
+
+
+def _scan_dir(conn, data_path, local_dir):
+    r"""(Re-)index the files of a single data directory, keeping only the
+    latest version of each file."""
+
+    keys = _dir_keys(data_path, local_dir)
+
+    conn.execute("DELETE FROM files WHERE dir = ?", (local_dir,))
+
+    try:
+        dir_mtime = os.stat(local_dir).st_mtime
+    except FileNotFoundError:
+        conn.execute("DELETE FROM dirs WHERE dir = ?", (local_dir,))
+        return 0
+
+    latest = {}
+
+    if keys is not None:
+        prefix = "mms{}_{}_{}_{}".format(*keys[:4])
+
+        with os.scandir(local_dir) as entries:
+            for entry in entries:
+                matches = _file_name_regex.match(entry.name)
+
+                if not matches or not entry.name.startswith(prefix):
+                    continue
+
+                start_time = _time_key(matches.group(2))
+                version = tuple(map(int, matches.groups()[2:]))
+
+                if start_time in latest \
+                        and latest[start_time][0] >= version:
+                    continue
+
+                stat = entry.stat()
+                latest[start_time] = (version, entry.path, stat.st_mtime,
+                                      stat.st_size)
+
+    rows = [(path, local_dir, *keys, start_time,
+             ".".join(map(str, version)), mtime, size)
+            for start_time, (version, path, mtime, size) in latest.items()]
+
+    conn.executemany("INSERT OR REPLACE INTO files VALUES "
+                     "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)",
+                 (local_dir, dir_mtime))
+
+    return len(rows)
+
+
+def refresh_catalog_dirs(conn, data_path, local_dirs, force: bool = False):
+    r"""Re-index the directories whose modification time changed since they
+    were last indexed.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to the file catalog.
+    data_path : str
+        Root of the MMS data.
+    local_dirs : list of str
+        Data directories to check.
+    force : bool, Optional
+        Re-index the directories even if their modification time did not
+        change. Default is False.
+
+    """
+
+    data_path = os.path.abspath(data_path)
+
+    with conn:
+        for local_dir in map(os.path.abspath, local_dirs):
+            row = conn.execute("SELECT mtime FROM dirs WHERE dir = ?",
+                               (local_dir,)).fetchone()
+
+            try:
+                dir_mtime = os.stat(local_dir).st_mtime
+            except FileNotFoundError:
+                dir_mtime = None
+
+            if dir_mtime is None and row is None:
+                continue
+
+            if force or row is None or dir_mtime != row[0]:
+                _scan_dir(conn, data_path, local_dir)
+
+
+def open_file_catalog(data_path: str = ""):
+    r"""Opens the file catalog of the MMS data in `data_path` if it has been
+    built.
+
+    Parameters
+    ----------
+    data_path : str, Optional
+        Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+
+    Returns
+    -------
+    conn : sqlite3.Connection or None
+        Connection to the catalog. None if the catalog does not exist or
+        indexes another data directory.
+
+    """
+
+    if not data_path:
+        data_path = CONFIG["local_data_dir"]
+
+    catalog_path = _catalog_path(data_path)
+
+    if not os.path.isfile(catalog_path):
+        return None
+
+    conn = _connect(catalog_path)
+
+    try:
+        root = conn.execute("SELECT value FROM meta "
+                            "WHERE key = 'data_path'").fetchone()
+    except sqlite3.Error:
+        conn.close()
+        raise
+
+    if root is None or root[0] != os.path.abspath(data_path):
+        conn.close()
+        return None
+
+    return conn
+
+
+def query_file_catalog(conn, mms_id, var, t_start, t_stop):
+    r"""Returns the latest version of the files of the target dataset which
+    start between `t_start` and `t_stop`, sorted in time.
+
+    Parameters
+    ----------
+    conn : sqlite3.Connection
+        Connection to the file catalog.
+    mms_id : str or int
+        Index of the spacecraft
+    var : dict
+        Dictionary containing 4 keys
+            * var["inst"] : name of the instrument
+            * var["tmmode"] : data rate
+            * var["lev"] : data level
+            * var["dtype"] : data type
+    t_start : str
+        Earliest start time of the files formatted as YYYYMMDD[hhmmss].
+    t_stop : str
+        Latest start time of the files formatted as YYYYMMDD[hhmmss].
+
+    Returns
+    -------
+    files : list of tuple
+        (start time, path) of the selected files.
+
+    """
+
+    keys = (str(mms_id), var["inst"], var["tmmode"], var["lev"],
+            var.get("dtype") or "", _time_key(t_start), _time_key(t_stop))
+
+    cursor = conn.execute("SELECT start_time, path FROM files "
+                          "WHERE probe = ? AND inst = ? AND tmmode = ? "
+                          "AND lev = ? AND dtype = ? "
+                          "AND start_time BETWEEN ? AND ? "
+                          "ORDER BY start_time", keys)
+
+    return cursor.fetchall()
+
+
+def build_file_catalog(data_path: str = "", rebuild: bool = False,
+                       verbose: bool = True):
+    r"""Builds or refreshes the on-disk catalog of the MMS data files used by
+    `pyrfu.mms.list_files`. Only the directories modified since the last
+    call are re-indexed.
+
+    Parameters
+    ----------
+    data_path : str, Optional
+        Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+    rebuild : bool, Optional
+        Drop the existing catalog and index everything again. Default is
+        False.
+    verbose : bool, Optional
+        Set to True to follow the indexing. Default is True.
+
+    Returns
+    -------
+    n_files : int
+        Number of files in the catalog.
+
+    Notes
+    -----
+    The catalog is stored in `data_path` unless
+    `pyrfu.mms.mms_config.CONFIG["catalog_path"]` is set.
+
+    """
+
+    if not data_path:
+        data_path = CONFIG["local_data_dir"]
+
+    data_path = os.path.abspath(data_path)
+
+    catalog_path = _catalog_path(data_path)
+
+    if rebuild and os.path.isfile(catalog_path):
+        os.remove(catalog_path)
+
+    with contextlib.closing(_connect(catalog_path)) as conn:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta "
+                         "VALUES ('data_path', ?)", (data_path,))
+
+        if verbose:
+            logging.info(f"Indexing {data_path}...")
+
+        local_dirs = set()
+
+        for root, _, files in os.walk(data_path):
+            if files and _dir_keys(data_path, root) is not None:
+                local_dirs.add(root)
+
+        # Forget the directories that were removed
+        indexed = {row[0] for row in conn.execute("SELECT dir FROM dirs")}
+        local_dirs |= indexed
+
+        refresh_catalog_dirs(conn, data_path, sorted(local_dirs))
+
+        n_files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    if verbose:
+        logging.info(f"{n_files:d} files indexed in {catalog_path}")
+
+    return n_files
+
+
+def _main():
+    arg_parser = argparse.ArgumentParser(
+        description="Build or refresh the catalog of the MMS data files.")
+    arg_parser.add_argument("data_path", nargs="?", default="",
+                            help="Path of MMS data.")
+    arg_parser.add_argument("--rebuild", action="store_true",
+                            help="Drop the existing catalog.")
+    args = arg_parser.parse_args()
+
+    build_file_catalog(args.data_path, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    _main()
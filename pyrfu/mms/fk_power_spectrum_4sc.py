@@ -16,7 +16,7 @@ import bisect
 import numpy as np
 import xarray as xr
 
-from ..pyrf import resample, avg_4sc, time_clip, wavelet
+from ..pyrf import ResamplePlan, avg_4sc, time_clip, wavelet
 
 
 def fk_power_spectrum_4sc(e, r, b, tints, cav: int = 8, num_k: int = 500,
@@ -96,11 +96,8 @@ def fk_power_spectrum_4sc(e, r, b, tints, cav: int = 8, num_k: int = 500,
 
     """
 
-    ic = np.arange(1, 5)
-
-    e = [resample(e[i - 1], e[0]) for i in ic]
-    r = [resample(r[i - 1], e[0]) for i in ic]
-    b = [resample(b[i - 1], e[0]) for i in ic]
+    out = ResamplePlan.resample_many([*e, *r, *b], e[0])
+    e, r, b = [out[:4], out[4:8], out[8:]]
 
     b_avg = avg_4sc(b)
 
@@ -137,9 +134,8 @@ def fk_power_spectrum_4sc(e, r, b, tints, cav: int = 8, num_k: int = 500,
     pos_av = cav / 2 + np.arange(n) * cav
     av_times = times[pos_av.astype(int)]
 
-    b_avg = resample(b_avg, av_times)
-
-    r = [resample(r[i], av_times) for i in range(4)]
+    # All on the time line of e[0]
+    b_avg, *r = ResamplePlan(e[0], av_times).apply([b_avg, *r])
 
     cx12, cx13, cx14 = [np.zeros((n, num_f), dtype="complex128") for _ in range(3)]
     cx23, cx24, cx34 = [np.zeros((n, num_f), dtype="complex128") for _ in range(3)]
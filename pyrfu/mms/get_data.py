@@ -7,12 +7,14 @@ import json
 import logging
 
 # Local imports
-from ..pyrf import dist_append, ts_append, ttns2datetime64
+from ..pyrf import concat_many, dist_concat_many, ttns2datetime64
 
 from .tokenize import tokenize
 from .list_files import list_files
 from .get_ts import get_ts
 from .get_dist import get_dist
+from .executor import map_files
+from .mms_config import CONFIG
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -26,6 +28,9 @@ logging.basicConfig(format='%(asctime)s: %(message)s',
                     datefmt='%d-%b-%y %H:%M:%S',
                     level=logging.INFO)
 
+# Active pyrfu.mms.Prefetcher
+_prefetchers = []
+
 
 def _var_and_cdf_name(var_str, mms_id):
     var = tokenize(var_str)
@@ -50,7 +55,8 @@ def _check_times(inp):
 
 
 def get_data(var_str, tint, mms_id, verbose: bool = True,
-             data_path: str = ""):
+             data_path: str = "", n_workers: int = None, executor=None,
+             lazy: bool = False):
     r"""Load a variable. var_str must be in var (see below)
 
     Parameters
@@ -65,6 +71,15 @@ def get_data(var_str, tint, mms_id, verbose: bool = True,
         Set to True to follow the loading. Default is True.
     data_path : str, Optional
         Path of MMS data. If None use `pyrfu.mms.mms_config.py`
+    n_workers : int, Optional
+        Number of files read concurrently. If None use
+        `pyrfu.mms.mms_config.py`
+    executor : {"thread", "process"} or concurrent.futures.Executor, Optional
+        Pool used to read the files. If None use `pyrfu.mms.mms_config.py`
+    lazy : bool, Optional
+        If True only the epochs and depends are read and the data are
+        returned as a dask array with one chunk per file which is read when
+        computed. Default is False.
 
     Returns
     -------
@@ -97,6 +112,13 @@ def get_data(var_str, tint, mms_id, verbose: bool = True,
 
     mms_id = str(mms_id)
 
+    if not lazy:
+        for prefetcher in _prefetchers:
+            out = prefetcher.get(var_str, tint, mms_id, data_path)
+
+            if out is not None:
+                return out
+
     var, cdf_name = _var_and_cdf_name(var_str, mms_id)
 
     files = list_files(tint, mms_id, var, data_path)
@@ -106,14 +128,21 @@ def get_data(var_str, tint, mms_id, verbose: bool = True,
     if verbose:
         logging.info(f"Loading {cdf_name}...")
 
-    out = None
+    if executor is None:
+        executor = CONFIG["executor"]
 
-    for file in files:
-        if "-dist" in var["dtype"]:
-            out = dist_append(out, get_dist(file, cdf_name, tint))
+    if "-dist" in var["dtype"]:
+        executor = executor or "process"
+        res = map_files(get_dist, files, cdf_name, tint, lazy,
+                        n_workers=n_workers, executor=executor)
+        concat = dist_concat_many
+    else:
+        executor = executor or "thread"
+        res = map_files(get_ts, files, cdf_name, tint, lazy,
+                        n_workers=n_workers, executor=executor)
+        concat = concat_many
 
-        else:
-            out = ts_append(out, get_ts(file, cdf_name, tint))
+    out = concat(res)
 
     out = _check_times(out)
 
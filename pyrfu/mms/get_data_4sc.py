@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+import xarray as xr
+
+# Local imports
+from ..pyrf import resample
+
+from .get_data import get_data
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+
+def get_data_4sc(var_str, tint, probes=(1, 2, 3, 4), align_to=None,
+                 verbose: bool = True, data_path: str = "", **kwargs):
+    r"""Load a variable for several spacecraft concurrently and align them
+    to a common time line.
+
+    Parameters
+    ----------
+    var_str : str
+        Key of the target variable (use mms.get_data() to see keys.).
+    tint : list of str
+        Time interval.
+    probes : tuple of int, Optional
+        Indices of the spacecraft. Default is (1, 2, 3, 4).
+    align_to : int or xarray.DataArray, Optional
+        Reference time line, either the index of one of the spacecraft or a
+        time series. Default is None (no alignment).
+    verbose : bool, Optional
+        Set to True to follow the loading. Default is True.
+    data_path : str, Optional
+        Path of MMS data. If None use `pyrfu.mms.mms_config.py`
+    **kwargs
+        Keyword arguments passed to `pyrfu.mms.get_data`.
+
+    Returns
+    -------
+    out : xarray.DataArray or list
+        If align_to is None the time series of the spacecraft in the order
+        of probes. Otherwise the time series resampled to the reference
+        time line and stacked with dimensions (time, probe, ...).
+
+    See also
+    --------
+    pyrfu.mms.get_data : Load a variable.
+
+    Examples
+    --------
+    >>> from pyrfu import mms, pyrf
+
+    Define time interval
+
+    >>> tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+
+    Load magnetic field and spacecraft position of the four spacecraft
+
+    >>> b_mms = mms.get_data_4sc("B_gse_fgm_srvy_l2", tint)
+    >>> r_mms = mms.get_data_4sc("R_gse_mec_srvy_l2", tint)
+
+    Magnetic field of the four spacecraft on the time line of MMS1
+
+    >>> b_4sc = mms.get_data_4sc("B_gse_fgm_srvy_l2", tint, align_to=1)
+    >>> b_avg = b_4sc.mean(dim="probe")
+
+    """
+
+    probes = list(probes)
+
+    with ThreadPoolExecutor(len(probes)) as pool:
+        futures = [pool.submit(get_data, var_str, tint, mms_id, verbose,
+                               data_path, **kwargs) for mms_id in probes]
+        out = [future.result() for future in futures]
+
+    if align_to is None:
+        return out
+
+    if isinstance(align_to, xr.DataArray):
+        ref = align_to
+    else:
+        assert align_to in probes, "align_to must be one of the probes"
+        ref = out[probes.index(align_to)]
+
+    out = [resample(inp, ref) for inp in out]
+
+    out = xr.concat(out, dim="probe", coords="minimal",
+                    combine_attrs="override")
+    out = out.assign_coords(probe=probes)
+    out = out.transpose("time", "probe", ...)
+
+    return out
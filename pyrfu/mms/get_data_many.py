@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import logging
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from ..pyrf import (concat_many, dist_concat_many, iso86012datetime64,
+                    datetime642ttns)
+
+from .list_files import list_files
+from .cdf_cache import CachedCDF
+from .get_ts import _read_ts, _tint_epochs
+from .get_dist import _read_dist
+from .get_data import _var_and_cdf_name, _check_times
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
+
+def _group_by_dataset(var_strs, mms_id):
+    datasets = {}
+
+    for var_str in var_strs:
+        var, cdf_name = _var_and_cdf_name(var_str, mms_id)
+
+        key = (var["inst"], var["tmmode"], var["lev"], var["dtype"])
+
+        if key not in datasets:
+            datasets[key] = {"var": var, "cdf_names": {}}
+
+        datasets[key]["cdf_names"][var_str] = cdf_name
+
+    return datasets
+
+
+def _read_files(files, cdf_names, tint, dist: bool = False):
+    r"""Reads the variables cdf_names (hash table key -> name in the cdf
+    files) of a dataset opening each file once."""
+
+    if dist:
+        tint = list(datetime642ttns(iso86012datetime64(np.array(tint))))
+    else:
+        tint = _tint_epochs(tint)
+
+    out = {key: [] for key in cdf_names}
+
+    for file in files:
+        with CachedCDF(file) as cdf_file:
+            shared = {}
+
+            for key, cdf_name in cdf_names.items():
+                if dist:
+                    res = _read_dist(cdf_file, cdf_name, tint)
+                else:
+                    res = _read_ts(cdf_file, cdf_name, tint, shared)
+
+                out[key].append(res)
+
+    for key in cdf_names:
+        if dist:
+            out[key] = dist_concat_many(out[key])
+        else:
+            out[key] = concat_many(out[key])
+
+        out[key] = _check_times(out[key])
+
+    return out
+
+
+def get_data_many(var_strs, tint, mms_id, verbose: bool = True,
+                  data_path: str = ""):
+    r"""Load several variables. The variables are grouped by dataset so that
+    each file is opened once and the epochs and depends shared between
+    variables are read once.
+
+    Parameters
+    ----------
+    var_strs : list of str
+        Keys of the target variables (use mms.get_data() to see keys.).
+    tint : list of str
+        Time interval.
+    mms_id : str or int
+        Index of the target spacecraft.
+    verbose : bool, Optional
+        Set to True to follow the loading. Default is True.
+    data_path : str, Optional
+        Path of MMS data. If None use `pyrfu.mms.mms_config.py`
+
+    Returns
+    -------
+    out : dict
+        Hash table of the time series (xarray.DataArray or xarray.Dataset)
+        of the target variables with the keys in `var_strs`.
+
+    See also
+    --------
+    pyrfu.mms.get_data : Load a variable.
+
+    Examples
+    --------
+    >>> from pyrfu import mms
+
+    Define time interval
+
+    >>> tint_brst = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+
+    Load ion moments from FPI
+
+    >>> moms_i = mms.get_data_many(["ni_fpi_brst_l2", "vi_gse_fpi_brst_l2",
+    ...                             "ti_gse_fpi_brst_l2"], tint_brst, 1)
+
+    """
+
+    mms_id = str(mms_id)
+
+    datasets = _group_by_dataset(var_strs, mms_id)
+
+    out = {}
+
+    for dataset in datasets.values():
+        var, cdf_names = [dataset["var"], dataset["cdf_names"]]
+
+        files = list_files(tint, mms_id, var, data_path)
+
+        assert files, "No files found. Make sure that the data_path is correct"
+
+        if verbose:
+            logging.info(f"Loading {', '.join(cdf_names.values())}...")
+
+        out.update(_read_files(files, cdf_names, tint,
+                               "-dist" in var["dtype"]))
+
+    return {var_str: out[var_str] for var_str in var_strs}
@@ -4,10 +4,12 @@
 # 3rd party imports
 import numpy as np
 
-from cdflib import CDF, cdfepoch
-
 # Local imports
-from ..pyrf import ts_skymap, iso86012datetime64, datetime642ttns
+from ..pyrf import (ts_skymap, iso86012datetime64, datetime642ttns,
+                    ttns2datetime64)
+
+from .get_ts import _record_range, _varget, _lazy_varget
+from .cdf_cache import CachedCDF
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -17,7 +19,99 @@ __version__ = "2.3.7"
 __status__ = "Prototype"
 
 
-def get_dist(file_path, cdf_name, tint):
+def _read_dist(f, cdf_name, tint, lazy=False):
+    r"""Reads the distribution named cdf_name in the opened cdf file. `tint`
+    is in epochs. If lazy the distribution is read when computed."""
+
+    tmmode = cdf_name.split("_")[-1]
+
+    cdf_info = f.cdf_info()
+    var_atts = f.varattsget(cdf_name)
+
+    depend0_key = var_atts["DEPEND_0"]
+    depend1_key = var_atts["DEPEND_1"]
+    depend2_key = var_atts["DEPEND_2"]
+    depend3_key = var_atts["DEPEND_3"]
+
+    # Records in the time interval, read only those of the record varying
+    # variables
+    t, rec_range = _record_range(f, depend0_key, tint)
+
+    if lazy:
+        dist = _lazy_varget(f, cdf_name, rec_range)
+    else:
+        dist = _varget(f, cdf_name, rec_range)
+
+    if tmmode == "brst":
+        t = ttns2datetime64(t)
+
+        if not t.size:
+            return None
+
+        dist = np.transpose(dist, [0, 3, 1, 2])
+        ph = _varget(f, depend1_key, rec_range)
+        th = _varget(f, depend2_key, rec_range)
+        en = _varget(f, depend3_key, rec_range)
+
+        en0_name = "_".join([cdf_name.split("_")[0],
+                             cdf_name.split("_")[1], "energy0",
+                             cdf_name.split("_")[-1]])
+        en1_name = "_".join([cdf_name.split("_")[0],
+                             cdf_name.split("_")[1], "energy1",
+                             cdf_name.split("_")[-1]])
+        d_en_name = "_".join([cdf_name.split("_")[0],
+                              cdf_name.split("_")[1], "energy_delta",
+                              cdf_name.split("_")[-1]])
+        e_step_table_name = "_".join([cdf_name.split("_")[0],
+                                      cdf_name.split("_")[1],
+                                      "steptable_parity",
+                                      cdf_name.split("_")[-1]])
+
+        step_table = _varget(f, e_step_table_name, rec_range)
+
+        if d_en_name in cdf_info["zVariables"]:
+            delta_plus_var = _varget(f, d_en_name, rec_range)
+            delta_minus_var = delta_plus_var
+
+        if en0_name not in cdf_info["zVariables"]:
+            energy0 = en[1, :]
+            energy1 = en[0, :]
+        else:
+            energy0 = _varget(f, en0_name, rec_range)
+            energy1 = _varget(f, en1_name, rec_range)
+
+        res = ts_skymap(t, dist, None, ph, th, energy0=energy0,
+                        energy1=energy1, esteptable=step_table)
+
+        if "delta_plus_var" in locals() and "delta_minus_var" in locals():
+            res.attrs["delta_energy_minus"] = delta_minus_var
+            res.attrs["delta_energy_plus"] = delta_plus_var
+
+        res.attrs = {**res.attrs, **var_atts}
+
+    elif tmmode == "fast":
+        dist = np.transpose(dist, [0, 3, 1, 2])
+        ph = _varget(f, depend1_key, rec_range)
+        th = _varget(f, depend2_key, rec_range)
+        en = _varget(f, depend3_key, rec_range)
+        res = ts_skymap(t, dist, en, ph, th)
+
+        for k in var_atts:
+            res.attrs[k] = var_atts[k]
+
+    for k in cdf_info:
+        res.attrs[k] = cdf_info[k]
+
+    res.attrs["tmmode"] = tmmode
+    if "_dis_" in cdf_name:
+        res.attrs["species"] = "ions"
+    else:
+        res.attrs["species"] = "electrons"
+
+    return res
+
+
+def get_dist(file_path, cdf_name, tint, lazy: bool = False):
     r"""Read field named cdf_name in file and convert to velocity distribution
     function.
 
@@ -29,6 +123,9 @@ def get_dist(file_path, cdf_name, tint):
         Name of the target variable in the cdf file.
     tint : list of str
         Time interval.
+    lazy : bool, Optional
+        If True the distribution is returned as a dask array which is read
+        from the file when computed. Default is False.
 
     Returns
     -------
@@ -38,91 +135,9 @@ def get_dist(file_path, cdf_name, tint):
 
     """
 
-    tmmode = cdf_name.split("_")[-1]
-
     tint = list(datetime642ttns(iso86012datetime64(np.array(tint))))
 
-    with CDF(file_path) as f:
-        if tmmode == "brst":
-            depend0_key = f.varattsget(cdf_name)["DEPEND_0"]
-            depend1_key = f.varattsget(cdf_name)["DEPEND_1"]
-            depend2_key = f.varattsget(cdf_name)["DEPEND_2"]
-            depend3_key = f.varattsget(cdf_name)["DEPEND_3"]
-
-            t = f.varget(depend0_key, starttime=tint[0], endtime=tint[1])
-            t = cdfepoch.to_datetime(t, to_np=True)
-
-            if not t.size:
-                return None
-
-            dist = f.varget(cdf_name, starttime=tint[0], endtime=tint[1])
-            dist = np.transpose(dist, [0, 3, 1, 2])
-            ph = f.varget(depend1_key, starttime=tint[0], endtime=tint[1])
-            th = f.varget(depend2_key)
-            en = f.varget(depend3_key, starttime=tint[0], endtime=tint[1])
-
-            en0_name = "_".join([cdf_name.split("_")[0],
-                                 cdf_name.split("_")[1], "energy0",
-                                 cdf_name.split("_")[-1]])
-            en1_name = "_".join([cdf_name.split("_")[0],
-                                 cdf_name.split("_")[1], "energy1",
-                                 cdf_name.split("_")[-1]])
-            d_en_name = "_".join([cdf_name.split("_")[0],
-                                  cdf_name.split("_")[1], "energy_delta",
-                                  cdf_name.split("_")[-1]])
-            e_step_table_name = "_".join([cdf_name.split("_")[0],
-                                          cdf_name.split("_")[1],
-                                          "steptable_parity",
-                                          cdf_name.split("_")[-1]])
-
-            step_table = f.varget(e_step_table_name,
-                                  starttime=tint[0], endtime=tint[1])
-            if d_en_name in f.cdf_info()["zVariables"]:
-                delta_plus_var = f.varget(d_en_name,
-                                          starttime=tint[0], endtime=tint[1])
-                delta_minus_var = f.varget(d_en_name,
-                                           starttime=tint[0], endtime=tint[1])
-
-            if en0_name not in f.cdf_info()["zVariables"]:
-                energy0 = en[1, :]
-                energy1 = en[0, :]
-            else:
-                energy0 = f.varget(en0_name)
-                energy1 = f.varget(en1_name)
-
-            res = ts_skymap(t, dist, None, ph, th, energy0=energy0,
-                            energy1=energy1, esteptable=step_table)
-
-            if "delta_plus_var" in locals() and "delta_minus_var" in locals():
-                res.attrs["delta_energy_minus"] = delta_minus_var
-                res.attrs["delta_energy_plus"] = delta_plus_var
-
-            res.attrs = {**res.attrs, **f.varattsget(cdf_name)}
-
-        elif tmmode == "fast":
-            depend0_key = f.varattsget(cdf_name)["DEPEND_0"]
-            depend1_key = f.varattsget(cdf_name)["DEPEND_1"]
-            depend2_key = f.varattsget(cdf_name)["DEPEND_2"]
-            depend3_key = f.varattsget(cdf_name)["DEPEND_3"]
-
-            t = f.varget(depend0_key, starttime=tint[0], endtime=tint[1])
-
-            dist = f.varget(cdf_name, starttime=tint[0], endtime=tint[1])
-            dist = np.transpose(dist, [0, 3, 1, 2])
-            ph = f.varget(depend1_key)
-            th = f.varget(depend2_key)
-            en = f.varget(depend3_key, starttime=tint[0], endtime=tint[1])
-            res = ts_skymap(t, dist, en, ph, th)
-
-            for k in f.varattsget(cdf_name):
-                res.attrs[k] = f.varattsget(cdf_name)[k]
-
-        for k in f.cdf_info():
-            res.attrs[k] = f.cdf_info()[k]
-
-        res.attrs["tmmode"] = tmmode
-        if "_dis_" in cdf_name:
-            res.attrs["species"] = "ions"
-        else:
-            res.attrs["species"] = "electrons"
+    with CachedCDF(file_path) as f:
+        res = _read_dist(f, cdf_name, tint, lazy=lazy)
+
     return res
@@ -1,13 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+# Built-in imports
+import logging
+
 # 3rd party imports
 import xarray as xr
 
 # Local imports
 from .list_files import list_files
-from .db_get_ts import db_get_ts
-from .db_get_variable import db_get_variable
+from .get_variable import get_variable
+from .get_data_many import _read_files
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -16,11 +19,17 @@ __license__ = "MIT"
 __version__ = "2.3.7"
 __status__ = "Prototype"
 
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
 
 def get_eis_allt(tar_var, tint, mms_id, verbose: bool = True,
                  data_path: str = ""):
     r"""Read energy spectrum of the selected specie in the selected energy
-    range for all telescopes.
+    range for all telescopes. The files are listed and opened once for all
+    the telescopes.
 
     Parameters
     ----------
@@ -89,37 +98,25 @@ def get_eis_allt(tar_var, tint, mms_id, verbose: bool = True,
     else:
         raise ValueError("Invalid data unit")
 
-    # Name of the data containing index of the probe, instrument, data rate,
-    # data level and data type if needed
-    dset_name = f"mms{var['mms_id']:d}_{var['inst']}_{var['tmmode']}" \
-                f"_{var['lev']}_{var['dtype']}"
-
-    # Names of the energy spectra in the CDF (one for each telescope)
-    cdfnames = ["{}_{}{:d}".format(pref, suf, t) for t in range(6)]
-
-    spin_nums = db_get_ts(dset_name, f"{pref}_spin", tint, data_path=data_path)
-    sectors = db_get_ts(dset_name, f"{pref}_sector", tint, data_path=data_path)
-
-    e_minu = db_get_variable(dset_name, f"{pref}_{specie}_t0_energy_dminus",
-                             tint, verbose=verbose, data_path=data_path)
+    # Names of the spin, sector, energy spectra (one for each telescope) and
+    # look directions in the CDF
+    cdf_names = {"spin": f"{pref}_spin", "sector": f"{pref}_sector"}
 
-    e_plus = db_get_variable(dset_name, f"{pref}_{specie}_t0_energy_dplus",
-                             tint, verbose=verbose, data_path=data_path)
+    for t in range(6):
+        cdf_names[f"t{t:d}"] = f"{pref}_{suf}{t:d}"
+        cdf_names[f"look_t{t:d}"] = f"{pref}_look_t{t:d}"
 
-    outdict = {"spin": spin_nums, "sector": sectors}
+    if verbose:
+        logging.info(f"Loading {', '.join(cdf_names.values())}...")
 
-    for i, cdfname in enumerate(cdfnames):
-        scope_key = f"t{i:d}"
+    outdict = _read_files(files, cdf_names, tint)
 
-        outdict[scope_key] = db_get_ts(dset_name, cdfname, tint,
-                                       verbose=verbose, data_path=data_path)
-        outdict[scope_key] = outdict[scope_key].rename({"time": "time",
+    for t in range(6):
+        outdict[f"t{t:d}"] = outdict[f"t{t:d}"].rename({"time": "time",
                                                         "Energy": "energy"})
 
-        outdict[f"look_{scope_key}"] = db_get_ts(dset_name,
-                                                 f"{pref}_look_{scope_key}",
-                                                 tint, verbose=verbose,
-                                                 data_path=data_path)
+    e_minu = get_variable(files[0], f"{pref}_{specie}_t0_energy_dminus")
+    e_plus = get_variable(files[0], f"{pref}_{specie}_t0_energy_dplus")
 
     e_plus = e_plus.assign_coords(x=outdict["t0"].energy.data)
     e_minu = e_minu.assign_coords(x=outdict["t0"].energy.data)
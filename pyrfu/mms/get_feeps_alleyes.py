@@ -1,12 +1,16 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+# Built-in imports
+import logging
+
 # 3rd party imports
 import xarray as xr
 
 # Local imports
+from .list_files import list_files
 from .feeps_active_eyes import feeps_active_eyes
-from .db_get_ts import db_get_ts
+from .get_data_many import _read_files
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -15,6 +19,11 @@ __license__ = "MIT"
 __version__ = "2.3.7"
 __status__ = "Prototype"
 
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
 data_units_keys = {"flux": "intensity", "counts": "counts",
                    "cps": "count_rate", "mask": "sector_mask"}
 
@@ -39,43 +48,11 @@ def _tokenize(tar_var):
     return var, data_units
 
 
-def _get_oneeye(tar_var, e_id, tint, mms_id, verbose: bool = True,
-                data_path: str = ""):
-    mms_id = int(mms_id)
-
-    var, data_units = _tokenize(tar_var)
-
-    dset_name = f"mms{mms_id:d}_feeps_{var['tmmode']}_l2_{var['dtype']}"
-    pref = f"epd_feeps_{var['tmmode']}_{var['lev']}_{var['dtype']}"
-
-    active_eyes = feeps_active_eyes(var, tint, mms_id)
-
-    if e_id.split("-")[0] in ["top", "bottom"]:
-        suf = e_id.split("-")[0]
-        e_id = int(e_id.split("-")[1])
-
-        assert e_id in active_eyes[suf], "Unactive eye"
-
-        suf = f"{suf}_{data_units}_sensorid_{e_id:d}"
-
-    else:
-        raise ValueError("Invalid format of eye id")
-
-    out = db_get_ts(dset_name, f"mms{mms_id:d}_{pref}_{suf}", tint, verbose,
-                    data_path=data_path)
-
-    out.attrs["tmmode"] = var["tmmode"]
-    out.attrs["lev"] = var["lev"]
-    out.attrs["mms_id"] = mms_id
-    out.attrs["dtype"] = var["dtype"]
-    out.attrs["species"] = "{}s".format(var["dtype"])
-    return out
-
-
 def get_feeps_alleyes(tar_var, tint, mms_id, verbose: bool = True,
                       data_path: str = ""):
     r"""Read energy spectrum of the selected specie in the selected energy
-    range for all FEEPS eyes.
+    range for all FEEPS eyes. The files are listed and opened once for all
+    the eyes.
 
     Parameters
     ----------
@@ -113,42 +90,44 @@ def get_feeps_alleyes(tar_var, tint, mms_id, verbose: bool = True,
 
     mms_id = int(mms_id)
 
-    specie = tar_var.split("_")[0][-1]
+    var, data_units = _tokenize(tar_var)
+    var["mmsId"] = mms_id
 
-    var = {"tmmode": tar_var.split("_")[1], "lev": tar_var.split("_")[2],
-           "mmsId": mms_id}
+    pref = f"mms{mms_id:d}_epd_feeps_{var['tmmode']}_{var['lev']}_" \
+           f"{var['dtype']}"
 
-    if specie == "e":
-        var["dtype"] = "electron"
-    elif specie == "i":
-        var["dtype"] = "ion"
-    else:
-        raise ValueError("Invalid specie")
+    active_eyes = feeps_active_eyes(var, tint, mms_id)
 
-    dset_name = f"mms{mms_id:d}_feeps_{var['tmmode']}_l2_{var['dtype']}"
-    pref = f"epd_feeps_{var['tmmode']}_{var['lev']}_{var['dtype']}"
+    cdf_names = {"spinsectnum": f"{pref}_spinsectnum",
+                 "pitch_angle": f"{pref}_pitch_angle"}
 
-    active_eyes = feeps_active_eyes(var, tint, mms_id)
+    for k in active_eyes:
+        for s in active_eyes[k]:
+            cdf_names[f"{k}-{s:d}"] = f"{pref}_{k}_{data_units}_sensorid_{s:d}"
+
+    files = list_files(tint, mms_id, {"inst": "feeps", "tmmode": var["tmmode"],
+                                      "lev": "l2", "dtype": var["dtype"]},
+                       data_path=data_path)
 
-    e_ids = [f"{k}-{s:d}" for k in active_eyes for s in active_eyes[k]]
+    if verbose:
+        logging.info(f"Loading {', '.join(cdf_names.values())}...")
 
-    out_dict = {"spinsectnum": db_get_ts(dset_name,
-                                         f"mms{mms_id:d}_{pref}_spinsectnum",
-                                         tint, data_path=data_path),
-                "pitch_angle": db_get_ts(dset_name,
-                                         f"mms{mms_id:d}_{pref}_pitch_angle",
-                                         tint, data_path=data_path)}
+    out_dict = _read_files(files, cdf_names, tint)
 
     new_names = {"time": "time", "Differential_energy_channels": "energy"}
 
-    for e_id in e_ids:
-        out_dict[e_id] = _get_oneeye(tar_var, e_id, tint, mms_id, verbose,
-                                     data_path=data_path)
+    for e_id in list(cdf_names)[2:]:
+        out_dict[e_id].attrs["tmmode"] = var["tmmode"]
+        out_dict[e_id].attrs["lev"] = var["lev"]
+        out_dict[e_id].attrs["mms_id"] = mms_id
+        out_dict[e_id].attrs["dtype"] = var["dtype"]
+        out_dict[e_id].attrs["species"] = "{}s".format(var["dtype"])
         out_dict[e_id] = out_dict[e_id].rename(new_names)
 
     out = xr.Dataset(out_dict)
 
-    out.attrs = var
+    out.attrs = {"tmmode": var["tmmode"], "lev": var["lev"],
+                 "mmsId": mms_id, "dtype": var["dtype"]}
 
     out.attrs["specie"] = var["dtype"]
 
@@ -5,10 +5,16 @@
 import numpy as np
 import xarray as xr
 
-from cdflib import CDF, cdfepoch
+try:
+    import dask
+    import dask.array as da
+except ImportError:
+    dask, da = [None, None]
 
 # Local imports
-from ..pyrf import datetime642iso8601, iso86012datetime64
+from ..pyrf import iso86012datetime64, datetime642ttns, ttns2datetime64
+
+from .cdf_cache import CachedCDF
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -18,20 +24,119 @@ __version__ = "2.3.7"
 __status__ = "Prototype"
 
 
-def _get_epochs(file, cdf_name, tint):
-    depend0_key = file.varattsget(cdf_name)["DEPEND_0"]
+def _shared(shared, key, func, *args):
+    r"""Reads a quantity once per file when several variables are read from
+    the same file."""
+
+    if shared is None:
+        return func(*args)
+
+    if key not in shared:
+        shared[key] = func(*args)
+
+    # Attributes are modified when building the DataArray
+    out = dict(shared[key])
+    out["atts"] = dict(out["atts"])
+
+    return out
+
+
+def _record_range(file, depend0_key, tint):
+    r"""Reads the epochs and finds the records [start, stop) in the time
+    interval."""
+
+    epochs = file.varget(depend0_key)
+
+    if epochs is None:
+        epochs = np.array([], dtype=np.int64)
+
+    epochs = np.atleast_1d(epochs)
+
+    start = int(np.searchsorted(epochs, tint[0], side="left"))
+    stop = int(np.searchsorted(epochs, tint[1], side="right"))
+
+    return epochs[start:stop], (start, stop)
+
+
+def _varget(file, var_name, rec_range):
+    r"""Reads the records in rec_range of a record varying variable or the
+    whole non record varying variable."""
+
+    if not file.varinq(var_name)["Rec_Vary"]:
+        return file.varget(var_name)
+
+    start, stop = rec_range
+
+    if stop > start:
+        return file.varget(var_name, startrec=start, endrec=stop - 1)
+
+    out = file.varget(var_name, startrec=0, endrec=0)
+
+    if out is None:
+        return np.array([])
+
+    return out[:0]
+
+
+def _read_records(file_path, var_name, rec_range):
+    with CachedCDF(file_path) as file:
+        out = _varget(file, var_name, rec_range)
+
+    return out
 
-    out = {"data": file.varget(depend0_key,
-                               starttime=tint[0], endtime=tint[1])}
+
+def _lazy_varget(file, var_name, rec_range):
+    r"""Deferred read of the records in rec_range of a record varying
+    variable. Only the first record is read to get the shape and type of
+    the data."""
+
+    if da is None:
+        raise ImportError("dask is required to load data lazily")
+
+    start, stop = rec_range
+
+    if not file.varinq(var_name)["Rec_Vary"] or stop <= start:
+        return _varget(file, var_name, rec_range)
+
+    sample = _varget(file, var_name, (start, start + 1))
+
+    data = dask.delayed(_read_records)(file.file_path, var_name, rec_range)
+
+    return da.from_delayed(data, (stop - start, *sample.shape[1:]),
+                           dtype=sample.dtype)
+
+
+def _read_depend_data(file, depend_key):
+    r"""Reads the values of a depend. Only the first record of a record
+    varying depend is used."""
+
+    var_inq = file.varinq(depend_key)
+
+    if var_inq["Rec_Vary"] and var_inq["Num_Dims"] > 0:
+        return file.varget(depend_key, startrec=0, endrec=0)
+
+    return file.varget(depend_key)
+
+
+def _read_epochs(file, depend0_key, tint):
+    out = {}
+    out["data"], out["range"] = _record_range(file, depend0_key, tint)
 
     if file.varinq(depend0_key)["Data_Type_Description"] == "CDF_TIME_TT2000":
-        out["data"] = cdfepoch.to_datetime(out["data"], to_np=True)
+        out["data"] = ttns2datetime64(out["data"])
 
     out["atts"] = file.varattsget(depend0_key)
 
     return out
 
 
+def _get_epochs(file, cdf_name, tint, shared=None):
+    depend0_key = file.varattsget(cdf_name)["DEPEND_0"]
+
+    return _shared(shared, ("epochs", depend0_key), _read_epochs, file,
+                   depend0_key, tint)
+
+
 def _get_depend_attributes(file, depend_key):
     attributes = file.varattsget(depend_key)
 
@@ -48,26 +153,15 @@ def _get_depend_attributes(file, depend_key):
     return attributes
 
 
-def _get_depend(file, cdf_name, tint, dep_num=1):
+def _read_depend(file, depend_key):
     out = {}
 
-    try:
-        depend_key = file.varattsget(cdf_name)[f"DEPEND_{dep_num:d}"]
-    except KeyError:
-        depend_key = file.varattsget(cdf_name)[f"REPRESENTATION_{dep_num:d}"]
-
     if depend_key == "x,y,z":
         out["data"] = np.array(depend_key.split(","))
 
         out["atts"] = {"LABLAXIS": "comp"}
     else:
-        try:
-            out["data"] = file.varget(depend_key, starttime=tint[0],
-                                      endtime=tint[1])
-        except IndexError:
-            out["data"] = file.varget(depend_key)
-
-        out["data"] = file.varget(depend_key)
+        out["data"] = _read_depend_data(file, depend_key)
 
         if len(out["data"]) == 1:
             out["data"] = out["data"][0]
@@ -89,82 +183,80 @@ def _get_depend(file, cdf_name, tint, dep_num=1):
     return out
 
 
-def get_ts(file_path, cdf_name, tint):
-    r"""Reads field named cdf_name in file and convert to time series.
+def _get_depend(file, cdf_name, dep_num=1, shared=None):
+    try:
+        depend_key = file.varattsget(cdf_name)[f"DEPEND_{dep_num:d}"]
+    except KeyError:
+        depend_key = file.varattsget(cdf_name)[f"REPRESENTATION_{dep_num:d}"]
 
-    Parameters
-    ----------
-    file_path : str
-        Path of the cdf file.
-    cdf_name : str
-        Name of the target variable in the cdf file.
-    tint : list of str
-        Time interval.
+    return _shared(shared, ("depend", depend_key), file.memoize,
+                   f"{depend_key}.depend", _read_depend, file, depend_key)
 
-    Returns
-    -------
-    out : xarray.DataArray
-        Time series of the target variable in the selected time interval.
 
-    """
+def _tint_epochs(tint):
+    r"""Converts time interval to epochs"""
+    return list(datetime642ttns(iso86012datetime64(np.array(tint))))
 
-    # Convert time interval to epochs
-    tint = list(datetime642iso8601(iso86012datetime64(np.array(tint))))
-    tint = list(map(cdfepoch.parse, tint))
+
+def _read_ts(file, cdf_name, tint, shared=None, lazy=False):
+    r"""Reads field named cdf_name in the opened cdf file. `tint` is in
+    epochs. `shared` holds the epochs and depends already read from the
+    file. If lazy the data are read when computed."""
 
     out_dict = {}
     time, depend_1, depend_2, depend_3 = [{}, {}, {}, {}]
 
-    with CDF(file_path) as file:
-        attrs_ = file.varattsget(cdf_name)
-        out_dict["atts"] = attrs_
+    attrs_ = file.varattsget(cdf_name)
+    out_dict["atts"] = attrs_
 
-        assert "DEPEND_0" in attrs_ and "epoch" in attrs_["DEPEND_0"].lower()
+    assert "DEPEND_0" in attrs_ and "epoch" in attrs_["DEPEND_0"].lower()
 
-        time = _get_epochs(file, cdf_name, tint)
+    time = _get_epochs(file, cdf_name, tint, shared)
 
-        if "DEPEND_1" in attrs_ or "REPRESENTATION_1" in attrs_:
-            depend_1 = _get_depend(file, cdf_name, tint, 1)
+    if "DEPEND_1" in attrs_ or "REPRESENTATION_1" in attrs_:
+        depend_1 = _get_depend(file, cdf_name, 1, shared)
 
-        elif "afg" in cdf_name or "dfg" in cdf_name:
-            depend_1 = {"data": ["x", "y", "z"], "atts": {"LABLAXIS": "comp"}}
+    elif "afg" in cdf_name or "dfg" in cdf_name:
+        depend_1 = {"data": ["x", "y", "z"], "atts": {"LABLAXIS": "comp"}}
 
-        if "DEPEND_2" in attrs_ or "REPRESENTATION_2" in attrs_:
-            depend_2 = _get_depend(file, cdf_name, tint, 2)
+    if "DEPEND_2" in attrs_ or "REPRESENTATION_2" in attrs_:
+        depend_2 = _get_depend(file, cdf_name, 2, shared)
 
-            if depend_2["atts"]["LABLAXIS"] == depend_1["atts"]["LABLAXIS"]:
-                depend_1["atts"]["LABLAXIS"] = "rcomp"
-                depend_2["atts"]["LABLAXIS"] = "ccomp"
+        if depend_2["atts"]["LABLAXIS"] == depend_1["atts"]["LABLAXIS"]:
+            depend_1["atts"]["LABLAXIS"] = "rcomp"
+            depend_2["atts"]["LABLAXIS"] = "ccomp"
 
-        if "DEPEND_3" in attrs_ or "REPRESENTATION_3" in attrs_:
-            if "REPRESENTATION_3" in attrs_:
-                assert out_dict["atts"]["REPRESENTATION_3"] != "x,y,z"
+    if "DEPEND_3" in attrs_ or "REPRESENTATION_3" in attrs_:
+        if "REPRESENTATION_3" in attrs_:
+            assert out_dict["atts"]["REPRESENTATION_3"] != "x,y,z"
 
-            depend_3 = _get_depend(file, cdf_name, tint, 3)
+        depend_3 = _get_depend(file, cdf_name, 3, shared)
 
-            if depend_3["atts"]["LABLAXIS"] == depend_2["atts"]["LABLAXIS"]:
-                depend_2["atts"]["LABLAXIS"] = "rcomp"
-                depend_3["atts"]["LABLAXIS"] = "ccomp"
+        if depend_3["atts"]["LABLAXIS"] == depend_2["atts"]["LABLAXIS"]:
+            depend_2["atts"]["LABLAXIS"] = "rcomp"
+            depend_3["atts"]["LABLAXIS"] = "ccomp"
 
-        if "sector_mask" in cdf_name:
-            cdf_name_mask = cdf_name.replace("sector_mask", "intensity")
-            depend_1_key = file.varattsget(cdf_name_mask)["DEPEND_1"]
+    if "sector_mask" in cdf_name:
+        cdf_name_mask = cdf_name.replace("sector_mask", "intensity")
+        depend_1_key = file.varattsget(cdf_name_mask)["DEPEND_1"]
 
-            depend_1["data"] = file.varget(depend_1_key)
-            depend_1["atts"] = file.varattsget(depend_1_key)
+        depend_1["data"] = _read_depend_data(file, depend_1_key)
+        depend_1["atts"] = file.varattsget(depend_1_key)
 
-            depend_1["atts"]["LABLAXIS"] = depend_1["atts"][
-                "LABLAXIS"].replace(" ", "_")
+        depend_1["atts"]["LABLAXIS"] = depend_1["atts"][
+            "LABLAXIS"].replace(" ", "_")
 
-        if "edp_dce_sensor" in cdf_name:
-            depend_1["data"] = ["x", "y", "z"]
-            depend_1["atts"] = {"LABLAXIS": "comp"}
+    if "edp_dce_sensor" in cdf_name:
+        depend_1["data"] = ["x", "y", "z"]
+        depend_1["atts"] = {"LABLAXIS": "comp"}
 
-        out_dict["data"] = file.varget(cdf_name, starttime=tint[0],
-                                       endtime=tint[1])
+    if lazy:
+        out_dict["data"] = _lazy_varget(file, cdf_name, time["range"])
+    else:
+        out_dict["data"] = _varget(file, cdf_name, time["range"])
 
-        if out_dict["data"].ndim == 2 and out_dict["data"].shape[1] == 4:
-            out_dict["data"] = out_dict["data"][:, :-1]
+    if out_dict["data"].ndim == 2 and out_dict["data"].shape[1] == 4:
+        out_dict["data"] = out_dict["data"][:, :-1]
 
     if out_dict["data"].ndim == 2 and not depend_1:
         depend_1["data"] = np.arange(out_dict["data"].shape[1])
@@ -208,7 +300,41 @@ def get_ts(file_path, cdf_name, tint):
     out = xr.DataArray(out_dict["data"], coords=coords_data, dims=dims,
                        attrs=out_dict["atts"])
 
+    # xarray names the time series after the key of a dask array
+    out.name = None
+
     for dim, coord_atts in zip(dims, coords_atts):
         out[dim].attrs = coord_atts
 
     return out
+
+
+def get_ts(file_path, cdf_name, tint, lazy: bool = False):
+    r"""Reads field named cdf_name in file and convert to time series.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the cdf file.
+    cdf_name : str
+        Name of the target variable in the cdf file.
+    tint : list of str
+        Time interval.
+    lazy : bool, Optional
+        If True the data are returned as a dask array which is read from the
+        file when computed. Default is False.
+
+    Returns
+    -------
+    out : xarray.DataArray
+        Time series of the target variable in the selected time interval.
+
+    """
+
+    # Convert time interval to epochs
+    tint = _tint_epochs(tint)
+
+    with CachedCDF(file_path) as file:
+        out = _read_ts(file, cdf_name, tint, lazy=lazy)
+
+    return out
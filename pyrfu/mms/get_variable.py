@@ -5,7 +5,8 @@
 import numpy as np
 import xarray as xr
 
-from cdflib import cdfread
+# Local imports
+from .cdf_cache import CachedCDF
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -32,7 +33,7 @@ def get_variable(file_path, cdf_name):
 
     """
 
-    with cdfread.CDF(file_path) as file:
+    with CachedCDF(file_path) as file:
         var_data = file.varget(cdf_name)
         var_atts = file.varattsget(cdf_name)
 
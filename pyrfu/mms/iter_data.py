@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import logging
+
+from concurrent.futures import ThreadPoolExecutor
+
+# 3rd party imports
+import numpy as np
+import pandas as pd
+
+# Local imports
+from ..pyrf import concat_many, dist_concat_many, iso86012datetime64
+
+from .list_files import list_files
+from .get_ts import get_ts
+from .get_dist import get_dist
+from .get_data import _var_and_cdf_name, _check_times
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+logging.captureWarnings(True)
+logging.basicConfig(format='%(asctime)s: %(message)s',
+                    datefmt='%d-%b-%y %H:%M:%S',
+                    level=logging.INFO)
+
+
+# Attributes of the distributions with one element per record
+_RECORD_ATTRS = ["esteptable", "delta_energy_plus", "delta_energy_minus"]
+
+
+def _isel_records(inp, idx: slice):
+    r"""Records idx of the time series with the attributes which have one
+    element per record."""
+
+    out = inp.isel(time=idx)
+    out.attrs = dict(inp.attrs)
+
+    for k in _RECORD_ATTRS:
+        if k in out.attrs:
+            out.attrs[k] = np.asarray(out.attrs[k])[idx]
+
+    return out
+
+
+def _time_blocks(buf, t_start, t_stop, k, chunk, overlap, last):
+    r"""Splits the buffer in blocks of duration chunk starting at
+    t_start + k * chunk. Returns the blocks, the index of the next block and
+    the remaining buffer."""
+
+    blocks = []
+
+    while len(buf.time):
+        times = buf.time.data
+
+        start = t_start + k * chunk
+        stop = start + chunk
+
+        if start > t_stop or start > times[-1]:
+            break
+
+        if not last and times[-1] < stop + overlap:
+            break
+
+        idx_l, idx_r = np.searchsorted(times, [start - overlap,
+                                               stop + overlap])
+        core_l, core_r = np.searchsorted(times, [start, stop])
+
+        if core_r > core_l:
+            blocks.append(_isel_records(buf, slice(idx_l, idx_r)))
+            k += 1
+        else:
+            # Skip data gap
+            k = max(k + 1, int((times[core_r] - t_start) // chunk))
+
+        # Drop the data which are not needed by the next blocks
+        idx_keep = np.searchsorted(times, t_start + k * chunk - overlap)
+        buf = _isel_records(buf, slice(idx_keep, None))
+
+    return blocks, k, buf
+
+
+def _record_blocks(buf, offset, k, chunk, overlap, last):
+    r"""Splits the buffer in blocks of chunk records. offset is the index of
+    the first record of the buffer in the whole time series. Returns the
+    blocks, the index of the next block, the remaining buffer and its
+    offset."""
+
+    blocks = []
+
+    while k * chunk < offset + len(buf.time):
+        stop = (k + 1) * chunk + overlap
+
+        if not last and offset + len(buf.time) < stop:
+            break
+
+        idx_l = max(k * chunk - overlap, 0) - offset
+        blocks.append(_isel_records(buf, slice(idx_l, stop - offset)))
+        k += 1
+
+        # Drop the data which are not needed by the next blocks
+        idx_keep = max(k * chunk - overlap, offset)
+        buf = _isel_records(buf, slice(idx_keep - offset, None))
+        offset = idx_keep
+
+    return blocks, k, buf, offset
+
+
+def iter_data(var_str, tint, mms_id, chunk="1h", overlap=None,
+              verbose: bool = True, data_path: str = ""):
+    r"""Iterates over a variable in time ordered blocks. The files are read
+    one at a time while the next one is read in the background so that the
+    memory use does not depend on the length of the time interval.
+
+    Parameters
+    ----------
+    var_str : str
+        Key of the target variable (use mms.get_data() to see keys.).
+    tint : list of str
+        Time interval.
+    mms_id : str or int
+        Index of the target spacecraft.
+    chunk : str or numpy.timedelta64 or int, Optional
+        Duration (e.g., "1h", "10min") or number of records of the blocks.
+        Default is "1h".
+    overlap : str or numpy.timedelta64 or int, Optional
+        Padding added on both sides of the blocks, in the same units as
+        chunk. Default is no padding.
+    verbose : bool, Optional
+        Set to True to follow the loading. Default is True.
+    data_path : str, Optional
+        Path of MMS data. If None use `pyrfu.mms.mms_config.py`
+
+    Yields
+    ------
+    out : xarray.DataArray or xarray.Dataset
+        Block of the time series of the target variable. Empty blocks (data
+        gaps) are skipped.
+
+    See also
+    --------
+    pyrfu.mms.get_data : Load a variable.
+
+    Examples
+    --------
+    >>> import numpy as np
+    >>> from pyrfu import mms, pyrf
+
+    Define time interval
+
+    >>> tint = ["2019-09-01T00:00:00.000", "2019-10-01T00:00:00.000"]
+
+    Hourly mean of the magnetic field magnitude
+
+    >>> b_mean = [np.mean(pyrf.norm(b_xyz)) for b_xyz in
+    ...           mms.iter_data("B_gse_fgm_srvy_l2", tint, 1, chunk="1h")]
+
+    """
+
+    mms_id = str(mms_id)
+
+    var, cdf_name = _var_and_cdf_name(var_str, mms_id)
+
+    files = list_files(tint, mms_id, var, data_path)
+
+    assert files, "No files found. Make sure that the data_path is correct"
+
+    if "-dist" in var["dtype"]:
+        reader, concat = [get_dist, dist_concat_many]
+    else:
+        reader, concat = [get_ts, concat_many]
+
+    by_records = isinstance(chunk, (int, np.integer))
+
+    if by_records:
+        overlap = int(overlap or 0)
+    else:
+        chunk = pd.Timedelta(chunk).to_timedelta64().astype("<m8[ns]")
+        overlap = pd.Timedelta(overlap or 0).to_timedelta64()
+        overlap = overlap.astype("<m8[ns]")
+
+    t_start, t_stop = iso86012datetime64(np.array(tint))
+
+    buf, offset, k = [None, 0, 0]
+
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(reader, files[0], cdf_name, tint)
+
+        for i, file in enumerate(files):
+            if verbose:
+                logging.info(f"Loading {cdf_name} from {file}...")
+
+            res = future.result()
+
+            # Prefetch the next file
+            if i + 1 < len(files):
+                future = pool.submit(reader, files[i + 1], cdf_name, tint)
+
+            if res is not None:
+                buf = concat([buf, _check_times(res)])
+
+            if buf is None:
+                continue
+
+            last = i + 1 == len(files)
+
+            if by_records:
+                blocks, k, buf, offset = _record_blocks(buf, offset, k, chunk,
+                                                        overlap, last)
+            else:
+                blocks, k, buf = _time_blocks(buf, t_start, t_stop, k, chunk,
+                                              overlap, last)
+
+            yield from blocks
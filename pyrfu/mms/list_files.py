@@ -5,7 +5,10 @@
 import os
 import re
 import bisect
+import logging
 import datetime
+import contextlib
+import http.client
 
 # 3rd party imports
 from dateutil import parser
@@ -13,6 +16,10 @@ from dateutil.rrule import rrule, DAILY
 
 # Local imports
 from .mms_config import CONFIG
+from .file_catalog import (open_file_catalog, query_file_catalog,
+                           refresh_catalog_dirs)
+from .download_data import download_data
+from .mirror_cache import fetch_mirror_files
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -22,6 +29,48 @@ __version__ = "2.3.7"
 __status__ = "Prototype"
 
 
+def _list_files_catalog(catalog, tint, mms_id, var, data_path, local_dirs,
+                        updated_dirs):
+    with contextlib.closing(catalog):
+        t_start = parser.parse(tint[0]).strftime("%Y%m%d")
+        t_stop = (parser.parse(tint[1]) - datetime.timedelta(seconds=1))
+        t_stop = t_stop.strftime("%Y%m%d%H%M%S")
+
+        if updated_dirs:
+            refresh_catalog_dirs(catalog, data_path, updated_dirs,
+                                 force=True)
+
+        refresh_catalog_dirs(catalog, data_path, local_dirs)
+
+        sorted_files = query_file_catalog(catalog, mms_id, var, t_start,
+                                          t_stop)
+
+    times = [file[0] for file in sorted_files]
+    t_min = int(parser.parse(tint[0]).strftime("%Y%m%d%H%M%S"))
+
+    # note: purposefully liberal here; include one extra file so that we
+    # always get the burst mode data
+    idx_min = max(bisect.bisect_left(times, t_min) - 1, 0)
+
+    return sorted(file[1] for file in sorted_files[idx_min:])
+
+
+def _list_mirror_files(tint, mms_id, var, data_path):
+    r"""Copies the files in the interval from the mirror into data_path and
+    returns the directories which have been updated."""
+
+    mirror_path = os.path.expanduser(CONFIG["mirror_data_dir"])
+
+    if not os.path.isdir(mirror_path) \
+            or os.path.abspath(mirror_path) == os.path.abspath(data_path):
+        return []
+
+    mirror_files = _list_files(tint, mms_id, var, mirror_path)
+    local_files = fetch_mirror_files(mirror_files, mirror_path, data_path)
+
+    return sorted({os.path.dirname(file) for file in local_files})
+
+
 def list_files(tint, mms_id, var, data_path=""):
     """Find files in the data directories of the target instrument, data type,
     data rate, mms_id and level during the target time interval.
@@ -47,12 +96,46 @@ def list_files(tint, mms_id, var, data_path=""):
         List of files corresponding to the parameters in the selected time
         interval
 
+    Notes
+    -----
+    If the file catalog of `data_path` has been built (see
+    `pyrfu.mms.build_file_catalog`) the files are looked up in the catalog
+    and only the latest version of each file is returned.
+
+    If `pyrfu.mms.mms_config.CONFIG["no_download"]` is False the missing
+    files are first downloaded from the SDC (see `pyrfu.mms.download_data`).
+
+    If `pyrfu.mms.mms_config.CONFIG["mirror_data_dir"]` is set, `data_path`
+    is used as a local cache of the mirror: the files in the interval are
+    copied from the mirror on first access and the least recently used
+    copies are evicted when they grow over
+    `pyrfu.mms.mms_config.CONFIG["mirror_cache_size"]` bytes.
+
     """
 
     # Check path
     if not data_path:
         data_path = CONFIG["local_data_dir"]
 
+    if not CONFIG["no_download"]:
+        try:
+            download_data(tint, mms_id, var, data_path)
+        except (OSError, ValueError, http.client.HTTPException) as err:
+            logging.warning(f"Download from the SDC failed: {err}. "
+                            f"Using the local files only.")
+
+    updated_dirs = []
+
+    if CONFIG["mirror_data_dir"]:
+        updated_dirs = _list_mirror_files(tint, mms_id, var, data_path)
+
+    return _list_files(tint, mms_id, var, data_path, updated_dirs)
+
+
+def _list_files(tint, mms_id, var, data_path, updated_dirs=None):
+    r"""Find files in the data directories of data_path. updated_dirs are
+    re-indexed in the file catalog."""
+
     files_out = []
 
     if not isinstance(mms_id, str):
@@ -65,17 +148,19 @@ def list_files(tint, mms_id, var, data_path=""):
     # spacecraft_instrument_rate_level[_datatype]_YYYYMMDD[hhmmss]_version.cdf
 
     file_name = f"mms{mms_id}_{var['inst']}_{var['tmmode']}_{var['lev']}" \
-                + r"(_)?.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf"
+                + r"(_)?.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf$"
 
     d_start = parser.parse(parser.parse(tint[0]).strftime("%Y-%m-%d"))
     until_ = parser.parse(tint[1]) - datetime.timedelta(seconds=1)
     days = rrule(DAILY, dtstart=d_start, until=until_)
 
-    if var["dtype"] == "" or var["dtype"] is None:
+    if not var.get("dtype"):
         level_and_dtype = var["lev"]
     else:
         level_and_dtype = os.sep.join([var["lev"], var["dtype"]])
 
+    local_dirs = []
+
     for date in days:
         if var["tmmode"] == "brst":
             local_dir = os.sep.join([data_path, f"mms{mms_id}", var["inst"],
@@ -87,6 +172,15 @@ def list_files(tint, mms_id, var, data_path=""):
                                      var["tmmode"], level_and_dtype,
                                      date.strftime("%Y"), date.strftime("%m")])
 
+        local_dirs.append(local_dir)
+
+    catalog = open_file_catalog(data_path)
+
+    if catalog is not None:
+        return _list_files_catalog(catalog, tint, mms_id, var, data_path,
+                                   local_dirs, updated_dirs)
+
+    for local_dir in local_dirs:
         if os.name == "nt":
             full_path = os.sep.join([re.escape(local_dir)+os.sep, file_name])
         else:
@@ -110,7 +204,7 @@ def list_files(tint, mms_id, var, data_path=""):
 
     in_files = files_out
 
-    file_name = r"mms.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf"
+    file_name = r"mms.*_([0-9]{8,14})_v(\d+).(\d+).(\d+).cdf$"
 
     file_times = []
 
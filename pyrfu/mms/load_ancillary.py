@@ -5,18 +5,19 @@
 import os
 import re
 import json
-import glob
-import bisect
-import fnmatch
+import pickle
 import logging
+import threading
 
 # 3rd party imports
-import pandas as pd
+import numpy as np
+import xarray as xr
 
 # Local imports
-from ..pyrf import iso86012datetime
+from ..pyrf import iso86012datetime64
 
 from .mms_config import CONFIG
+from .cdf_cache import _atomic_write, _evict, _save_npy, _save_pickle
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -30,6 +31,189 @@ logging.basicConfig(format='%(asctime)s: %(message)s',
                     datefmt='%d-%b-%y %H:%M:%S',
                     level=logging.INFO)
 
+# Listings of the ancillary directories, keyed by path with the modification
+# time of the directory used to invalidate the entries.
+_listings = {}
+_listings_lock = threading.Lock()
+
+
+def _list_dir(path):
+    r"""Names of the files in the directory, scanned only when it has been
+    modified."""
+
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return []
+
+    with _listings_lock:
+        entry = _listings.get(path)
+
+    if entry is None or entry[0] != mtime:
+        with os.scandir(path) as entries:
+            entry = (mtime, sorted(e_.name for e_ in entries if e_.is_file()))
+
+        with _listings_lock:
+            _listings[path] = entry
+
+    return entry[1]
+
+
+def _select_files(dir_path, product, tint, mms_id):
+    r"""Latest version of the files of the product which overlap with the
+    time interval."""
+
+    file_regex = re.compile(f"MMS{mms_id}_{product.upper()}"
+                            r"_([0-9]{7})_([0-9]{7}).V([0-9]{2})$")
+
+    latest = {}
+
+    # The names are sorted so the latest version comes last
+    for file_name in _list_dir(dir_path):
+        match = file_regex.match(file_name)
+
+        if match is None:
+            continue
+
+        start_time, end_time = [np.datetime64(f"{d_[:4]}-01-01")
+                                + np.timedelta64(int(d_[4:]) - 1, "D")
+                                for d_ in match.groups()[:2]]
+
+        if start_time < tint[1] and end_time >= tint[0]:
+            latest[match.groups()[:2]] = file_name
+
+    return [os.path.join(dir_path, latest[k]) for k in sorted(latest)]
+
+
+def _parse_time(time):
+    r"""Converts the times formatted as YYYY-DOYxhh:mm:ss.fff (x being any
+    separator) to datetime64."""
+
+    time = np.asarray(time, dtype="S32")
+    digits = time.view(np.uint8).reshape(len(time), -1).astype(np.int64)
+    digits -= ord("0")
+
+    def _number(start, stop):
+        out = np.zeros(len(time), dtype=np.int64)
+
+        for i in range(start, stop):
+            out = 10 * out + digits[:, i]
+
+        return out
+
+    out = (_number(0, 4) - 1970).astype("<M8[Y]").astype("<M8[ns]")
+    out += (_number(5, 8) - 1) * np.timedelta64(86400, "s")
+    out += _number(9, 11) * np.timedelta64(3600, "s")
+    out += _number(12, 14) * np.timedelta64(60, "s")
+    out += _number(15, 17) * np.timedelta64(1, "s")
+
+    # Fraction of seconds up to the padding
+    scale = 10 ** 8
+    fraction = np.zeros(len(time), dtype=np.int64)
+
+    for i in range(18, min(digits.shape[1], 27)):
+        valid = (digits[:, i] >= 0) & (digits[:, i] <= 9)
+        fraction += np.where(valid, digits[:, i] * scale, 0)
+        scale //= 10
+
+    return out + fraction.astype("<m8[ns]")
+
+
+def _read_table(file_path, description):
+    r"""Reads the columns of the fixed-width text ancillary file."""
+
+    with open(file_path, "r") as file:
+        lines = file.read().splitlines()
+
+    # Remove header and footer
+    lines = [l_ for l_ in lines[description["header"]:-1] if l_.strip()]
+
+    columns_names = description["columns_names"]
+    fields = np.array(" ".join(lines).split())
+    fields = fields.reshape(len(lines), len(columns_names))
+
+    table = {"time": _parse_time(fields[:, 0])}
+
+    for i, name in enumerate(columns_names[1:]):
+        try:
+            table[name] = fields[:, i + 1].astype(float)
+        except ValueError:
+            table[name] = fields[:, i + 1]
+
+    return table
+
+
+def _cached_table(file_path, description):
+    r"""Read-through cache of the parsed ancillary file. The columns are
+    stored as entries of `CONFIG["cache_dir"]` named after the file, which
+    contains the version, and are memory mapped."""
+
+    cache_dir = CONFIG["cache_dir"]
+
+    if not cache_dir:
+        return _read_table(file_path, description)
+
+    entry = os.path.join(os.path.expanduser(cache_dir),
+                         f"ancillary_{os.path.basename(file_path)}")
+    names = description["columns_names"]
+
+    stat = os.stat(file_path)
+    source = {"path": os.path.abspath(file_path), "mtime": stat.st_mtime,
+              "size": stat.st_size}
+    source_path = os.path.join(entry, "source.pkl")
+
+    try:
+        with open(source_path, "rb") as file:
+            if pickle.load(file) != source:
+                raise ValueError
+
+        table = {name: np.load(os.path.join(entry, f"{name}.npy"),
+                               mmap_mode="r", allow_pickle=False)
+                 for name in names}
+
+        # Mark as recently used
+        os.utime(source_path)
+
+        return table
+    except (FileNotFoundError, EOFError, ValueError, pickle.UnpicklingError):
+        table = _read_table(file_path, description)
+
+    n_written = sum(_atomic_write(os.path.join(entry, f"{name}.npy"),
+                                  _save_npy, table[name]) for name in names)
+    n_written += _atomic_write(source_path, _save_pickle, source)
+
+    _evict(os.path.expanduser(cache_dir), CONFIG["cache_size"], n_written)
+
+    return table
+
+
+def _load_product(product, tint, mms_id, data_path, description):
+    dir_path = os.sep.join([data_path, "ancillary", f"mms{mms_id}",
+                            product])
+
+    columns = {name: [] for name in description["columns_names"]}
+
+    for file_path in _select_files(dir_path, product, tint, mms_id):
+        table = _cached_table(file_path, description)
+
+        # The times of the files are sorted
+        start_idx, end_idx = np.searchsorted(table["time"], tint)
+
+        for name in columns:
+            columns[name].append(np.array(table[name][start_idx:end_idx]))
+
+    if not columns["time"]:
+        raise FileNotFoundError(f"No {product} file in {dir_path}")
+
+    columns = {name: np.concatenate(value) for name, value in columns.items()}
+    time = columns.pop("time")
+    order = np.argsort(time, kind="stable")
+
+    data_vars = {name: ("time", value[order])
+                 for name, value in columns.items()}
+
+    return xr.Dataset(data_vars, coords={"time": time[order]})
+
 
 def load_ancillary(level_and_dtype, tint, mms_id, verbose: bool = True,
                    data_path: str = ""):
@@ -37,8 +221,8 @@ def load_ancillary(level_and_dtype, tint, mms_id, verbose: bool = True,
 
     Parameters
     ----------
-    level_and_dtype : {"predatt", "predeph", "defatt", "defeph"}
-        Ancillary type.
+    level_and_dtype : {"defatt", "defeph"} or list
+        Ancillary type or list of ancillary types.
     tint : list of str
         Time interval
     mms_id : str or int
@@ -50,18 +234,31 @@ def load_ancillary(level_and_dtype, tint, mms_id, verbose: bool = True,
 
     Returns
     -------
-    out : xarray.Dataset
-        Time series of the ancillary data
+    out : xarray.Dataset or dict
+        Time series of the ancillary data. If level_and_dtype is a list,
+        hash table of the time series of each ancillary type.
+
+    Notes
+    -----
+    If `pyrfu.mms.mms_config.CONFIG["cache_dir"]` is set, the parsed files
+    are stored in the cache in binary form and the records in the time
+    interval are read from there.
+
+    Examples
+    --------
+    >>> from pyrfu import mms
+
+    >>> tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+    >>> anc = mms.load_ancillary(["defatt", "defeph"], tint, 1)
 
     """
 
     if not data_path:
         data_path = CONFIG["local_data_dir"]
 
-    if isinstance(mms_id, int):
-        mms_id = str(mms_id)
+    mms_id = str(mms_id)
 
-    tint = iso86012datetime(tint)
+    tint = iso86012datetime64(np.array(tint)).astype("<M8[ns]")
 
     # directory and file name search patterns
     # For now
@@ -73,40 +270,6 @@ def load_ancillary(level_and_dtype, tint, mms_id, verbose: bool = True,
     #   and FILETYPE is either DEFATT, PREDATT, DEFEPH, PREDEPH in uppercase
     #   and start/endDate is YYYYDOY
     #   and version is Vnn (.V00, .V01, etc..)
-    dir_pattern = os.sep.join([data_path, "ancillary", f"mms{mms_id}",
-                               level_and_dtype])
-    file_pattern = "_".join(["MMS{}".format(mms_id), level_and_dtype.upper(),
-                             "???????_???????.V??"])
-
-    files_in_tint = []
-    out_files = []
-
-    files = glob.glob(os.sep.join([dir_pattern, file_pattern]))
-
-    # find the files within the time interval
-    fname_fmt = f"MMS{mms_id}_{level_and_dtype.upper()}" \
-                f"_([0-9]{{7}})_([0-9]{{7}}).V[0-9]{{2}}"
-    file_regex = re.compile(os.sep.join([dir_pattern, fname_fmt]))
-    for file in files:
-        time_match = file_regex.match(file)
-        if time_match is not None:
-            start_time = pd.to_datetime(time_match.group(1), format="%Y%j")
-            end_time = pd.to_datetime(time_match.group(2), format="%Y%j")
-            if start_time < tint[1] and end_time >= tint[0]:
-                files_in_tint.append(file)
-
-    # ensure only the latest version of each file is loaded
-    for file in files_in_tint:
-        this_file = file[0:-3] + "V??"
-        versions = fnmatch.filter(files_in_tint, this_file)
-        if len(versions) > 1:
-            # only grab the latest version
-            out_files.append(sorted(versions)[-1])
-        else:
-            out_files.append(versions[0])
-
-    files_names = list(set(out_files))
-    files_names.sort()
 
     # Read length of header and columns names from .json file
     # Root path
@@ -115,33 +278,21 @@ def load_ancillary(level_and_dtype, tint, mms_id, verbose: bool = True,
     with open(os.sep.join([root_path, "ancillary.json"])) as file:
         anc_dict = json.load(file)
 
-    if verbose:
-        logging.info(f"Loading ancillary {level_and_dtype} files...")
-
-    data_frame_dict = {}
-
-    for i, file in enumerate(files_names):
-        rows = pd.read_csv(file, delim_whitespace=True, header=None,
-                           skiprows=anc_dict[level_and_dtype]["header"])
-
-        # Remove footer
-        rows = rows[:][:-1]
-
-        # Convert time
-        fmt = anc_dict[level_and_dtype]["time_format"]
-        rows[0] = pd.to_datetime(rows[0], format=fmt)
-
-        start_idx = bisect.bisect_left(rows[0][:], tint[0])
-        end_idx = bisect.bisect_left(rows[0][:], tint[1])
-        rows.columns = anc_dict[level_and_dtype]["columns_names"]
+    if isinstance(level_and_dtype, str):
+        products = [level_and_dtype]
+    else:
+        products = list(level_and_dtype)
 
-        data_frame_dict[i] = rows[:][start_idx:end_idx]
+    out = {}
 
-    data_frame = data_frame_dict[0]
+    for product in products:
+        if verbose:
+            logging.info(f"Loading ancillary {product} files...")
 
-    for k in list(data_frame_dict.keys())[1:]:
-        data_frame = data_frame.append(data_frame_dict[k])
+        out[product] = _load_product(product, tint, mms_id, data_path,
+                                     anc_dict[product])
 
-    data_frame = data_frame.sort_values(by="time").set_index(["time"])
+    if isinstance(level_and_dtype, str):
+        return out[level_and_dtype]
 
-    return data_frame.to_xarray()
+    return out
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import os
+import time
+import shutil
+import sqlite3
+import tempfile
+import contextlib
+
+# Local imports
+from .mms_config import CONFIG
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["fetch_mirror_files"]
+
+INDEX_NAME = ".pyrfu_mirror.sqlite"
+
+# Files accessed more recently than this (in seconds) are never evicted as
+# other processes sharing the cache may be reading them.
+_MIN_AGE = 600.
+
+# Lock files older than this (in seconds) are left over by a dead process.
+_STALE_LOCK = 3600.
+
+
+def _connect(data_path):
+    conn = sqlite3.connect(os.path.join(data_path, INDEX_NAME), timeout=60.)
+    conn.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, "
+                 "size INTEGER, last_access REAL)")
+
+    return conn
+
+
+@contextlib.contextmanager
+def _lock(path):
+    r"""Inter-process lock on path using an exclusively created lock
+    file."""
+
+    lock_path = f"{path}.lock"
+
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.stat(lock_path).st_mtime > _STALE_LOCK:
+                    os.remove(lock_path)
+            except FileNotFoundError:
+                pass
+
+            time.sleep(.1)
+
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def _fetch(mirror_file, local_file, conn):
+    r"""Copies mirror_file to local_file unless another process already did
+    and records the access in the index while the file is locked, so that
+    it can not be evicted in between."""
+
+    size = os.path.getsize(mirror_file)
+
+    os.makedirs(os.path.dirname(local_file), exist_ok=True)
+
+    with _lock(local_file):
+        if os.path.isfile(local_file) \
+                and os.path.getsize(local_file) == size:
+            # Only the files copied from the mirror are in the index, the
+            # files which were already in data_path are never evicted
+            with conn:
+                conn.execute("UPDATE files SET last_access = ? "
+                             "WHERE path = ?", (time.time(), local_file))
+
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(local_file))
+
+        try:
+            with os.fdopen(fd, "wb") as file, \
+                    open(mirror_file, "rb") as mirror:
+                shutil.copyfileobj(mirror, file, 2 ** 24)
+
+            os.replace(tmp_path, local_file)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                         (local_file, size, time.time()))
+
+
+def _evict(conn, cache_size):
+    r"""Removes the least recently used files copied from the mirror until
+    they fit in cache_size bytes. Each file is locked and its last access
+    checked again before it is removed."""
+
+    total_size = conn.execute("SELECT SUM(size) FROM files").fetchone()[0]
+    total_size = total_size or 0
+
+    if total_size <= cache_size:
+        return
+
+    rows = conn.execute("SELECT path FROM files WHERE last_access < ? "
+                        "ORDER BY last_access", (time.time() - _MIN_AGE,))
+
+    for path, in rows.fetchall():
+        if total_size <= cache_size:
+            break
+
+        # The file lock is taken before the index as in _fetch
+        with _lock(path), conn:
+            row = conn.execute("SELECT size, last_access FROM files "
+                               "WHERE path = ?", (path,)).fetchone()
+
+            # Used or evicted by another process in the meantime
+            if row is None or row[1] >= time.time() - _MIN_AGE:
+                continue
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # In use (Windows)
+                continue
+
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            total_size -= row[0]
+
+
+def fetch_mirror_files(mirror_files, mirror_path, data_path):
+    r"""Copies the files of the mirror which are not in the local data
+    directory and marks them as used. The least recently used files copied
+    from the mirror are evicted when they grow over
+    `CONFIG["mirror_cache_size"]` bytes.
+
+    Parameters
+    ----------
+    mirror_files : list of str
+        Paths of the files in the mirror.
+    mirror_path : str
+        Path of the mirror of the MMS data.
+    data_path : str
+        Path of the local MMS data.
+
+    Returns
+    -------
+    local_files : list of str
+        Paths of the local copies.
+
+    Notes
+    -----
+    Several processes can share the same local data directory: the files
+    are copied under a lock and moved into place atomically, and the usage
+    of the files is kept in a sqlite database in `data_path`. Only the
+    files copied from the mirror are evicted.
+
+    """
+
+    os.makedirs(data_path, exist_ok=True)
+
+    local_files = []
+
+    with contextlib.closing(_connect(data_path)) as conn:
+        for mirror_file in mirror_files:
+            local_file = os.path.join(data_path,
+                                      os.path.relpath(mirror_file,
+                                                      mirror_path))
+
+            _fetch(mirror_file, local_file, conn)
+            local_files.append(local_file)
+
+        if CONFIG["mirror_cache_size"] is not None:
+            _evict(conn, CONFIG["mirror_cache_size"])
+
+    return local_files
@@ -15,6 +15,25 @@
 
 CONFIG = {"local_data_dir": "/Volumes/mms",
           'mirror_data_dir': None,  # e.g., '/Volumes/data_network/data/mms'
+          # Size in bytes of the files copied from the mirror kept in
+          # local_data_dir. None for no limit.
+          'mirror_cache_size': None,
           'debug_mode': False,
           'download_only': False,
-          'no_download': False}
+          # Set to False to download the missing files from the SDC
+          'no_download': True,
+          'catalog_path': None,  # e.g., '~/.pyrfu/mms_catalog.sqlite'
+          'n_workers': 1,
+          # "thread", "process" or a concurrent.futures.Executor. If None,
+          # processes are used for distributions and threads otherwise.
+          'executor': None,
+          # Cache of the decoded variables, e.g., '~/.pyrfu/cache'
+          'cache_dir': None,
+          'cache_size': 10 * 2 ** 30,
+          # Number of files of which the metadata are kept in memory
+          'metadata_cache_size': 4096,
+          'sdc_url': 'https://lasp.colorado.edu/mms/sdc/public/files/api/v1/',
+          'download_workers': 4,
+          'download_timeout': 60.,
+          # Memory budget in bytes of the data read ahead by Prefetcher
+          'prefetch_memory': 2 * 2 ** 30}
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import os
+import logging
+import threading
+
+from concurrent.futures import (BrokenExecutor, CancelledError,
+                                ThreadPoolExecutor, ProcessPoolExecutor)
+
+# Local imports
+from .mms_config import CONFIG
+from .get_data import _prefetchers
+from .get_data_many import get_data_many
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["Prefetcher"]
+
+
+def _nbytes(data):
+    return sum(out.nbytes for out in data.values())
+
+
+def _data_dir(data_path):
+    if not data_path:
+        data_path = CONFIG["local_data_dir"]
+
+    return os.path.abspath(os.path.expanduser(data_path))
+
+
+class Prefetcher:
+    r"""Reads the data of the next events of an event list in the background
+    while the current event is analysed.
+
+    When used as a context manager the prefetched data are served by
+    `pyrfu.mms.get_data`: requesting a variable of an event waits for its
+    data, drops the data of the previous events and starts reading the next
+    events. At most `depth` events after the requested one are read ahead
+    and no new event is started while the data already read ahead use more
+    than `max_memory` bytes. The events still being read are counted with
+    the size of the largest event read so far. Until the first event has
+    been read their size is unknown and only `depth` limits the events read
+    ahead. If reading an event fails the error is raised by
+    `pyrfu.mms.get_data`.
+
+    Parameters
+    ----------
+    events : list of tuple
+        Events as (tint, mms_id, var_strs) with tint the time interval,
+        mms_id the index of the spacecraft and var_strs the keys of the
+        variables to read.
+    depth : int, Optional
+        Number of events read ahead of the requested one. Default is 2.
+    max_memory : int, Optional
+        Memory budget in bytes of the data read ahead, including the
+        estimated size of the events being read. Default uses
+        `pyrfu.mms.mms_config.py`
+    executor : {"thread", "process"}, Optional
+        Read the events in threads or processes. Default is "thread".
+    data_path : str, Optional
+        Path of MMS data. Default uses `pyrfu.mms.mms_config.py`
+
+    Examples
+    --------
+    >>> from pyrfu import mms
+
+    >>> events = [(tint, 1, ["B_gse_fgm_brst_l2", "Vi_gse_fpi_brst_l2"])
+    ...           for tint in tints]
+    >>> with mms.Prefetcher(events, depth=3):
+    ...     for tint, mms_id, _ in events:
+    ...         b_xyz = mms.get_data("B_gse_fgm_brst_l2", tint, mms_id)
+    ...         v_xyz = mms.get_data("Vi_gse_fpi_brst_l2", tint, mms_id)
+
+    The events can also be iterated over
+
+    >>> for tint, mms_id, data in mms.Prefetcher(events):
+    ...     b_xyz = data["B_gse_fgm_brst_l2"]
+
+    """
+
+    def __init__(self, events, depth: int = 2, max_memory: int = None,
+                 executor: str = "thread", data_path: str = ""):
+        self.events = [(list(tint), str(mms_id), list(var_strs))
+                       for tint, mms_id, var_strs in events]
+        self.depth = depth
+        self.data_path = data_path
+
+        if max_memory is None:
+            max_memory = CONFIG["prefetch_memory"]
+
+        self.max_memory = max_memory
+
+        self._indices = {}
+
+        for i, (tint, mms_id, _) in enumerate(self.events):
+            self._indices.setdefault((tuple(tint), mms_id), i)
+
+        # The requested event and the events read ahead
+        if executor == "process":
+            self._pool = ProcessPoolExecutor(depth + 1)
+        else:
+            self._pool = ThreadPoolExecutor(depth + 1)
+
+        self._futures = {}
+        self._current, self._next = [0, 0]
+        self._event_size = 0
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        _prefetchers.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        for i, (tint, mms_id, _) in enumerate(self.events):
+            yield tint, mms_id, self._result(i)
+
+        self.close()
+
+    def close(self):
+        r"""Stops reading the events and frees the data."""
+
+        if self in _prefetchers:
+            _prefetchers.remove(self)
+
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+
+            self._futures = {}
+
+        self._pool.shutdown(wait=True)
+
+    def _memory(self):
+        r"""Size of the events read and estimated size of the events being
+        read."""
+
+        sizes, n_running = [[], 0]
+
+        for future in self._futures.values():
+            if not future.done():
+                n_running += 1
+            elif not future.cancelled() and future.exception() is None:
+                sizes.append(_nbytes(future.result()))
+
+        self._event_size = max([self._event_size, *sizes])
+
+        return sum(sizes) + n_running * self._event_size
+
+    def _schedule(self):
+        while self._next < len(self.events) \
+                and self._next <= self._current + self.depth:
+            # Always read the event requested
+            if self._next > self._current \
+                    and self._memory() >= self.max_memory:
+                break
+
+            self._futures[self._next] = self._submit(self._next)
+            self._next += 1
+
+    def _submit(self, index):
+        tint, mms_id, var_strs = self.events[index]
+
+        return self._pool.submit(get_data_many, var_strs, tint, mms_id, False,
+                                 self.data_path)
+
+    def _result(self, index):
+        with self._lock:
+            # Drop the events before
+            for i in list(self._futures):
+                if i < index:
+                    self._futures.pop(i).cancel()
+
+            self._current = index
+            self._next = max(self._next, index)
+            self._schedule()
+
+            # Event requested again after it was dropped
+            if index not in self._futures:
+                self._futures[index] = self._submit(index)
+
+            future = self._futures[index]
+
+        out = future.result()
+
+        # The budget may allow more events once the data are known
+        with self._lock:
+            self._schedule()
+
+        return out
+
+    def get(self, var_str, tint, mms_id, data_path: str = ""):
+        r"""Returns the prefetched data of the variable during the event or
+        None if it is not in the event list or data_path is not the path
+        of the prefetched data. Errors raised while reading the event are
+        raised again."""
+
+        index = self._indices.get((tuple(tint), str(mms_id)))
+
+        if index is None or var_str not in self.events[index][2] \
+                or _data_dir(data_path) != _data_dir(self.data_path):
+            return None
+
+        try:
+            return self._result(index)[var_str]
+        except (BrokenExecutor, CancelledError):
+            # The prefetcher was closed or its pool died, read it again
+            logging.debug(f"Prefetching {var_str} failed", exc_info=True)
+            return None
@@ -9,6 +9,10 @@ from .ts_tensor_xyz import ts_tensor_xyz
 from .ts_skymap import ts_skymap
 from .ts_append import ts_append
 from .dist_append import dist_append
+from .concat_many import concat_many
+from .dist_concat_many import dist_concat_many
+from .time_series_buffer import TimeSeriesBuffer
+from .skymap_buffer import SkymapBuffer
 from .start import start
 from .end import end
 from .iso2unix import iso2unix
@@ -24,7 +28,9 @@ from .avg_4sc import avg_4sc
 from .gradient import gradient
 from .integrate import integrate
 from .time_clip import time_clip
+from .time_index import TimeIndex
 from .resample import resample
+from .resample_plan import ResamplePlan
 from .t_eval import t_eval
 from .filt import filt
 from .medfilt import medfilt
@@ -2,7 +2,7 @@
 # -*- coding: utf-8 -*-
 
 # Local imports
-from .resample import resample
+from .resample_plan import ResamplePlan
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -43,7 +43,7 @@ def avg_4sc(b_list):
 
     """
 
-    b_list = [resample(b, b_list[0]) for b in b_list]
+    b_list = ResamplePlan.resample_many(b_list, b_list[0])
 
     b_avg = sum(b_list) / len(b_list)
 
@@ -9,7 +9,7 @@ import numpy as np
 import xarray as xr
 
 # Local imports
-from .resample import resample
+from .resample_plan import ResamplePlan
 from .c_4_k import c_4_k
 from .normalize import normalize
 from .avg_4sc import avg_4sc
@@ -104,8 +104,8 @@ def c_4_grad(r_list, b_list, method: str = "grad"):
     """
 
     # Resample with respect to 1st spacecraft
-    r_list = [resample(r, b_list[0]) for r in r_list]
-    b_list = [resample(b, b_list[0]) for b in b_list]
+    out = ResamplePlan.resample_many([*r_list, *b_list], b_list[0])
+    r_list, b_list = [out[:len(r_list)], out[len(r_list):]]
 
     # Compute reciprocal vectors in barycentric coordinates (see c_4_k)
     k_list = c_4_k(r_list)
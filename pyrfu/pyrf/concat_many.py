@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# 3rd party imports
+import numpy as np
+import xarray as xr
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+
+def _concat_attrs(attrs):
+    out = {}
+
+    for k in attrs[0]:
+        # if attrs is array time append
+        if isinstance(attrs[0][k], np.ndarray):
+            out[k] = np.hstack([attr[k] for attr in attrs])
+        else:
+            out[k] = attrs[0][k]
+
+    return out
+
+
+def concat_many(inps):
+    r"""Concatenate a list of time series along the time axis. The output is
+    allocated once so that concatenating N time series is linear in N.
+
+    Parameters
+    ----------
+    inps : list of xarray.DataArray
+        Time series to concatenate. None elements are ignored.
+
+    Returns
+    -------
+    out : xarray.DataArray
+        Concatenated time series.
+
+    Notes
+    -----
+    The time series must be in the correct time order.
+
+    See also
+    --------
+    pyrfu.pyrf.ts_append : Concatenate two time series.
+
+    """
+
+    inps = [inp for inp in inps if inp is not None]
+
+    if not inps:
+        return None
+
+    if len(inps) == 1:
+        return inps[0]
+
+    inp0 = inps[0]
+
+    data = np.concatenate([inp.data for inp in inps], axis=0)
+    attrs = _concat_attrs([inp.attrs for inp in inps])
+
+    depends = [{} for _ in range(len(inp0.dims))]
+
+    for i, dim in enumerate(inp0.dims):
+        if i == 0 or dim == "time":
+            depends[i]["data"] = np.concatenate([inp[dim].data
+                                                 for inp in inps])
+            depends[i]["attrs"] = _concat_attrs([inp[dim].attrs
+                                                 for inp in inps])
+        else:
+            # Use values of other coordinates of the first time series
+            depends[i]["data"] = inp0[dim].data
+            depends[i]["attrs"] = dict(inp0[dim].attrs)
+
+    out = xr.DataArray(data, coords=[depend["data"] for depend in depends],
+                       dims=inp0.dims, attrs=attrs)
+
+    # xarray names the time series after the key of a dask array
+    out.name = inp0.name
+
+    for i, dim in enumerate(out.dims):
+        out[dim].attrs = depends[i]["attrs"]
+
+    return out
@@ -8,6 +8,7 @@ from cdflib import cdfepoch
 
 # local imports
 from .datetime642iso8601 import datetime642iso8601
+from .ttns2datetime64 import _J2000, _TT_TAI, _LS_UTC, _LS_NS
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -31,12 +32,29 @@ def datetime642ttns(time):
     time_ttns : ndarray
         Times in epoch_tt2000 format (nanoseconds since J2000).
 
+    Notes
+    -----
+    The conversion uses a table of the leap seconds and int64 arithmetic.
+    Times before 1972 are converted with cdflib.
+
+    See Also
+    --------
+    pyrfu.pyrf.ttns2datetime64
+
     """
 
     # Convert to datetime64 in ns units
-    time_iso8601 = datetime642iso8601(time)
+    time = np.asarray(time).astype("<M8[ns]").view(np.int64)
+
+    idx = np.searchsorted(_LS_UTC, time, side="right") - 1
+
+    time_ttns = time - _J2000 + _TT_TAI + _LS_NS[np.maximum(idx, 0)]
+
+    # Before the leap seconds table
+    old = idx < 0
 
-    # Convert to ttns
-    time_ttns = np.array([cdfepoch.parse(t_) for t_ in time_iso8601])
+    if np.any(old):
+        time_iso8601 = datetime642iso8601(time[old].view("<M8[ns]"))
+        time_ttns[old] = [cdfepoch.parse(t_) for t_ in time_iso8601]
 
     return time_ttns
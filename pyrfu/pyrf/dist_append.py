@@ -42,8 +42,8 @@ def dist_append(inp0, inp1):
     # time
     time = np.hstack([inp0.time.data, inp1.time.data])
 
-    # attributes
-    attrs = inp0.attrs
+    # attributes (copied, inp0 must not be modified)
+    attrs = dict(inp0.attrs)
 
     # Azimuthal angle
     if inp0.phi.ndim == 2:
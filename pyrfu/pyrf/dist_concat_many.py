@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# 3rd party imports
+import numpy as np
+
+# Local imports
+from .ts_skymap import ts_skymap
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+
+def dist_concat_many(inps):
+    r"""Concatenate a list of distribution skymaps along the time axis. The
+    output is allocated once so that concatenating N skymaps is linear in N.
+
+    Parameters
+    ----------
+    inps : list of xarray.Dataset
+        3D skymaps to concatenate. None elements are ignored.
+
+    Returns
+    -------
+    out : xarray.Dataset
+        3D skymap of the concatenated 3D skymaps.
+
+    Notes
+    -----
+    The skymaps have to be in the correct time order.
+
+    See also
+    --------
+    pyrfu.pyrf.dist_append : Concatenate two skymaps.
+
+    """
+
+    inps = [inp for inp in inps if inp is not None]
+
+    if not inps:
+        return None
+
+    if len(inps) == 1:
+        return inps[0]
+
+    inp0 = inps[0]
+
+    # time
+    time = np.concatenate([inp.time.data for inp in inps])
+
+    # attributes
+    attrs = dict(inp0.attrs)
+
+    # Azimuthal angle
+    if inp0.phi.ndim == 2:
+        phi = np.concatenate([inp.phi.data for inp in inps])
+    else:
+        phi = inp0.phi.data
+
+    # Elevation angle
+    theta = inp0.theta.data
+
+    # distribution
+    data = np.concatenate([inp.data.data for inp in inps])
+
+    for k in ["delta_energy_plus", "delta_energy_minus"]:
+        if k in attrs:
+            attrs[k] = np.concatenate([np.asarray(inp.attrs[k])
+                                       for inp in inps])
+
+    # Energy
+    if inp0.attrs["tmmode"] == "brst":
+        step_table = np.concatenate([inp.attrs["esteptable"]
+                                     for inp in inps])
+
+        out = ts_skymap(time, data, None, phi, theta,
+                        energy0=inp0.energy0, energy1=inp0.energy1,
+                        esteptable=step_table)
+
+        attrs.pop("esteptable")
+    else:
+        energy = np.concatenate([inp.energy.data for inp in inps])
+
+        out = ts_skymap(time, data, energy, phi, theta)
+
+    for k in attrs:
+        out.attrs[k] = attrs[k]
+
+    return out
@@ -1,6 +1,9 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+# Built-in imports
+import functools
+
 # 3rd party imports
 import numpy as np
 import xarray as xr
@@ -17,7 +20,10 @@ __status__ = "Prototype"
 
 # noinspection PyTupleAssignmentBalance
 def _ellip_coefficients(f_min, f_max, order):
-    num1, den1, num2, den2 = [None] * 4
+    r"""Second-order sections of the lowpass (sos1) and highpass (sos2)
+    elliptic filters."""
+
+    sos1, sos2 = [None] * 2
 
     if f_min == 0:
         if order == -1:
@@ -25,31 +31,106 @@ def _ellip_coefficients(f_min, f_max, order):
                                            np.min([f_max * 1.1, 0.9999]),
                                            .5, 60)
 
-        num1, den1 = signal.ellip(order, .5, 60, f_max, btype="lowpass")
+        sos1 = signal.ellip(order, .5, 60, f_max, btype="lowpass",
+                            output="sos")
     elif f_max == 0:
         if order == -1:
             order, f_min = signal.ellipord(f_min,
                                            np.min([f_min * 1.1, 0.9999]),
                                            .5, 60)
 
-        num1, den1 = signal.ellip(order, .5, 60, f_min, btype="highpass")
+        sos1 = signal.ellip(order, .5, 60, f_min, btype="highpass",
+                            output="sos")
     else:
         if order == -1:
             order, f_max = signal.ellipord(f_max,
                                            np.min([f_max * 1.3, 0.9999]),
                                            .5, 60)
 
-        num1, den1 = signal.ellip(order, .5, 60, f_max)
+        sos1 = signal.ellip(order, .5, 60, f_max, output="sos")
 
         if order == -1:
             order, f_min = signal.ellipord(f_min, f_min * .75, .5, 60)
 
-        num2, den2 = signal.ellip(order, .5, 60, f_min)
+        sos2 = signal.ellip(order, .5, 60, f_min, btype="highpass",
+                            output="sos")
+
+    return sos1, sos2
+
+
+@functools.lru_cache(maxsize=64)
+def _design(f_samp, f_min, f_max, order):
+    r"""Cached design of the filters for the sampling frequency, frequency
+    range and order."""
+
+    f_min, f_max = [f_min / (f_samp / 2), f_max / (f_samp / 2)]
+
+    f_max = np.min([f_max, 1.])
+
+    # Parameters of the elliptic filter. fact defines the width between
+    # stopband and passband
+    # r_pass, r_stop, fact = [0.5, 60, 1.1]
+
+    return tuple(sos for sos in _ellip_coefficients(f_min, f_max, order)
+                 if sos is not None)
+
+
+def _settle_length(sos, tol: float = 1e-10):
+    r"""Number of samples after which the impulse response of the filter
+    drops below tol times its peak."""
+
+    n_samples = 1024
+
+    while True:
+        impulse = np.zeros(n_samples)
+        impulse[0] = 1.
+        response = np.abs(signal.sosfilt(sos, impulse))
+        above = np.where(response > tol * np.max(response))[0]
+
+        if above[-1] < n_samples // 2 or n_samples >= 2 ** 22:
+            return int(above[-1]) + 1
+
+        n_samples *= 2
+
+
+@functools.lru_cache(maxsize=64)
+def _overlap(f_samp, f_min, f_max, order):
+    r"""Overlap of the chunks, longer than the settling time of the
+    filters."""
+    return sum(_settle_length(sos) for sos in _design(f_samp, f_min, f_max,
+                                                      order))
+
 
-    return num1, den1, num2, den2
+def _filtfilt(inp_data, soss):
+    r"""Zero-phase filtering of all the columns at once."""
 
+    out_data = np.asarray(inp_data, dtype=np.float64)
 
-def filt(inp, f_min: float = 0., f_max: float = 1., order: int = -1):
+    for sos in soss:
+        out_data = signal.sosfiltfilt(sos, out_data, axis=0)
+
+    return out_data
+
+
+def _filtfilt_chunked(inp_data, soss, depth, chunk_size):
+    r"""Filters the chunks of chunk_size samples separately with depth
+    samples of overlap on both sides."""
+
+    out_data = np.empty(inp_data.shape)
+
+    for start in range(0, len(inp_data), chunk_size):
+        stop = min(start + chunk_size, len(inp_data))
+        idx_l, idx_r = [max(start - depth, 0),
+                        min(stop + depth, len(inp_data))]
+
+        chunk = _filtfilt(inp_data[idx_l:idx_r], soss)
+        out_data[start:stop] = chunk[start - idx_l:stop - idx_l]
+
+    return out_data
+
+
+def filt(inp, f_min: float = 0., f_max: float = 1., order: int = -1,
+         chunk_size: int = None):
     r"""Filters input quantity.
 
     Parameters
@@ -62,12 +143,25 @@ def filt(inp, f_min: float = 0., f_max: float = 1., order: int = -1):
         Upper limit of the frequency range. Default is 1. (Highpass filter).
     order : int, Optional
         Order of the elliptic filter. Default is -1.
+    chunk_size : int, Optional
+        Number of samples filtered at once. Default is None (the whole
+        time series).
 
     Returns
     -------
     out : xarray.DataArray
         Time series of the filtered signal.
 
+    Notes
+    -----
+    The filters are applied as second-order sections to all the columns at
+    once, and their design is cached for the sampling frequency, frequency
+    range and order.
+
+    If inp is backed by a dask array, or if chunk_size is given, the chunks
+    are filtered separately with an overlap longer than the settling time
+    of the filter.
+
     Examples
     --------
     >>> from pyrfu import mms, pyrf
@@ -101,29 +195,20 @@ def filt(inp, f_min: float = 0., f_max: float = 1., order: int = -1):
     # Data of the input
     inp_data = inp.data
 
-    f_min, f_max = [f_min / (f_samp / 2), f_max / (f_samp / 2)]
-
-    f_max = np.min([f_max, 1.])
+    soss = _design(f_samp, f_min, f_max, order)
 
-    # Parameters of the elliptic filter. fact defines the width between
-    # stopband and passband
-    # r_pass, r_stop, fact = [0.5, 60, 1.1]
+    if inp.chunks is not None:
+        # The overlap can not be longer than the time series
+        depth = min(_overlap(f_samp, f_min, f_max, order), len(inp) - 1)
 
-    num1, den1, num2, den2 = _ellip_coefficients(f_min, f_max, order)
-
-    if len(inp_data.shape) == 1:
-        inp_data = inp_data[:, np.newaxis]
-
-    out_data = np.zeros(inp_data.shape)
-
-    for i_col in range(inp_data.shape[1]):
-        out_data[:, i_col] = signal.filtfilt(num1, den1, inp_data[:, i_col])
-
-        if num2 is not None and den2 is not None:
-            out_data[:, i_col] = signal.filtfilt(num2, den2,
-                                                 out_data[:, i_col])
-    if inp_data.shape[1] == 1:
-        out_data = out_data[:, 0]
+        out_data = inp_data.map_overlap(_filtfilt, depth={0: depth},
+                                        boundary="none", dtype=np.float64,
+                                        soss=soss)
+    elif chunk_size is not None and chunk_size < len(inp_data):
+        depth = _overlap(f_samp, f_min, f_max, order)
+        out_data = _filtfilt_chunked(inp_data, soss, depth, chunk_size)
+    else:
+        out_data = _filtfilt(inp_data, soss)
 
     out = xr.DataArray(out_data, coords=inp.coords, dims=inp.dims,
                        attrs=inp.attrs)
@@ -4,7 +4,8 @@
 # 3rd party imports
 import numpy as np
 
-from scipy import interpolate
+# Local imports
+from .time_index import _nearest
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -14,6 +15,17 @@ __version__ = "2.3.7"
 __status__ = "Prototype"
 
 
+def _values(inp):
+    r"""Integers to compare datetime64."""
+
+    inp = np.asarray(inp)
+
+    if np.issubdtype(inp.dtype, np.datetime64):
+        return inp.astype("<M8[ns]").view("i8")
+
+    return inp
+
+
 def find_closest(inp1, inp2):
     r"""Finds pairs that are closest to each other in two time series.
 
@@ -31,39 +43,29 @@ def find_closest(inp1, inp2):
     t2new : ndarray
         Identified time instants that are closest each other.
     ind1new : ndarray
-        Identified time instants that are closest each other.
+        Indices of t1new in inp1.
     ind2new : ndarray
-        Identified time instants that are closest each other.
+        Indices of t2new in inp2.
 
     """
 
-    t1_orig = inp1
-    t2_orig = inp2
-    flag = True
-
-    nt1, nt2 = [len(t) for t in [inp1, inp2]]
-
-    while flag:
-        flag_t1 = np.zeros(inp1.shape)
-        tckt1 = interpolate.interp1d(inp1, np.arange(nt1),
-                                     kind="nearest", fill_value="extrapolate")
-        flag_t1[tckt1(inp2)] = 1
-
-        flag_t2 = np.zeros(inp2.shape)
-        tckt2 = interpolate.interp1d(inp2, np.arange(nt2),
-                                     kind="nearest", fill_value="extrapolate")
-        flag_t2[tckt2(inp1)] = 1
-
-        ind_zeros_t1 = np.where(flag_t1 == 0)[0]
-        ind_zeros_t2 = np.where(flag_t2 == 0)[0]
-        if ind_zeros_t1:
-            inp1 = np.delete(inp1, ind_zeros_t1)
-        elif ind_zeros_t2:
-            inp2 = np.delete(inp2, ind_zeros_t2)
+    t1_orig, t2_orig = [inp1, inp2]
+
+    while True:
+        flag_t1 = np.zeros(len(inp1), dtype=bool)
+        flag_t1[_nearest(_values(inp1), _values(inp2))] = True
+
+        flag_t2 = np.zeros(len(inp2), dtype=bool)
+        flag_t2[_nearest(_values(inp2), _values(inp1))] = True
+
+        if not flag_t1.all():
+            inp1 = inp1[flag_t1]
+        elif not flag_t2.all():
+            inp2 = inp2[flag_t2]
         else:
             break
 
-    tckt1_orig = interpolate.interp1d(t1_orig, np.arange(nt1), kind="nearest")
-    tckt2_orig = interpolate.interp1d(t2_orig, np.arange(nt2), kind="nearest")
+    ind1new = _nearest(_values(t1_orig), _values(inp1))
+    ind2new = _nearest(_values(t2_orig), _values(inp2))
 
-    return inp1, inp2, tckt1_orig(inp1), tckt2_orig(inp2)
+    return inp1, inp2, ind1new, ind2new
@@ -2,12 +2,14 @@
 # -*- coding: utf-8 -*-
 
 # Built-in imports
-import urllib
+import os
 import datetime
+import tempfile
+import urllib.request
 
 # 3rd party imports
 import numpy as np
-import pandas as pd
+import xarray as xr
 
 # Local imports
 from .iso86012datetime64 import iso86012datetime64
@@ -19,6 +21,11 @@ __license__ = "MIT"
 __version__ = "2.3.7"
 __status__ = "Prototype"
 
+OMNI_URL = "https://omniweb.gsfc.nasa.gov/cgi/nx1.cgi"
+
+# Local cache of the OMNI data, one file per variable and month.
+OMNI_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".pyrfu", "omni")
+
 
 var_omni_1 = {"b": 13, "avgb": -1, "blat": -1, "blong": -1, "bx": 14,
               "bxgse": 14, "bxgsm": 14, "by": 15, "bygse": 15, "bz": 16,
@@ -39,32 +46,139 @@ var_omni_2 = {"b": 8, "avgb": 9, "blat": 10, "blong": 11, "bx": 12,
               "imfid": -1, "swid": -1, "ts": -1, "rmsts": -1}
 
 
-def _omni_url(tint, omni_database):
-    if omni_database == "omni_hour":
-        data_source = "omni2"
-        date_format = "%Y%m%d"
-        delta_t_min = 24 * 3600
-    elif omni_database == "omni_min":
-        data_source = "omni_min"
-        date_format = "%Y%m%d%H"
-        delta_t_min = 3600
-    else:
-        raise ValueError("Invalid database")
+def _database(database):
+    r"""Name of the data source, format of the dates in the request,
+    resolution and indices of the variables."""
+
+    if database == "omni_hour":
+        return "omni2", "%Y%m%d", np.timedelta64(1, "h"), var_omni_2
+
+    if database == "omni_min":
+        return "omni_min", "%Y%m%d%H", np.timedelta64(1, "m"), var_omni_1
 
-    url_ = "omniweb.gsfc.nasa.gov/cgi/nx1.cgi?activity=retrieve&spacecraft="
-    url_ = f"https://{url_}{data_source}"
+    raise ValueError("Invalid database")
 
-    tint[0] += np.timedelta64(0, "[s]")
-    tint[1] += np.timedelta64(delta_t_min, "[s]")
+
+def _omni_url(variables, months, database):
+    data_source, date_format, _, var_omni = _database(database)
+
+    # From the first day of the first month to the last hour of the last
+    # month
+    tint = [months[0], months[-1] + 1]
+    tint = [tint[0].astype("<M8[s]"),
+            tint[1].astype("<M8[s]") - np.timedelta64(3600, "s")]
     tint = [t_.astype(datetime.datetime) for t_ in tint]
     start_date, end_date = [t_.strftime(date_format) for t_ in tint]
 
+    url_ = f"{OMNI_URL}?activity=retrieve&spacecraft={data_source}"
     url_ = f"{url_}&start_date={start_date}&end_date={end_date}"
 
+    for word in sorted({var_omni[variable] for variable in variables}):
+        url_ = f"{url_}&vars={word:d}"
+
     return url_
 
 
-def get_omni_data(variables, tint, database: str = "omni_hour"):
+def _parse(content, n_vars, database):
+    r"""Times and values of the variables in the OMNIWeb listing."""
+
+    content = content.decode("ascii", errors="ignore")
+
+    idx_start, idx_end = [content.find("YEAR"), content.find("</pre>")]
+
+    lines = content[idx_start:idx_end].splitlines()[1:]
+    rows = np.array([l_.split() for l_ in lines if l_.strip()], dtype=float)
+
+    n_cols = 4 if database == "omni_min" else 3
+
+    if not rows.size:
+        return np.array([], dtype="<M8[ns]"), np.zeros((0, n_vars))
+
+    time = (rows[:, 0].astype(int) - 1970).astype("<M8[Y]").astype("<M8[m]")
+    time += (rows[:, 1].astype(int) - 1) * np.timedelta64(1440, "m")
+    time += rows[:, 2].astype(int) * np.timedelta64(60, "m")
+
+    if database == "omni_min":
+        time += rows[:, 3].astype(int) * np.timedelta64(1, "m")
+
+    return time.astype("<M8[ns]"), rows[:, n_cols:]
+
+
+def _month_grid(month, database):
+    step = _database(database)[2]
+    return np.arange(month.astype("<M8[ns]"), (month + 1).astype("<M8[ns]"),
+                     step.astype("<m8[ns]"))
+
+
+def _cache_path(cache_dir, database, variable, month):
+    return os.path.join(cache_dir, database, str(month)[:4],
+                        f"{variable}_{month}.npy")
+
+
+def _save(path, values):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+
+    with os.fdopen(fd, "wb") as file:
+        np.save(file, values)
+
+    os.replace(tmp_path, path)
+
+
+def _fetch(variables, months, database, cache_dir):
+    r"""Downloads the variables over the contiguous months and stores the
+    complete months, with a sample at the end of the month, in the
+    cache."""
+
+    # Aliases of the same variable are requested once
+    var_omni = _database(database)[3]
+    words = sorted({var_omni[variable] for variable in variables})
+
+    with urllib.request.urlopen(_omni_url(variables, months,
+                                          database)) as file:
+        time, values = _parse(file.read(), len(words), database)
+
+    out = {}
+    now = np.datetime64("now").astype("<M8[M]")
+
+    for month in months:
+        grid = _month_grid(month, database)
+        in_month = (time >= grid[0]) & (time <= grid[-1])
+        idx = ((time[in_month] - grid[0]) // (grid[1] - grid[0]))
+
+        for variable in variables:
+            i = words.index(var_omni[variable])
+            month_values = np.full(len(grid), np.nan)
+            month_values[idx.astype(int)] = values[in_month, i]
+            out[(variable, month)] = month_values
+
+            # The current month is not complete yet and the last days of
+            # the past months can be missing until OMNIWeb is updated
+            complete = month < now and np.isfinite(month_values[-1])
+
+            if cache_dir and complete:
+                _save(_cache_path(cache_dir, database, variable, month),
+                      month_values)
+
+    return out
+
+
+def _spans(months):
+    r"""Splits the sorted months in runs of consecutive months."""
+
+    spans = []
+
+    for month in months:
+        if spans and spans[-1][-1] + 1 == month:
+            spans[-1].append(month)
+        else:
+            spans.append([month])
+
+    return spans
+
+
+def get_omni_data(variables, tint, database: str = "omni_hour",
+                  cache_dir: str = None):
     r"""Downloads OMNI data.
 
     Parameters
@@ -72,39 +186,87 @@ def get_omni_data(variables, tint, database: str = "omni_hour"):
     variables : list
         Keys of the variables to download.
     tint : list
-        Time interval.
+        Time interval or list of time intervals.
     database : {"omni_hour", "omni_min"}, Optional
         OMNI data resolution. Default is database = "omni_hour".
+    cache_dir : str, Optional
+        Path of the local cache. Default is ~/.pyrfu/omni. Set to "" to
+        disable the cache.
 
     Returns
     -------
-    data : xarray.Dataset
-        OMNI data.
+    data : xarray.Dataset or list of xarray.Dataset
+        OMNI data (for each time interval).
 
-    """
+    Notes
+    -----
+    The data are stored in the local cache per variable and month so that
+    later calls are served from the disk. The months which are not in the
+    cache are downloaded in one request per run of consecutive months for
+    all the time intervals.
+
+    Examples
+    --------
+    >>> from pyrfu import pyrf
 
-    tint = iso86012datetime64(np.array(tint)).astype("<M8[s]")
+    Solar wind conditions during a list of events
 
-    url_ = _omni_url(tint, database)
+    >>> tints = [["2019-09-14T07:54:00", "2019-09-14T08:11:00"],
+    ...          ["2019-09-15T10:00:00", "2019-09-15T11:00:00"]]
+    >>> omni = pyrf.get_omni_data(["p", "bzgsm", "ma"], tints)
+
+    """
+
+    _, _, step, var_omni = _database(database)
 
-    vars_ = ""
     for variable in variables:
-        vars_ = f"{vars_}&vars={var_omni_2[variable]:d}"
+        if var_omni.get(variable, -1) < 0:
+            raise ValueError(f"{variable} is not available in {database}")
+
+    if cache_dir is None:
+        cache_dir = OMNI_CACHE_DIR
+
+    batch = not isinstance(tint[0], str)
+    tints = tint if batch else [tint]
+    tints = [iso86012datetime64(np.array(tint_)) for tint_ in tints]
+
+    months = set()
+
+    for t_start, t_stop in tints:
+        months.update(np.arange(t_start.astype("<M8[M]"),
+                                t_stop.astype("<M8[M]") + 1))
+
+    data, missing = [{}, {}]
+
+    for month in sorted(months):
+        for variable in variables:
+            path = _cache_path(cache_dir, database, variable, month)
+
+            if cache_dir and os.path.isfile(path):
+                data[(variable, month)] = np.load(path)
+            else:
+                missing.setdefault(month, set()).add(variable)
+
+    for span in _spans(sorted(missing)):
+        variables_ = sorted(set.union(*[missing[month] for month in span]))
+        data.update(_fetch(variables_, span, database, cache_dir))
+
+    out = []
+
+    for t_start, t_stop in tints:
+        months_ = np.arange(t_start.astype("<M8[M]"),
+                            t_stop.astype("<M8[M]") + 1)
 
-    with urllib.request.urlopen(f"{url_}{vars_}") as file:
-        out = str(file.read())
+        time = np.hstack([_month_grid(month, database) for month in months_])
+        # Including the sample which contains the start of the interval
+        in_tint = (time + step > t_start) & (time <= t_stop)
 
-    idx_start, idx_end = [out.find("YEAR"), out.find("</pre>")]
+        data_vars = {}
 
-    lines = out[idx_start:idx_end].split("\\n")[:-1]
-    lines = [list(filter(lambda x: x != "", l_.split(" "))) for l_ in lines]
-    lines = [[f"{l_[0]}-{l_[1]}/{l_[2]}", *l_[3:]] for l_ in lines[1:]]
-    data = pd.DataFrame(lines, columns=["time", *variables])
-    data["time"] = pd.to_datetime(data["time"], format="%Y-%j/%H")
+        for variable in variables:
+            values = np.hstack([data[(variable, month)] for month in months_])
+            data_vars[variable] = ("time", values[in_tint])
 
-    data = data.set_index("time").astype(float)
-    fmt_ = f"<M8[{database[5].lower()}]"
-    data = data.loc[data.index.isin(tint.astype(fmt_).astype("<M8[ns]"))]
-    data = data.to_xarray()
+        out.append(xr.Dataset(data_vars, coords={"time": time[in_tint]}))
 
-    return data
+    return out if batch else out[0]
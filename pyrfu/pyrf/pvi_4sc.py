@@ -5,7 +5,7 @@
 import numpy as np
 
 # Local imports
-from .resample import resample
+from .resample_plan import ResamplePlan
 from .norm import norm
 from .dot import dot
 
@@ -65,7 +65,7 @@ def pvi_4sc(b_mms):
 
     """
 
-    b_mms = [resample(b_xyz, b_mms[0]) for b_xyz in b_mms]
+    b_mms = ResamplePlan.resample_many(b_mms, b_mms[0])
 
     i_indices = [0, 0, 0, 1, 1, 2]
     j_indices = [1, 2, 3, 2, 3, 3]
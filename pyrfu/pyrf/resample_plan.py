@@ -0,0 +1,465 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import warnings
+
+# 3rd party imports
+import numpy as np
+import xarray as xr
+
+from scipy import interpolate
+
+try:
+    import dask
+    import dask.array as da
+except ImportError:
+    dask, da = [None, None]
+
+# Local imports
+from .time_index import TimeIndex
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["ResamplePlan"]
+
+# Interpolation methods which only need the neighbouring samples
+_LOCAL_METHODS = ["linear", "nearest", "zero", "slinear", "previous", "next"]
+
+
+def _guess_sampling_frequency(ref_time):
+    r"""Compute sampling frequency of the time line."""
+
+    n_data = len(ref_time)
+
+    sfy1 = 1 / (ref_time[1] - ref_time[0])
+    sfy = None
+    not_found = True
+
+    if n_data == 2:
+        sfy = sfy1
+        not_found = False
+
+    cur, max_try = [2, 10]
+
+    while not_found and cur <= n_data and cur - 3 < max_try:
+        sfy = 1 / (ref_time[cur] - ref_time[cur - 1])
+
+        if np.absolute(sfy - sfy1) < sfy * .001:
+            not_found = False
+
+            sfy = (sfy + sfy1) / 2
+            break
+
+        sfy = sfy1
+        cur += 1
+
+    if not_found:
+        raise RuntimeError(
+            "Cannot guess sampling frequency. Tried {:d} times".format(
+                max_try))
+
+    return sfy
+
+
+def _window_sums(values, idx_l, idx_r):
+    r"""Sums of values over the windows [idx_l, idx_r[ using cumulative
+    sums."""
+
+    cum_sum = np.zeros((len(values) + 1, *values.shape[1:]))
+    cum_sum[1:] = np.cumsum(values, axis=0)
+
+    return cum_sum[idx_r] - cum_sum[idx_l]
+
+
+def _average(inp_time, inp_data, ref_time, thresh, dt2):
+    r"""Resample inp_data to timeline of ref_time, using half-window of dt2.
+    Points above std*tresh are excluded. thresh=0 turns off this option.
+    NaNs are ignored and windows without valid point are set to NaN.
+    """
+
+    idx_l = np.searchsorted(inp_time, ref_time - dt2, side="left")
+    idx_r = np.searchsorted(inp_time, ref_time + dt2, side="right")
+
+    return _average_windows(inp_data, idx_l, idx_r, thresh)
+
+
+def _average_windows(inp_data, idx_l, idx_r, thresh):
+    r"""Averages of inp_data over the windows [idx_l, idx_r[."""
+
+    n_ref = len(idx_l)
+    shape = inp_data.shape
+    inp_data = np.reshape(np.asarray(inp_data, dtype=np.float64),
+                          (shape[0], -1))
+
+    valid = np.isfinite(inp_data)
+
+    # Centered to limit the round-off errors of the cumulative sums
+    values = np.where(valid, inp_data, 0.)
+    offset = values.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+    values = np.where(valid, values - offset, 0.)
+
+    counts = _window_sums(valid, idx_l, idx_r)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_ = _window_sums(values, idx_l, idx_r) / counts
+
+        if thresh:
+            var_ = _window_sums(values ** 2, idx_l, idx_r) / counts
+            std_ = np.sqrt(np.maximum(var_ - mean_ ** 2, 0.))
+
+            # Points of each window, windows may overlap
+            n_points = idx_r - idx_l
+            window = np.repeat(np.arange(n_ref), n_points)
+            points = np.arange(n_points.sum()) \
+                - np.repeat(np.cumsum(n_points) - n_points, n_points) \
+                + np.repeat(idx_l, n_points)
+
+            keep = valid[points] & (np.abs(values[points] - mean_[window])
+                                    <= thresh * std_[window])
+
+            mean_ = np.zeros_like(mean_)
+            counts = np.zeros_like(counts)
+
+            for j in range(values.shape[1]):
+                mean_[:, j] = np.bincount(
+                    window, np.where(keep[:, j], values[points, j], 0.),
+                    n_ref)
+                counts[:, j] = np.bincount(window, keep[:, j], n_ref)
+
+            mean_ /= counts
+
+    out_data = np.where(counts > 0, mean_ + offset, np.nan)
+
+    return np.reshape(out_data, (n_ref, *shape[1:]))
+
+
+def _linear_weights(inp_time, ref_time, idx):
+    r"""Weights of the samples after the reference times, idx being the
+    indices of the samples before. The first and last intervals are
+    extrapolated."""
+
+    d_t = inp_time[idx + 1] - inp_time[idx]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        weights = np.where(d_t > 0, (ref_time - inp_time[idx]) / d_t, 0.)
+
+    return weights
+
+
+def _interpolate(inp_time, inp_data, ref_time, method):
+    tck = interpolate.interp1d(inp_time, inp_data, kind=method, axis=0,
+                               fill_value="extrapolate")
+    return tck(ref_time)
+
+
+def _lazy_apply(func, inp_time, inp_data, ref_time, pad_t, pad_n, *args):
+    r"""Applies func(inp_time, inp_data, ref_time, *args) to the chunks of the
+    dask array inp_data. The reference times are split at the start of the
+    chunks and each block uses the input samples within pad_t (in the unit
+    of the times) and pad_n samples around it."""
+
+    bounds = np.cumsum(inp_data.chunks[0])[:-1]
+    splits = np.searchsorted(ref_time, inp_time[bounds], side="left")
+
+    blocks = []
+
+    for ref_block in np.split(ref_time, splits):
+        if not ref_block.size:
+            continue
+
+        idx_l = np.searchsorted(inp_time, ref_block[0] - pad_t, side="left")
+        idx_r = np.searchsorted(inp_time, ref_block[-1] + pad_t,
+                                side="right")
+        idx_l, idx_r = [max(idx_l - pad_n, 0),
+                        min(idx_r + pad_n, len(inp_time))]
+
+        block = dask.delayed(func)(inp_time[idx_l:idx_r],
+                                   inp_data[idx_l:idx_r], ref_block, *args)
+        blocks.append(da.from_delayed(block,
+                                      (len(ref_block), *inp_data.shape[1:]),
+                                      dtype=np.float64))
+
+    return da.concatenate(blocks, axis=0)
+
+
+def _time(inp):
+    if isinstance(inp, xr.DataArray):
+        return inp.time.data
+
+    return np.asarray(inp).astype("<M8[ns]")
+
+
+class ResamplePlan:
+    r"""Resampling from the time line of inp to the time line of ref which
+    can be applied to any number of time series sampled as inp. The
+    averaging windows or the interpolation indices and weights are computed
+    once.
+
+    Parameters
+    ----------
+    inp : xarray.DataArray or numpy.ndarray
+        Time series to resample or its times.
+    ref : xarray.DataArray or numpy.ndarray
+        Reference time line.
+    method : str, Optional
+        Method of interpolation "spline", "linear" etc.
+        (default "linear") if method is given then interpolate
+        independent of sampling.
+    f_s : float, Optional
+        Sampling frequency of the Y signal, 1/window.
+    window : int or float or ndarray, Optional
+        Length of the averaging window, 1/fsample.
+    thresh : float, Optional
+        Points above STD*THRESH are disregarded for averaging
+
+    See Also
+    --------
+    pyrfu.pyrf.resample
+
+    Examples
+    --------
+    >>> from pyrfu import mms, pyrf
+
+    >>> tint = ["2015-10-30T05:15:20.000", "2015-10-30T05:16:20.000"]
+    >>> b_xyz = mms.get_data("B_gse_fgm_brst_l2", tint, 1)
+    >>> b_mag = mms.get_data("B_gse_fgm_brst_l2", tint, 1)
+    >>> e_xyz = mms.get_data("E_gse_edp_brst_l2", tint, 1)
+
+    Resample both magnetic field time series to the electric field sampling
+
+    >>> plan = pyrf.ResamplePlan(b_xyz, e_xyz)
+    >>> b_xyz, b_mag = plan.apply([b_xyz, b_mag])
+
+    Resample time series with different samplings, one plan per sampling
+
+    >>> b_xyz, e_xyz = pyrf.ResamplePlan.resample_many([b_xyz, e_xyz], e_xyz)
+
+    """
+
+    def __init__(self, inp, ref, method: str = "", f_s: float = None,
+                 window: int = None, thresh: float = 0):
+        self.inp_time = _time(inp)
+        self.ref_time = _time(ref)
+        self.thresh = thresh
+
+        if isinstance(ref, xr.DataArray):
+            self._ref_coord = ref.coords["time"]
+        else:
+            self._ref_coord = self.ref_time
+
+        flag_do = "check"
+
+        if method:
+            flag_do = "interpolation"
+
+        if f_s is not None:
+            sfy = f_s
+        elif window is not None:
+            sfy = 1 / window
+        else:
+            sfy = None
+
+        inp_time = self.inp_time.view("i8") * 1e-9
+        ref_time = self.ref_time.view("i8") * 1e-9
+
+        if flag_do == "check":
+            if len(ref_time) > 1:
+                if not sfy:
+                    sfy = _guess_sampling_frequency(ref_time)
+
+                if len(inp_time) / (inp_time[-1] - inp_time[0]) > 2 * sfy:
+                    flag_do = "average"
+                    warnings.warn("Using averages in resample", UserWarning)
+                else:
+                    flag_do = "interpolation"
+            else:
+                flag_do = "interpolation"
+
+        if flag_do == "average":
+            assert not method, "cannot mix interpolation and averaging flags"
+
+            if not sfy:
+                sfy = _guess_sampling_frequency(ref_time)
+
+            self.dt2 = .5 / sfy
+            self._dt2_ns = int(np.round(self.dt2 * 1e9))
+            dt2 = np.timedelta64(self._dt2_ns, "ns")
+
+            self.idx_l = self._index(inp).searchsorted(self.ref_time - dt2,
+                                                       side="left")
+            self.idx_r = self._index(inp).searchsorted(self.ref_time + dt2,
+                                                       side="right")
+
+        elif len(inp_time) == len(ref_time) and all(inp_time == ref_time):
+            # If time series agree, no interpolation is necessary.
+            flag_do = "identity"
+
+        elif (method or "linear") in ["linear", "nearest"] \
+                and len(inp_time) > 1:
+            self.idx, _ = self._index(inp).bracket(self.ref_time)
+            self.weights = _linear_weights(inp_time, ref_time, self.idx)
+
+            if method == "nearest":
+                # Ties go to the sample before as in scipy
+                self.idx = self.idx + (self.weights > .5)
+                self.weights = np.zeros(len(self.idx))
+
+        self.mode = flag_do
+        self.method = method or "linear"
+        self._inp_time, self._ref_time = [inp_time, ref_time]
+
+    @classmethod
+    def resample_many(cls, inps, ref, method: str = "", f_s: float = None,
+                      window: int = None, thresh: float = 0):
+        r"""Resamples time series to the time line of ref. The time series
+        sharing the same sampling are resampled with a single plan.
+
+        Parameters
+        ----------
+        inps : list of xarray.DataArray
+            Time series to resample.
+        ref : xarray.DataArray or numpy.ndarray
+            Reference time line.
+        method : str, Optional
+            Method of interpolation. See `ResamplePlan`.
+        f_s : float, Optional
+            Sampling frequency of the Y signal, 1/window.
+        window : int or float or ndarray, Optional
+            Length of the averaging window, 1/fsample.
+        thresh : float, Optional
+            Points above STD*THRESH are disregarded for averaging
+
+        Returns
+        -------
+        out : list of xarray.DataArray
+            Time series resampled to the reference time line, in the order
+            of inps.
+
+        """
+
+        groups, out = [[], [None] * len(inps)]
+
+        for i, inp in enumerate(inps):
+            for time, indices in groups:
+                if np.array_equal(time, inp.time.data):
+                    indices.append(i)
+                    break
+            else:
+                groups.append((inp.time.data, [i]))
+
+        for time, indices in groups:
+            plan = cls(inps[indices[0]], ref, method, f_s, window, thresh)
+
+            for i, out_ in zip(indices,
+                               plan.apply([inps[i] for i in indices])):
+                out[i] = out_
+
+        return out
+
+    def _index(self, inp):
+        if isinstance(inp, xr.DataArray):
+            return TimeIndex.of(inp)
+
+        return TimeIndex(self.inp_time)
+
+    def _apply_data(self, inp_data):
+        if self.mode == "identity":
+            return inp_data.copy()
+
+        if self.mode == "average":
+            if getattr(inp_data, "chunks", None) is not None:
+                # Windows in int64 nanoseconds as the windows of the plan
+                inp_time, ref_time = [self.inp_time.view("i8"),
+                                      self.ref_time.view("i8")]
+                return _lazy_apply(_average, inp_time, inp_data, ref_time,
+                                   self._dt2_ns, 0, self.thresh,
+                                   self._dt2_ns)
+
+            return _average_windows(inp_data, self.idx_l, self.idx_r,
+                                    self.thresh)
+
+        if getattr(inp_data, "chunks", None) is not None \
+                and self.method in _LOCAL_METHODS:
+            # Local interpolation methods only need the neighbouring samples
+            return _lazy_apply(_interpolate, self._inp_time, inp_data,
+                               self._ref_time, 0., 2, self.method)
+
+        if hasattr(self, "idx"):
+            weights = np.reshape(self.weights,
+                                 (-1, *[1] * (inp_data.ndim - 1)))
+            inp_data = np.asarray(inp_data)
+
+            out_data = inp_data[self.idx, ...]
+
+            if self.weights.any():
+                out_data = out_data * (1 - weights) \
+                    + inp_data[self.idx + 1, ...] * weights
+
+            return out_data.astype(np.result_type(inp_data, np.float64))
+
+        return _interpolate(self._inp_time, inp_data, self._ref_time,
+                            self.method)
+
+    def apply(self, inp):
+        r"""Resamples the time series.
+
+        Parameters
+        ----------
+        inp : xarray.DataArray or list of xarray.DataArray
+            Time series sampled as the input of the plan.
+
+        Returns
+        -------
+        out : xarray.DataArray or list of xarray.DataArray
+            Time series resampled to the reference time line.
+
+        """
+
+        if isinstance(inp, xr.DataArray):
+            return self.apply([inp])[0]
+
+        for inp_ in inp:
+            if len(inp_.time) != len(self.inp_time):
+                raise ValueError("The time series are not sampled as the "
+                                 "input of the plan")
+
+        # Time series in memory are resampled together
+        in_memory = [inp_.chunks is None for inp_ in inp]
+        columns = [np.reshape(inp_.data, (len(inp_), -1))
+                   for inp_, mem_ in zip(inp, in_memory) if mem_]
+
+        if len(columns) > 1:
+            out_columns = self._apply_data(np.hstack(columns))
+            bounds = np.cumsum([col_.shape[1] for col_ in columns])[:-1]
+            out_columns = np.split(out_columns, bounds, axis=1)
+        else:
+            out_columns = [self._apply_data(col_) for col_ in columns]
+
+        out = []
+
+        for inp_, mem_ in zip(inp, in_memory):
+            if mem_:
+                out_data = np.reshape(out_columns.pop(0),
+                                      (len(self.ref_time), *inp_.shape[1:]))
+            else:
+                out_data = self._apply_data(inp_.data)
+
+            if self.mode == "identity":
+                coord = [self.ref_time]
+            else:
+                coord = [self._ref_coord]
+
+            if len(inp_.coords) > 1:
+                for k in inp_.dims[1:]:
+                    coord.append(inp_.coords[k].data)
+
+            out.append(xr.DataArray(out_data, coords=coord, dims=inp_.dims,
+                                    attrs=inp_.attrs))
+
+        return out
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# 3rd party imports
+import numpy as np
+import xarray as xr
+
+# Local imports
+from .time_series_buffer import TimeSeriesBuffer, _Growable
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["SkymapBuffer"]
+
+# Attributes with one element per record
+_RECORD_ATTRS = ["esteptable", "delta_energy_plus", "delta_energy_minus"]
+
+
+class SkymapBuffer(TimeSeriesBuffer):
+    r"""Distribution skymap to which blocks of records are appended in
+    amortized constant time. See `pyrfu.pyrf.TimeSeriesBuffer`.
+
+    Parameters
+    ----------
+    max_duration : float or numpy.timedelta64, Optional
+        Duration in seconds of the skymap kept. The older records are
+        dropped at each append. Default is None (keep all the records).
+    capacity : int, Optional
+        Initial number of records allocated. Default is 1024.
+
+    Notes
+    -----
+    The variables and attributes are handled as in `pyrfu.pyrf.dist_append`:
+    the energy step table and the energy widths are appended and the other
+    attributes are those of the first block.
+
+    See Also
+    --------
+    pyrfu.pyrf.dist_append, pyrfu.pyrf.TimeSeriesBuffer
+
+    Examples
+    --------
+    >>> from pyrfu import pyrf
+
+    >>> buffer = pyrf.SkymapBuffer(max_duration=60.)
+    >>> for block in blocks:
+    ...     buffer.append(block)
+    ...     vdf = buffer.view()
+
+    """
+
+    def __init__(self, max_duration=None, capacity: int = 1024):
+        super().__init__(max_duration, capacity)
+
+        self._phi = _Growable(capacity)
+        self._energy = _Growable(capacity)
+
+    def append(self, inp):
+        r"""Appends a block of records.
+
+        Parameters
+        ----------
+        inp : xarray.Dataset
+            3D skymap of the records, later than the records already in the
+            buffer.
+
+        """
+
+        if self._layout is None:
+            record_attrs = [k for k in _RECORD_ATTRS if k in inp.attrs]
+            static = {k: inp.attrs[k] for k in inp.attrs
+                      if k not in record_attrs}
+
+            self._layout = {"attrs": static, "theta": inp.theta.data}
+
+            self._attrs = {k: _Growable(self.capacity) for k in record_attrs}
+
+        phi = inp.phi.data
+
+        if phi.ndim == 1:
+            phi = np.tile(phi, (len(inp.time), 1))
+
+        self._phi.append(phi)
+        self._energy.append(inp.energy.data)
+
+        self._time.append(inp.time.data.astype("<M8[ns]"))
+        self._data.append(inp.data.data)
+        self._append_attrs(self._attrs, {k: np.asarray(inp.attrs[k])
+                                         for k in self._attrs})
+
+        if self.max_duration is not None:
+            time = self._time.view()
+            n_drop = np.searchsorted(time, time[-1] - self.max_duration,
+                                     side="left")
+            self._drop(n_drop)
+
+    def _drop(self, n_records):
+        super()._drop(n_records)
+
+        self._phi.drop(n_records)
+        self._energy.drop(n_records)
+
+    def view(self, tint=None):
+        r"""Records in the buffer. The data are a view of the buffer.
+
+        Parameters
+        ----------
+        tint : array_like, Optional
+            Time interval. Default is None (all the records).
+
+        Returns
+        -------
+        out : xarray.Dataset
+            3D skymap of the records.
+
+        """
+
+        if self._layout is None:
+            return None
+
+        idx = self._slice(tint)
+
+        energy, phi = [self._energy.view(idx), self._phi.view(idx)]
+        theta = self._layout["theta"]
+
+        out_dict = {"data": (["time", "idx0", "idx1", "idx2"],
+                             self._data.view(idx)),
+                    "phi": (["time", "idx1"], phi),
+                    "theta": (["idx2"], theta),
+                    "energy": (["time", "idx0"], energy),
+                    "time": self._time.view(idx),
+                    "idx0": np.arange(energy.shape[1]),
+                    "idx1": np.arange(phi.shape[1]),
+                    "idx2": np.arange(len(theta))}
+
+        out = xr.Dataset(out_dict)
+
+        out.attrs = dict(self._layout["attrs"])
+
+        for k, growable in self._attrs.items():
+            out.attrs[k] = growable.view(idx)
+
+        return out
@@ -1,13 +1,12 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-# Built-in imports
-import bisect
-
 # 3rd party imports
-import numpy as np
 import xarray as xr
 
+# Local imports
+from .time_index import TimeIndex
+
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
 __copyright__ = "Copyright 2020-2021"
@@ -33,12 +32,7 @@ def t_eval(inp, times):
 
     """
 
-    idx = np.zeros(len(times))
-
-    for i, time in enumerate(times):
-        idx[i] = bisect.bisect_left(inp.time.data, time)
-
-    idx = idx.astype(int)
+    idx = TimeIndex.of(inp).searchsorted(times)
 
     if inp.ndim == 2:
         out = xr.DataArray(inp.data[idx, :], coords=[times, inp.comp],
@@ -2,7 +2,6 @@
 # -*- coding: utf-8 -*-
 
 # Built-in imports
-import bisect
 import datetime
 
 # 3rd party imports
@@ -11,6 +10,7 @@ import xarray as xr
 
 # Local imports
 from .iso86012datetime64 import iso86012datetime64
+from .time_index import TimeIndex
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -36,53 +36,31 @@ def time_clip(inp, tint):
     out : xarray.DataArray
         Time series of the time clipped input.
 
-    """
-
-    if isinstance(inp, xr.Dataset):
-        coords_data = [inp[k] for k in filter(lambda x: x != "time", inp.dims)]
-        coords_data = [time_clip(inp.time, tint), *coords_data]
-        out_dict = {dim: coords_data[i] for i, dim in enumerate(inp.coords)}
-
-        for k in inp:
-            if "time" in list(inp[k].coords):
-                data = time_clip(inp[k], tint)
-                out_dict[k] = (list(inp[k].dims), data)
-            else:
-                out_dict[k] = (list(inp[k].dims), inp[k])
+    Notes
+    -----
+    The data of the output are a view of the data of the input. The index
+    of the times of the input is cached (see `pyrfu.pyrf.TimeIndex`) so
+    that repeated clips of the same time series only cost two binary
+    searches.
 
-        out = xr.Dataset(out_dict)
-        out.attrs = inp.attrs
-        return out
+    """
 
     if isinstance(tint, xr.DataArray):
-        t_start, t_stop = tint.time.data[[0, -1]]
+        tint = tint.time.data[[0, -1]]
 
     elif isinstance(tint, np.ndarray):
-        if isinstance(tint[0], datetime.datetime) \
+        if np.issubdtype(tint.dtype, np.datetime64):
+            tint = tint[[0, -1]]
+        elif isinstance(tint[0], datetime.datetime) \
                 and isinstance(tint[-1], datetime.datetime):
-            t_start, t_stop = [tint.time[0], tint.time[-1]]
-
+            tint = np.array([tint[0], tint[-1]])
         else:
             raise TypeError('Values must be in Datetime64')
 
     elif isinstance(tint, list):
-        t_start, t_stop = iso86012datetime64(np.array(tint))
+        tint = iso86012datetime64(np.array(tint))
 
     else:
         raise TypeError("invalid tint")
 
-    idx_min = bisect.bisect_left(inp.time.data, np.datetime64(t_start))
-    idx_max = bisect.bisect_right(inp.time.data, np.datetime64(t_stop))
-
-    coord = [inp.time.data[idx_min:idx_max]]
-
-    if len(inp.coords) > 1:
-        for k in inp.dims[1:]:
-            coord.append(inp.coords[k].data)
-
-    out = xr.DataArray(inp.data[idx_min:idx_max, ...], coords=coord,
-                       dims=inp.dims, attrs=inp.attrs)
-
-    out.time.attrs = inp.time.attrs
-
-    return out
+    return TimeIndex.of(inp).clip(inp, tint.astype("<M8[ns]"))
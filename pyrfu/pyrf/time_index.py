@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Built-in imports
+import weakref
+import datetime
+import threading
+
+# 3rd party imports
+import numpy as np
+import xarray as xr
+
+# Local imports
+from .iso86012datetime64 import iso86012datetime64
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["TimeIndex"]
+
+# Indices of the time series, keyed by the id of the pandas index of their
+# time coordinate which is shared by the DataArrays derived without changing
+# the times.
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def _to_ns(times):
+    r"""Converts times (time series, datetime64, datetime or ISO 8601
+    strings) to int64 nanoseconds."""
+
+    if isinstance(times, xr.DataArray):
+        times = times.time.data
+
+    times = np.asarray(times)
+
+    if times.dtype.kind in "US":
+        times = iso86012datetime64(times)
+    elif times.dtype == object \
+            and all(isinstance(t_, datetime.datetime) for t_ in times.flat):
+        times = times.astype("<M8[ns]")
+    elif not np.issubdtype(times.dtype, np.datetime64):
+        raise TypeError("Values must be in Datetime64")
+
+    return times.astype("<M8[ns]").view("i8")
+
+
+def _nearest(sorted_values, values):
+    r"""Indices of the values of the sorted array which are the closest to
+    values. Ties go to the smaller value."""
+
+    if len(sorted_values) == 1:
+        return np.zeros(len(np.atleast_1d(values)), dtype=int)
+
+    idx = np.searchsorted(sorted_values, values, side="left")
+    idx = np.clip(idx, 1, len(sorted_values) - 1)
+
+    before = values - sorted_values[idx - 1] <= sorted_values[idx] - values
+
+    return idx - before
+
+
+def _forget(key):
+    with _indices_lock:
+        _indices.pop(key, None)
+
+
+class TimeIndex:
+    r"""Index of the times of a time series in int64 nanoseconds.
+
+    Parameters
+    ----------
+    inp : xarray.DataArray or numpy.ndarray
+        Time series or its times.
+
+    Notes
+    -----
+    The times are assumed to be sorted but are not checked. As with the
+    bisection used before, slightly unsorted times (e.g. a repeated or
+    jittered sample) are accepted and the indices refer to the samples in
+    their original order.
+
+    See Also
+    --------
+    pyrfu.pyrf.time_clip, pyrfu.pyrf.t_eval
+
+    Examples
+    --------
+    >>> from pyrfu import mms, pyrf
+
+    >>> tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+    >>> b_xyz = mms.get_data("B_gse_fgm_srvy_l2", tint, 1)
+
+    The index is computed once for the time series
+
+    >>> index = pyrf.TimeIndex.of(b_xyz)
+    >>> b_clip = index.clip(b_xyz, ["2019-09-14T07:57:00.000",
+    ...                             "2019-09-14T07:58:00.000"])
+
+    """
+
+    def __init__(self, inp):
+        if isinstance(inp, xr.DataArray):
+            inp = inp.time.data
+
+        self.time = np.asarray(inp).astype("<M8[ns]").view("i8")
+
+    def __len__(self):
+        return len(self.time)
+
+    @classmethod
+    def of(cls, inp):
+        r"""Index of the time series, cached for the time series sharing its
+        time coordinate.
+
+        Parameters
+        ----------
+        inp : xarray.DataArray or xarray.Dataset
+            Time series.
+
+        Returns
+        -------
+        index : TimeIndex
+            Index of the times of inp.
+
+        """
+
+        pd_index = inp.indexes["time"]
+        key = id(pd_index)
+
+        with _indices_lock:
+            entry = _indices.get(key)
+
+        if entry is not None and entry[0]() is pd_index:
+            return entry[1]
+
+        index = cls(inp.time.data)
+
+        with _indices_lock:
+            _indices[key] = (weakref.ref(pd_index), index)
+
+        weakref.finalize(pd_index, _forget, key)
+
+        return index
+
+    def searchsorted(self, times, side: str = "left"):
+        r"""Indices where the times would be inserted to keep the order.
+
+        Parameters
+        ----------
+        times : array_like
+            Times as datetime64, datetime or ISO 8601 strings.
+        side : {"left", "right"}, Optional
+            Index of the first (left) or last (right) suitable location.
+            Default is "left".
+
+        Returns
+        -------
+        idx : ndarray
+            Insertion indices.
+
+        """
+
+        return np.searchsorted(self.time, _to_ns(times), side=side)
+
+    def slice(self, tint):
+        r"""Slice of the samples within the time interval, bounds
+        included."""
+
+        t_start, t_stop = _to_ns(tint)[[0, -1]]
+
+        idx_min = np.searchsorted(self.time, t_start, side="left")
+        idx_max = np.searchsorted(self.time, t_stop, side="right")
+
+        return slice(int(idx_min), int(idx_max))
+
+    def clip(self, inp, tint):
+        r"""Samples of the time series within the time interval. The data
+        are a view of the data of inp.
+
+        Parameters
+        ----------
+        inp : xarray.DataArray or xarray.Dataset
+            Time series indexed by self.
+        tint : array_like
+            Time interval.
+
+        Returns
+        -------
+        out : xarray.DataArray or xarray.Dataset
+            Time clipped input.
+
+        """
+
+        return inp.isel(time=self.slice(tint))
+
+    def nearest(self, times):
+        r"""Indices of the samples the closest to the times."""
+
+        return _nearest(self.time, _to_ns(times))
+
+    def bracket(self, times):
+        r"""Indices of the samples before and after the times. The first
+        and last intervals are used outside of the time series.
+
+        Parameters
+        ----------
+        times : array_like
+            Times as datetime64, datetime or ISO 8601 strings.
+
+        Returns
+        -------
+        idx_l : ndarray
+            Indices of the samples before.
+        idx_r : ndarray
+            Indices of the samples after.
+
+        """
+
+        idx = np.searchsorted(self.time, _to_ns(times), side="right") - 1
+        idx = np.clip(idx, 0, len(self.time) - 2)
+
+        return idx, idx + 1
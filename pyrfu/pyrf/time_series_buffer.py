@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# 3rd party imports
+import numpy as np
+import xarray as xr
+
+# Local imports
+from .time_index import _to_ns
+
+__author__ = "Louis Richard"
+__email__ = "louisr@irfu.se"
+__copyright__ = "Copyright 2020-2021"
+__license__ = "MIT"
+__version__ = "2.3.7"
+__status__ = "Prototype"
+
+__all__ = ["TimeSeriesBuffer"]
+
+
+class _Growable:
+    r"""Records stored in an array of which the capacity is doubled when
+    full. Records are dropped at the front by moving the start index. The
+    array is only reallocated (never written in place before the stop
+    index), so the views of the records remain valid."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.array = None
+        self.start, self.stop = [0, 0]
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def append(self, values):
+        values = np.asarray(values)
+
+        if self.array is None:
+            self.array = np.empty((max(self.capacity, len(values)),
+                                   *values.shape[1:]), dtype=values.dtype)
+
+        n_records = len(values)
+
+        if self.stop + n_records > len(self.array) \
+                or not np.can_cast(values.dtype, self.array.dtype):
+            n_live = len(self)
+            new = np.empty((max(2 * (n_live + n_records), self.capacity),
+                            *self.array.shape[1:]),
+                           dtype=np.result_type(self.array, values))
+            new[:n_live] = self.array[self.start:self.stop]
+
+            self.array = new
+            self.start, self.stop = [0, n_live]
+
+        self.array[self.stop:self.stop + n_records] = values
+        self.stop += n_records
+
+    def drop(self, n_records):
+        self.start += min(n_records, len(self))
+
+    def view(self, idx: slice = slice(None)):
+        return self.array[self.start:self.stop][idx]
+
+
+def _split_attrs(attrs, record_attrs):
+    r"""Splits the attributes in static ones, those of the first block, and
+    the names of the attributes with one element per record."""
+
+    record_varying = [k for k in record_attrs if k in attrs]
+    static = {k: value for k, value in attrs.items()
+              if k not in record_varying}
+
+    return static, record_varying
+
+
+class TimeSeriesBuffer:
+    r"""Time series to which blocks of records are appended in amortized
+    constant time. The records are stored in arrays of which the capacity
+    is doubled when full instead of being copied at each append as with
+    `pyrfu.pyrf.ts_append`.
+
+    Parameters
+    ----------
+    max_duration : float or numpy.timedelta64, Optional
+        Duration in seconds of the time series kept. The older records are
+        dropped at each append. Default is None (keep all the records).
+    capacity : int, Optional
+        Initial number of records allocated. Default is 1024.
+    record_attrs : list of str, Optional
+        Names of the attributes of the time series and of its time
+        coordinate with one element per record. Default is None (no
+        attribute varies with the records).
+
+    Notes
+    -----
+    The attributes in record_attrs are appended with the records and time
+    sliced. Unlike `pyrfu.pyrf.ts_append`, the other attributes, arrays
+    included, are those of the first block so that the buffer does not
+    grow with them. The coordinates other than time are those of the
+    first block.
+
+    See Also
+    --------
+    pyrfu.pyrf.ts_append, pyrfu.pyrf.SkymapBuffer
+
+    Examples
+    --------
+    >>> from pyrfu import pyrf
+
+    >>> buffer = pyrf.TimeSeriesBuffer(max_duration=60.,
+    ...                                record_attrs=["quality"])
+    >>> for block in blocks:
+    ...     buffer.append(block)
+    ...     b_xyz = buffer.view()
+
+    """
+
+    def __init__(self, max_duration=None, capacity: int = 1024,
+                 record_attrs: list = None):
+        if max_duration is not None \
+                and not isinstance(max_duration, np.timedelta64):
+            max_duration = np.timedelta64(int(max_duration * 1e9), "ns")
+
+        self.max_duration = max_duration
+        self.capacity = capacity
+        self.record_attrs = list(record_attrs or [])
+
+        self._time = _Growable(capacity)
+        self._data = _Growable(capacity)
+        self._attrs, self._time_attrs = [{}, {}]
+        self._layout = None
+
+    def __len__(self):
+        return len(self._time)
+
+    def _append_attrs(self, growables, attrs):
+        for k, growable in growables.items():
+            growable.append(np.atleast_1d(attrs[k]))
+
+    def append(self, inp):
+        r"""Appends a block of records.
+
+        Parameters
+        ----------
+        inp : xarray.DataArray
+            Time series of the records, later than the records already in
+            the buffer.
+
+        """
+
+        if self._layout is None:
+            static, attrs = _split_attrs(inp.attrs, self.record_attrs)
+            time_static, time_attrs = _split_attrs(inp.time.attrs,
+                                                   self.record_attrs)
+
+            coords = [(dim, inp[dim].data, dict(inp[dim].attrs))
+                      for dim in inp.dims[1:]]
+
+            self._layout = {"dims": inp.dims, "coords": coords,
+                            "attrs": static, "time_attrs": time_static}
+
+            self._attrs = {k: _Growable(self.capacity) for k in attrs}
+            self._time_attrs = {k: _Growable(self.capacity)
+                                for k in time_attrs}
+
+        self._time.append(inp.time.data.astype("<M8[ns]"))
+        self._data.append(inp.data)
+        self._append_attrs(self._attrs, inp.attrs)
+        self._append_attrs(self._time_attrs, inp.time.attrs)
+
+        if self.max_duration is not None:
+            time = self._time.view()
+            n_drop = np.searchsorted(time, time[-1] - self.max_duration,
+                                     side="left")
+            self._drop(n_drop)
+
+    def _drop(self, n_records):
+        self._time.drop(n_records)
+        self._data.drop(n_records)
+
+        for growable in [*self._attrs.values(),
+                         *self._time_attrs.values()]:
+            growable.drop(n_records)
+
+    def _slice(self, tint):
+        if tint is None:
+            return slice(None)
+
+        t_start, t_stop = _to_ns(tint)[[0, -1]]
+        time = self._time.view().view("i8")
+
+        return slice(int(np.searchsorted(time, t_start, side="left")),
+                     int(np.searchsorted(time, t_stop, side="right")))
+
+    def view(self, tint=None):
+        r"""Records in the buffer. The data are a view of the buffer.
+
+        Parameters
+        ----------
+        tint : array_like, Optional
+            Time interval. Default is None (all the records).
+
+        Returns
+        -------
+        out : xarray.DataArray
+            Time series of the records.
+
+        """
+
+        if self._layout is None:
+            return None
+
+        idx = self._slice(tint)
+
+        attrs = dict(self._layout["attrs"])
+        time_attrs = dict(self._layout["time_attrs"])
+
+        for k, growable in self._attrs.items():
+            attrs[k] = growable.view(idx)
+
+        for k, growable in self._time_attrs.items():
+            time_attrs[k] = growable.view(idx)
+
+        coords = [self._time.view(idx)]
+        coords += [data for _, data, _ in self._layout["coords"]]
+
+        out = xr.DataArray(self._data.view(idx), coords=coords,
+                           dims=self._layout["dims"], attrs=attrs)
+
+        out.time.attrs = time_attrs
+
+        for dim, _, dim_attrs in self._layout["coords"]:
+            out[dim].attrs = dict(dim_attrs)
+
+        return out
@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 # 3rd party imports
+import numpy as np
+
 from cdflib import cdfepoch
 
 # Local imports
@@ -14,6 +16,30 @@ __license__ = "MIT"
 __version__ = "2.3.7"
 __status__ = "Prototype"
 
+# Dates (UTC) from which TAI - UTC is equal to the number of seconds.
+_LEAP_SECONDS = [("1972-01-01", 10), ("1972-07-01", 11), ("1973-01-01", 12),
+                 ("1974-01-01", 13), ("1975-01-01", 14), ("1976-01-01", 15),
+                 ("1977-01-01", 16), ("1978-01-01", 17), ("1979-01-01", 18),
+                 ("1980-01-01", 19), ("1981-07-01", 20), ("1982-07-01", 21),
+                 ("1983-07-01", 22), ("1985-07-01", 23), ("1988-01-01", 24),
+                 ("1990-01-01", 25), ("1991-01-01", 26), ("1992-07-01", 27),
+                 ("1993-07-01", 28), ("1994-07-01", 29), ("1996-01-01", 30),
+                 ("1997-07-01", 31), ("1999-01-01", 32), ("2006-01-01", 33),
+                 ("2009-01-01", 34), ("2012-07-01", 35), ("2015-07-01", 36),
+                 ("2017-01-01", 37)]
+
+# J2000 (2000-01-01T12:00:00 TT) in datetime64 ns and TT - TAI in ns
+_J2000 = np.datetime64("2000-01-01T12:00:00", "ns").astype(np.int64)
+_TT_TAI = 32184000000
+
+# Leap seconds table: start of each period in datetime64 (UTC) and in
+# epoch_tt2000, both in ns as int64, and TAI - UTC in ns.
+_LS_UTC = np.array([d for d, _ in _LEAP_SECONDS], dtype="<M8[ns]")
+_LS_UTC = _LS_UTC.astype(np.int64)
+_LS_NS = np.array([s for _, s in _LEAP_SECONDS], dtype=np.int64)
+_LS_NS *= 1000000000
+_LS_TT = _LS_UTC - _J2000 + _LS_NS + _TT_TAI
+
 
 def ttns2datetime64(time):
     r"""Convert time in epoch_tt2000 (nanosedconds since J2000) to datetime64
@@ -29,15 +55,32 @@ def ttns2datetime64(time):
     time_datetime64 : ndarray
         Time in datetime64 format in ns units.
 
+    Notes
+    -----
+    The conversion uses a table of the leap seconds and int64 arithmetic.
+    As datetime64 has no leap seconds, times within a leap second are
+    mapped onto the first second of the next day. Times before 1972 are
+    converted with cdflib.
+
+    See Also
+    --------
+    pyrfu.pyrf.datetime642ttns
+
     """
 
-    #
-    time_tt2000 = cdfepoch.breakdown_tt2000(time)
+    time = np.asarray(time, dtype=np.int64)
+
+    idx = np.searchsorted(_LS_TT, time, side="right") - 1
+
+    time_datetime64 = time + _J2000 - _TT_TAI - _LS_NS[np.maximum(idx, 0)]
+    time_datetime64 = time_datetime64.view("<M8[ns]")
 
-    # Convert to ISO 8601 string 'YYYY-MM-DDThh:mm:ss.mmmuuunnn'
-    time_iso8601 = timevec2iso8601(time_tt2000)
+    # Before the leap seconds table (and fill values)
+    old = idx < 0
 
-    #
-    time_datetime64 = time_iso8601.astype("<M8[ns]")
+    if np.any(old):
+        time_tt2000 = cdfepoch.breakdown_tt2000(np.atleast_1d(time[old]))
+        time_iso8601 = timevec2iso8601(np.atleast_2d(time_tt2000))
+        time_datetime64[old] = time_iso8601.astype("<M8[ns]")
 
     return time_datetime64
@@ -4,10 +4,11 @@
 # 3rd party imports
 import numpy as np
 import xarray as xr
-import pandas as pd
 
-from cdflib import cdfepoch, cdfread
-from dateutil import parser as date_parser
+from cdflib import cdfread
+
+# Local imports
+from ..pyrf import iso86012datetime64, datetime642ttns, ttns2datetime64
 
 __author__ = "Louis Richard"
 __email__ = "louisr@irfu.se"
@@ -17,28 +18,7 @@ __version__ = "2.3.7"
 __status__ = "Prototype"
 
 
-def _datetime_to_tt2000(time):
-    r"""Converts datetime.datetime into epoch_tt_2000.
-
-    Parameters
-    ----------
-    time : datetime.datetime or list of datetime.datetime
-        Time or list of times to convert.
-
-    Returns
-    -------
-    tt2000 : str
-        Time into TT2000 format.
-
-    """
-
-    time_ = pd.Timestamp(time)
-
-    # Convert to string
-    return f"{time_.strftime('%Y-%m-%dT%H:%M:%S.%f')}{time_.nanosecond:03d}"
-
-
-def _rcdf(path, tint):
+def _rcdf(path, tint, keys):
     r"""Reads CDF files.
 
     Parameters
@@ -47,38 +27,107 @@ def _rcdf(path, tint):
         String of the filename in .cdf containing the L2 data
     tint : list
         Time interval
+    keys : list of str
+        Names (lower case) of the variables to read.
 
     Returns
     -------
     out_dict : dict
-        Hash table with fields contained in the .cdf file.
+        Hash table with the variables in the time interval.
 
     """
     out_dict = {}
 
     with cdfread.CDF(path) as file:
-        keys_ = file.cdf_info()["zVariables"]
-        for k_ in keys_:
-            temp_ = file.varget(k_, starttime=tint[0], endtime=tint[1])
-            shape_ = temp_.shape
-            coords = [np.arange(lim_) for lim_ in shape_]
+        names = {k_.lower(): k_ for k_ in file.cdf_info()["zVariables"]}
 
-            out_dict[k_.lower()] = xr.DataArray(temp_, coords=coords)
+        for k_ in keys:
+            out_dict[k_] = file.varget(names[k_], starttime=tint[0],
+                                       endtime=tint[1])
 
     return out_dict
 
 
+def _read_files(paths, tint, keys):
+    r"""Reads the variables of the files and joins the records."""
+
+    data = [_rcdf(path, tint, keys) for path in paths]
+    data = [data_ for data_ in data if data_["epoch"] is not None]
+
+    if not data:
+        raise ValueError("no data at all ?!?")
+
+    out_dict = {k_: np.concatenate([data_[k_] for data_ in data])
+                for k_ in keys if k_ != "tnr_band_freq"}
+    out_dict["tnr_band_freq"] = data[0]["tnr_band_freq"]
+
+    return out_dict
+
+
+def _sweeps(data_l2, sweep_num, timet_, freq_tnr, sensor):
+    r"""Assembles the 128 channels sweeps of the sensor."""
+
+    if sensor == 7:
+        auto1_ = data_l2["magnetic_spectral_power1"]
+        auto2_ = data_l2["magnetic_spectral_power2"]
+    else:
+        auto1_, auto2_ = [data_l2["auto1"], data_l2["auto2"]]
+
+    confg_ = data_l2["sensor_config"]
+
+    sens0_, sens1_ = [np.where(confg_[:, i] == sensor)[0] for i in range(2)]
+
+    if not sens0_.size and not sens1_.size:
+        raise ValueError("no data at all ?!?")
+
+    auto_calib = np.vstack([auto1_[sens0_, :], auto2_[sens1_, :]])
+    sens_ = np.hstack([sens0_, sens1_])
+    timet_ici = np.hstack([timet_[sens0_], timet_[sens1_]])
+
+    ord_time = np.argsort(timet_ici)
+    time_rr = timet_ici[ord_time]
+    sens_ = sens_[ord_time]
+    auto_calib = auto_calib[ord_time, :]
+
+    bande_e = data_l2["tnr_band"][sens_]
+    sweep_num = sweep_num[sens_]
+
+    # The last sweep is left out as it can be cut by the time interval
+    in_sweeps = sweep_num < np.max(sweep_num)
+
+    # Scatter the bands of all the records into their sweep at once. The
+    # first record of each sweep gives its time.
+    sweeps, first, idx_sweep = np.unique(sweep_num[in_sweeps],
+                                         return_index=True,
+                                         return_inverse=True)
+
+    v_ = np.zeros((len(sweeps), 128))
+    idx_freq = 32 * bande_e[in_sweeps, np.newaxis] + np.arange(32)
+    v_[idx_sweep.reshape(-1, 1), idx_freq] = auto_calib[in_sweeps, :]
+
+    time = time_rr[in_sweeps][first]
+
+    # Drop the empty sweeps and flag the missing channels
+    not_empty = np.sum(v_, axis=1) > 0.0
+    v_, time = [v_[not_empty, :], time[not_empty]]
+    v_[v_ == 0.0] = np.nan
+
+    out = xr.DataArray(v_, coords=[time, freq_tnr])
+
+    return out
+
+
 def read_tnr(path, tint, sensor: int = 4):
     r"""Read L2 data from TNR
 
     Parameters
     ----------
-    path : str
-        String of the filename in .cdf containing the L2 data
+    path : str or list of str
+        String of the filename(s) in .cdf containing the L2 data
     tint : list
         Time interval
-    sensor : int, Optional
-        TNR sensor to be read:
+    sensor : int or list of int, Optional
+        TNR sensor(s) to be read:
             * 1: V1
             * 2: V2
             * 3: V3,
@@ -89,45 +138,43 @@ def read_tnr(path, tint, sensor: int = 4):
 
     Returns
     -------
-    out : xarray.DataArray
-        Spectrum of the measured signals.
+    out : xarray.DataArray or dict
+        Spectrum of the measured signals. If sensor is a list, hash table
+        of the spectra with the sensors as keys.
 
     Notes
     -----
     The script check if there are data from the two channel and put them
-    together.
+    together. Only the variables used are read from the files.
 
     """
 
-    tint_ = list(map(date_parser.parse, tint))
-    tint_ = list(map(_datetime_to_tt2000, tint_))
-    tint_ = list(map(cdfepoch.parse, tint_))
+    paths = [path] if isinstance(path, str) else list(path)
+    sensors = [sensor] if isinstance(sensor, int) else list(sensor)
 
-    data_l2 = _rcdf(path, tint_)
+    keys = ["epoch", "tnr_band_freq", "sweep_num", "tnr_band",
+            "sensor_config", "front_end"]
 
-    n_freqs = 4 * data_l2["tnr_band_freq"].shape[1]
-    freq_tnr = np.reshape(data_l2["tnr_band_freq"].data, n_freqs) / 1000
+    if any(sensor_ != 7 for sensor_ in sensors):
+        keys += ["auto1", "auto2"]
 
-    epoch_ = data_l2["epoch"].data
-    auto1_ = data_l2["auto1"].data
-    auto2_ = data_l2["auto2"].data
-    sweep_ = data_l2["sweep_num"].data
-    bande_ = data_l2["tnr_band"].data
-    confg_ = data_l2["sensor_config"].data
+    if 7 in sensors:
+        keys += ["magnetic_spectral_power1", "magnetic_spectral_power2"]
 
-    if sensor == 7:
-        auto1_ = data_l2["magnetic_spectral_power1"].data
-        auto2_ = data_l2["magnetic_spectral_power2"].data
+    tint_ = list(datetime642ttns(iso86012datetime64(np.array(tint))))
 
-    puntical = np.where(data_l2["front_end"].data == 1)[0]
+    data_l2 = _read_files(paths, tint_, keys)
+
+    n_freqs = 4 * data_l2["tnr_band_freq"].shape[1]
+    freq_tnr = np.reshape(data_l2["tnr_band_freq"], n_freqs) / 1000
 
-    epoch_ = epoch_[puntical]
-    confg_ = confg_[puntical, :]
-    auto1_ = auto1_[puntical, :]
-    auto2_ = auto2_[puntical, :]
-    sweep_ = sweep_[puntical]
-    bande_ = bande_[puntical]
+    puntical = np.where(data_l2["front_end"] == 1)[0]
 
+    for k_ in keys:
+        if k_ != "tnr_band_freq":
+            data_l2[k_] = data_l2[k_][puntical, ...]
+
+    sweep_ = data_l2["sweep_num"]
     sweep_num = sweep_
 
     delta_sw = np.abs(sweep_[1:] - sweep_[:-1])
@@ -140,57 +187,12 @@ def read_tnr(path, tint, sensor: int = 4):
             idx_l, idx_r = [xdelta_sw[inswn] + 1, xdelta_sw[inswn + 1]]
             sweep_num[idx_l:idx_r] += sweep_num[xdelta_sw[inswn]]
 
-    timet_ = cdfepoch.to_datetime(epoch_, to_np=True)
-
-    sens0_, sens1_ = [np.where(confg_[:, i] == sensor)[0] for i in range(2)]
-
-    if sens0_.size and sens1_.size:
-        auto_calib = np.vstack([auto1_[sens0_, :], auto2_[sens1_, :]])
-        sens_ = np.hstack([sens0_, sens1_])
-        timet_ici = np.hstack([timet_[sens0_], timet_[sens1_]])
-    elif sens0_.size:
-        auto_calib = auto1_[sens0_, :]
-        sens_ = sens0_
-        timet_ici = timet_[sens0_]
-    elif sens1_.size:
-        auto_calib = auto2_[sens1_, :]
-        sens_ = sens1_
-        timet_ici = timet_[sens1_]
-
-    else:
-        raise ValueError("no data at all ?!?")
-
-    ord_time = np.argsort(timet_ici)
-    time_rr = timet_ici[ord_time]
-    sens_ = sens_[ord_time]
-    auto_calib = auto_calib[ord_time, :]
-
-    bande_e = bande_[sens_]
-    max_sweep = np.max(sweep_num[sens_])
-    min_sweep = np.min(sweep_num[sens_])
-    sweep_num = sweep_num[sens_]
-
-    v_, time, sweepn_tnr = [[], [], []]
-
-    for ind_sweep in range(min_sweep, max_sweep):
-        v1_ = np.zeros(128)
-        p_punt = np.where(sweep_num == ind_sweep)[0]
-        if p_punt.size:
-            for indband in range(p_punt.size):
-                idx_l = 32 * bande_e[p_punt[indband]]
-                idx_r = 32 * (bande_e[p_punt[indband]] + 1)
-                v1_[idx_l:idx_r] = auto_calib[p_punt[indband], :]
-
-            if np.sum(v1_) > 0.0:
-                punt0_ = np.where(v1_ == 0.0)[0]
-                if punt0_.size:
-                    v1_[punt0_] = np.nan
-                v_.append(v1_)
-                sweepn_tnr.append(sweep_num[p_punt[0]])
+    timet_ = ttns2datetime64(data_l2["epoch"])
 
-        if p_punt.size:
-            time.append(time_rr[np.min(p_punt)])
+    out = {sensor_: _sweeps(data_l2, sweep_num, timet_, freq_tnr, sensor_)
+           for sensor_ in sensors}
 
-    out = xr.DataArray(np.stack(v_), coords=[np.stack(time), freq_tnr])
+    if isinstance(sensor, int):
+        return out[sensor]
 
     return out
@@ -0,0 +1,1056 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# MIT License
+#
+# Copyright (c) 2020 Louis Richard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so.
+
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import tempfile
+import unittest
+import threading
+import contextlib
+import urllib.parse
+
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import xarray as xr
+import dask.array as da
+
+from cdflib import cdfepoch, cdfread, cdfwrite
+
+from pyrfu import mms, pyrf
+from pyrfu.mms import cdf_cache, mirror_cache
+from pyrfu.mms.cdf_cache import CachedCDF
+from pyrfu.mms.mms_config import CONFIG
+
+
+def _touch(data_path, file_path):
+    file_path = os.path.join(data_path, file_path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    with open(file_path, "w") as file:
+        file.write("cdf")
+
+    return file_path
+
+
+# CDF data types
+_CDF_TIME_TT2000, _CDF_UINT1, _CDF_DOUBLE, _CDF_CHAR = [33, 11, 45, 51]
+
+
+def _write_cdf(file_path, variables):
+    r"""Writes the variables (name, data type, data, attributes) in a CDF
+    file. The epochs and the variables with a DEPEND_0 are record varying."""
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    file = cdfwrite.CDF(file_path, cdf_spec={"Majority": "Row_major"})
+
+    for name, data_type, data, attrs in variables:
+        data = np.asarray(data)
+        rec_vary = data_type == _CDF_TIME_TT2000 or "DEPEND_0" in attrs
+        n_elements = data.dtype.itemsize if data_type == _CDF_CHAR else 1
+
+        var_spec = {"Variable": name, "Data_Type": data_type,
+                    "Num_Elements": n_elements, "Rec_Vary": rec_vary,
+                    "Dim_Sizes": list(data.shape[rec_vary:])}
+
+        file.write_var(var_spec, var_attrs=attrs, var_data=data)
+
+    file.close()
+
+    return file_path
+
+
+def _epochs(start, n_records, f_s):
+    t_0 = cdfepoch.compute_tt2000([2019, 9, 14, 8, start, 0, 0, 0, 0])
+    return t_0 + (np.arange(n_records) * 1e9 / f_s).astype(np.int64)
+
+
+def _write_fgm(data_path, start, n_records: int = 960, mms_id: int = 1,
+               f_s: float = 16.):
+    r"""FGM burst file starting at 08:start with the magnetic field in GSE
+    and GSM sampled at f_s."""
+
+    epochs = _epochs(start, n_records, f_s)
+    b_gse = np.random.randn(n_records, 4)
+    b_gsm = np.random.randn(n_records, 4)
+
+    prefix = f"mms{mms_id:d}_fgm"
+
+    return _write_cdf(os.path.join(
+        data_path, f"mms{mms_id:d}/fgm/brst/l2/2019/09/14",
+        f"{prefix}_brst_l2_2019091408{start:02d}00_v5.207.0.cdf"),
+        [("Epoch", _CDF_TIME_TT2000, epochs, {"UNITS": "ns"}),
+         (f"{prefix}_b_gse_brst_l2", _CDF_DOUBLE, b_gse,
+          {"DEPEND_0": "Epoch", "UNITS": "nT"}),
+         (f"{prefix}_b_gsm_brst_l2", _CDF_DOUBLE, b_gsm,
+          {"DEPEND_0": "Epoch", "UNITS": "nT"})])
+
+
+def _write_fpi_dist(data_path, start, n_records: int = 400):
+    r"""FPI ion burst distribution file starting at 08:start with
+    alternating energy tables sampled at 6.67 Hz."""
+
+    epochs = _epochs(start, n_records, 1 / .15)
+    step_table = (np.arange(n_records) % 2).astype(np.uint8)
+    energy0, energy1 = [np.logspace(1, 4, 5), np.logspace(1.1, 4.1, 5)]
+
+    energy = np.where(step_table[:, None], energy1, energy0)
+    phi = np.tile(np.linspace(0, 270, 4), (n_records, 1))
+    phi += np.arange(n_records)[:, None] % 3
+    dist = np.random.rand(n_records, 4, 3, 5)
+
+    prefix = "mms1_dis"
+
+    return _write_cdf(os.path.join(
+        data_path, "mms1/fpi/brst/l2/dis-dist/2019/09/14",
+        f"mms1_fpi_brst_l2_dis-dist_2019091408{start:02d}00_v3.4.0.cdf"),
+        [("Epoch", _CDF_TIME_TT2000, epochs, {"UNITS": "ns"}),
+         (f"{prefix}_phi_brst", _CDF_DOUBLE, phi, {"DEPEND_0": "Epoch"}),
+         (f"{prefix}_theta_brst", _CDF_DOUBLE, np.linspace(0, 180, 3), {}),
+         (f"{prefix}_energy_brst", _CDF_DOUBLE, energy,
+          {"DEPEND_0": "Epoch"}),
+         (f"{prefix}_energy0_brst", _CDF_DOUBLE, energy0, {}),
+         (f"{prefix}_energy1_brst", _CDF_DOUBLE, energy1, {}),
+         (f"{prefix}_energy_delta_brst", _CDF_DOUBLE, energy / 10,
+          {"DEPEND_0": "Epoch"}),
+         (f"{prefix}_steptable_parity_brst", _CDF_UINT1, step_table,
+          {"DEPEND_0": "Epoch"}),
+         (f"{prefix}_dist_brst", _CDF_DOUBLE, dist,
+          {"DEPEND_0": "Epoch", "DEPEND_1": f"{prefix}_phi_brst",
+           "DEPEND_2": f"{prefix}_theta_brst",
+           "DEPEND_3": f"{prefix}_energy_brst", "UNITS": "s^3/cm^6"})])
+
+
+def _write_feeps(data_path, start, n_records: int = 200):
+    r"""FEEPS ion burst file starting at 08:start with the intensity of the
+    active eyes sampled at 3.3 Hz."""
+
+    epochs = _epochs(start, n_records, 1 / .3)
+    prefix = "mms1_epd_feeps_brst_l2_ion"
+
+    variables = [("epoch", _CDF_TIME_TT2000, epochs, {"UNITS": "ns"}),
+                 (f"{prefix}_spinsectnum", _CDF_DOUBLE,
+                  np.arange(n_records) % 64, {"DEPEND_0": "epoch"}),
+                 (f"{prefix}_pitch_angle", _CDF_DOUBLE,
+                  180 * np.random.rand(n_records, 6), {"DEPEND_0": "epoch"})]
+
+    for eye in ["top", "bottom"]:
+        for sensor in [6, 7, 8]:
+            energy = f"{prefix}_{eye}_energy_centroid_sensorid_{sensor:d}"
+            variables.append((energy, _CDF_DOUBLE, np.logspace(1, 3, 16),
+                              {"LABLAXIS": "Diffential energy channels"}))
+            variables.append((
+                f"{prefix}_{eye}_intensity_sensorid_{sensor:d}",
+                _CDF_DOUBLE, np.random.rand(n_records, 16),
+                {"DEPEND_0": "epoch", "DEPEND_1": energy}))
+
+    return _write_cdf(os.path.join(
+        data_path, "mms1/feeps/brst/l2/ion/2019/09/14",
+        f"mms1_feeps_brst_l2_ion_2019091408{start:02d}00_v7.1.1.cdf"),
+        variables)
+
+
+def _write_eis(data_path, start, n_records: int = 200):
+    r"""EIS ExTOF burst file starting at 08:start with the proton flux of
+    the six telescopes sampled at 2.5 Hz."""
+
+    epochs = _epochs(start, n_records, 2.5)
+    prefix = "mms1_epd_eis_brst_l2_extof"
+    energy = np.logspace(1.5, 3, 7)
+
+    variables = [("epoch", _CDF_TIME_TT2000, epochs, {"UNITS": "ns"}),
+                 (f"{prefix}_spin", _CDF_DOUBLE,
+                  np.arange(n_records) // 32, {"DEPEND_0": "epoch"}),
+                 (f"{prefix}_sector", _CDF_DOUBLE,
+                  np.arange(n_records) % 32, {"DEPEND_0": "epoch"}),
+                 (f"{prefix}_proton_t0_energy_dminus", _CDF_DOUBLE,
+                  energy / 10, {}),
+                 (f"{prefix}_proton_t0_energy_dplus", _CDF_DOUBLE,
+                  energy / 8, {})]
+
+    for scope in range(6):
+        variables += [
+            (f"{prefix}_proton_t{scope:d}_energy", _CDF_DOUBLE, energy,
+             {"LABLAXIS": "Energy"}),
+            (f"{prefix}_proton_P3_flux_t{scope:d}", _CDF_DOUBLE,
+             np.random.rand(n_records, 7),
+             {"DEPEND_0": "epoch",
+              "DEPEND_1": f"{prefix}_proton_t{scope:d}_energy"}),
+            (f"{prefix}_look_t{scope:d}", _CDF_DOUBLE,
+             np.random.randn(n_records, 3), {"DEPEND_0": "epoch"})]
+
+    return _write_cdf(os.path.join(
+        data_path, "mms1/epd-eis/brst/l2/extof/2019/09/14",
+        f"mms1_epd-eis_brst_l2_extof_2019091408{start:02d}00_v3.1.0.cdf"),
+        variables)
+
+
+class TestFileCatalog(unittest.TestCase):
+    def setUp(self):
+        """file catalog test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+        self.tint = ["2019-09-14T08:01:00.000", "2019-09-14T08:05:00.000"]
+
+        for start in ["075443", "080000", "081000"]:
+            for version in ["5.206.0", "5.207.0"]:
+                _touch(self.data_path,
+                       f"mms1/fgm/brst/l2/2019/09/14/mms1_fgm_brst_l2_"
+                       f"20190914{start}_v{version}.cdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+
+    def test_latest_version(self):
+        """catalog returns the latest version of the files in tint"""
+        mms.build_file_catalog(self.data_path, verbose=False)
+        files = mms.list_files(self.tint, 1, self.var, self.data_path)
+
+        self.assertEqual([os.path.basename(file) for file in files],
+                         ["mms1_fgm_brst_l2_20190914080000_v5.207.0.cdf"])
+
+    def test_refresh(self):
+        """catalog picks up files added after it was built"""
+        mms.build_file_catalog(self.data_path, verbose=False)
+        new_file = _touch(self.data_path,
+                          "mms1/fgm/brst/l2/2019/09/14/mms1_fgm_brst_l2_"
+                          "20190914080000_v5.208.0.cdf")
+        os.utime(os.path.dirname(new_file),
+                 (0, os.stat(os.path.dirname(new_file)).st_mtime + 1))
+
+        files = mms.list_files(self.tint, 1, self.var, self.data_path)
+
+        self.assertEqual(files, [new_file])
+
+
+class TestGetDataMany(unittest.TestCase):
+    def setUp(self):
+        """batch loader test setup with FGM files."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:02:10.000"]
+
+        for start in range(3):
+            _write_fgm(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_data_many(self):
+        """variables loaded together match variables loaded one by one"""
+        var_strs = ["B_gse_fgm_brst_l2", "B_gsm_fgm_brst_l2"]
+        out = mms.get_data_many(var_strs, self.tint, 1, verbose=False,
+                                data_path=self.data_path)
+
+        for var_str in var_strs:
+            ref = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path)
+
+            self.assertTrue(out[var_str].identical(ref))
+
+
+class TestParallelLoading(unittest.TestCase):
+    def setUp(self):
+        """parallel loading test setup with FGM and FPI files."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:02:10.000"]
+
+        for start in range(3):
+            _write_fgm(self.data_path, start)
+            _write_fpi_dist(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_data(self):
+        """files read by a pool give the same result as a serial read"""
+        for var_str, executor in [("B_gse_fgm_brst_l2", "thread"),
+                                  ("PDi_fpi_brst_l2", "process")]:
+            ref = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path, n_workers=1)
+            out = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path, n_workers=3,
+                               executor=executor)
+
+            xr.testing.assert_identical(out, ref)
+
+    def test_db_get_ts(self):
+        """db_get_ts with a thread pool matches the serial read"""
+        args = ("mms1_fgm_brst_l2", "mms1_fgm_b_gse_brst_l2", self.tint)
+
+        ref = mms.db_get_ts(*args, verbose=False, data_path=self.data_path,
+                            n_workers=1)
+        out = mms.db_get_ts(*args, verbose=False, data_path=self.data_path,
+                            n_workers=3, executor="thread")
+
+        xr.testing.assert_identical(out, ref)
+
+
+class TestRecordRange(unittest.TestCase):
+    def setUp(self):
+        """record range test setup with an FGM and an FPI file."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:00:40.000"]
+
+        self.fgm_file = _write_fgm(self.data_path, 0)
+        self.fpi_file = _write_fpi_dist(self.data_path, 0)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def _full_read(self, file_path, var_name):
+        r"""Whole variable and mask of the records in tint."""
+        file = cdfread.CDF(file_path)
+        t_start, t_stop = [cdfepoch.compute_tt2000(
+            [2019, 9, 14, 8, 0, second, 0, 0, 0]) for second in [30, 40]]
+        epochs = file.varget("Epoch")
+        data = file.varget(var_name)
+        file.close()
+
+        return data, (epochs >= t_start) & (epochs <= t_stop)
+
+    def test_get_ts(self):
+        """records read in tint match the whole variable clipped to tint"""
+        out = mms.get_ts(self.fgm_file, "mms1_fgm_b_gse_brst_l2", self.tint)
+        data, mask = self._full_read(self.fgm_file, "mms1_fgm_b_gse_brst_l2")
+
+        self.assertEqual(len(out), 161)
+        np.testing.assert_array_equal(out.data, data[mask, :3])
+
+        out = mms.get_ts(self.fgm_file, "mms1_fgm_b_gse_brst_l2",
+                         ["2019-09-14T09:00:00.000",
+                          "2019-09-14T09:00:10.000"])
+
+        self.assertEqual(out.shape, (0, 3))
+
+    def test_get_dist(self):
+        """record varying depends are read in tint with the data"""
+        out = mms.get_dist(self.fpi_file, "mms1_dis_dist_brst", self.tint)
+
+        data, mask = self._full_read(self.fpi_file, "mms1_dis_dist_brst")
+        np.testing.assert_array_equal(out.data.data,
+                                      np.transpose(data[mask], [0, 3, 1, 2]))
+
+        for name, value in [("phi", out.phi.data),
+                            ("energy", out.energy.data),
+                            ("steptable_parity", out.attrs["esteptable"]),
+                            ("energy_delta",
+                             out.attrs["delta_energy_plus"])]:
+            data, mask = self._full_read(self.fpi_file,
+                                         f"mms1_dis_{name}_brst")
+            np.testing.assert_array_equal(value, data[mask])
+
+
+class TestLazyLoading(unittest.TestCase):
+    def setUp(self):
+        """lazy loading test setup with FGM and FPI files."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:02:10.000"]
+
+        for start in range(3):
+            _write_fgm(self.data_path, start)
+            _write_fpi_dist(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_data(self):
+        """lazy time series and distributions compute to the eager ones"""
+        for var_str in ["B_gse_fgm_brst_l2", "PDi_fpi_brst_l2"]:
+            ref = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path)
+            out = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path, lazy=True)
+
+            if isinstance(out, xr.Dataset):
+                data = out.data.data
+            else:
+                data = out.data
+
+            self.assertIsInstance(data, da.Array)
+            self.assertEqual(data.numblocks[0], 3)
+            xr.testing.assert_identical(out.compute(), ref)
+
+
+class TestIterData(unittest.TestCase):
+    def setUp(self):
+        """streaming iterator test setup with FGM and FPI files."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:03:40.000"]
+
+        for start in range(4):
+            _write_fgm(self.data_path, start)
+            _write_fpi_dist(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_time_series(self):
+        """blocks of a time series concatenate to the whole time series"""
+        ref = mms.get_data("B_gse_fgm_brst_l2", self.tint, 1, verbose=False,
+                           data_path=self.data_path)
+        blocks = list(mms.iter_data("B_gse_fgm_brst_l2", self.tint, 1,
+                                    chunk="1min", verbose=False,
+                                    data_path=self.data_path))
+
+        self.assertEqual(len(blocks), 4)
+        xr.testing.assert_identical(pyrf.concat_many(blocks), ref)
+
+    def test_skymap(self):
+        """blocks of a burst skymap spanning several files match the records
+        of the whole skymap"""
+        ref = mms.get_data("PDi_fpi_brst_l2", self.tint, 1, verbose=False,
+                           data_path=self.data_path)
+
+        for chunk, overlap in [("1min", None), ("3min", "10s"), (500, 10)]:
+            blocks = mms.iter_data("PDi_fpi_brst_l2", self.tint, 1,
+                                   chunk=chunk, overlap=overlap,
+                                   verbose=False, data_path=self.data_path)
+            times = []
+
+            for block in blocks:
+                idx_l, idx_r = np.searchsorted(ref.time.data,
+                                               block.time.data[[0, -1]])
+                idx = slice(idx_l, idx_r + 1)
+
+                np.testing.assert_array_equal(block.data.data,
+                                              ref.data.data[idx])
+                np.testing.assert_array_equal(block.energy.data,
+                                              ref.energy.data[idx])
+
+                for k in ["esteptable", "delta_energy_plus",
+                          "delta_energy_minus"]:
+                    np.testing.assert_array_equal(block.attrs[k],
+                                                  ref.attrs[k][idx])
+
+                times.append(block.time.data)
+
+            np.testing.assert_array_equal(np.unique(np.hstack(times)),
+                                          ref.time.data)
+
+
+class TestGetData4sc(unittest.TestCase):
+    def setUp(self):
+        """four spacecraft loader test setup with FGM files."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:01:30.000"]
+
+        for mms_id in range(1, 5):
+            for start in range(2):
+                _write_fgm(self.data_path, start, mms_id=mms_id,
+                           f_s=8. * mms_id)
+
+        self.refs = [mms.get_data("B_gse_fgm_brst_l2", self.tint, mms_id,
+                                  verbose=False, data_path=self.data_path)
+                     for mms_id in range(1, 5)]
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_data_4sc(self):
+        """concurrent loading matches loading the spacecraft one by one"""
+        out = mms.get_data_4sc("B_gse_fgm_brst_l2", self.tint, verbose=False,
+                               data_path=self.data_path)
+
+        for inp, ref in zip(out, self.refs):
+            xr.testing.assert_identical(inp, ref)
+
+    def test_align(self):
+        """aligned time series are resampled to the reference spacecraft"""
+        out = mms.get_data_4sc("B_gse_fgm_brst_l2", self.tint,
+                               probes=(2, 3, 4), align_to=3, verbose=False,
+                               data_path=self.data_path)
+
+        self.assertEqual(out.dims[:2], ("time", "probe"))
+        self.assertEqual(list(out.probe.data), [2, 3, 4])
+
+        for mms_id in [2, 3, 4]:
+            ref = pyrf.resample(self.refs[mms_id - 1], self.refs[2])
+            np.testing.assert_array_equal(out.sel(probe=mms_id).data,
+                                          ref.data)
+
+
+class TestFeepsAllEyes(unittest.TestCase):
+    def setUp(self):
+        """FEEPS loading test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:01:30.000"]
+
+        for start in range(2):
+            _write_feeps(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_feeps_alleyes(self):
+        """single pass over the files matches loading the eyes one by one"""
+        out = mms.get_feeps_alleyes("fluxi_brst_l2", self.tint, 1,
+                                    verbose=False, data_path=self.data_path)
+
+        prefix = "mms1_epd_feeps_brst_l2_ion"
+        ref = {}
+
+        for k in ["spinsectnum", "pitch_angle"]:
+            ref[k] = mms.db_get_ts("mms1_feeps_brst_l2_ion",
+                                   f"{prefix}_{k}", self.tint, verbose=False,
+                                   data_path=self.data_path)
+
+        for eye in ["top", "bottom"]:
+            for sensor in [6, 7, 8]:
+                ref[f"{eye}-{sensor:d}"] = mms.db_get_ts(
+                    "mms1_feeps_brst_l2_ion",
+                    f"{prefix}_{eye}_intensity_sensorid_{sensor:d}",
+                    self.tint, verbose=False, data_path=self.data_path)
+                ref[f"{eye}-{sensor:d}"].attrs.update(
+                    {"tmmode": "brst", "lev": "l2", "mms_id": 1,
+                     "dtype": "ion", "species": "ions"})
+                ref[f"{eye}-{sensor:d}"] = ref[f"{eye}-{sensor:d}"].rename(
+                    {"Differential_energy_channels": "energy"})
+
+        ref = xr.Dataset(ref)
+        ref.attrs = {"tmmode": "brst", "lev": "l2", "mmsId": 1,
+                     "dtype": "ion", "specie": "ion"}
+
+        xr.testing.assert_identical(out, ref)
+
+
+class TestEisAllTelescopes(unittest.TestCase):
+    def setUp(self):
+        """EIS loading test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:01:30.000"]
+
+        for start in range(2):
+            _write_eis(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_eis_allt(self):
+        """single pass over the files matches loading the telescopes one by
+        one"""
+        out = mms.get_eis_allt("Flux_extof_proton_brst_l2", self.tint, 1,
+                               verbose=False, data_path=self.data_path)
+
+        dset_name = "mms1_epd-eis_brst_l2_extof"
+        prefix = "mms1_epd_eis_brst_l2_extof"
+        kwargs = {"verbose": False, "data_path": self.data_path}
+        ref = {k: mms.db_get_ts(dset_name, f"{prefix}_{k}", self.tint,
+                                **kwargs) for k in ["spin", "sector"]}
+
+        for scope in range(6):
+            ref[f"t{scope:d}"] = mms.db_get_ts(
+                dset_name, f"{prefix}_proton_P3_flux_t{scope:d}", self.tint,
+                **kwargs).rename({"Energy": "energy"})
+            ref[f"look_t{scope:d}"] = mms.db_get_ts(
+                dset_name, f"{prefix}_look_t{scope:d}", self.tint, **kwargs)
+
+        for k in ["dplus", "dminus"]:
+            energy_delta = mms.db_get_variable(
+                dset_name, f"{prefix}_proton_t0_energy_{k}", self.tint,
+                **kwargs)
+            energy_delta = energy_delta.assign_coords(
+                x=ref["t0"].energy.data)
+            ref[f"energy_{k}"] = energy_delta.rename({"x": "energy"})
+
+        ref = xr.Dataset(ref, attrs={
+            "mms_id": 1, "inst": "epd-eis", "dtype": "extof",
+            "tmmode": "brst", "lev": "l2", "specie": "proton",
+            "data_path": self.data_path, "version": 3})
+
+        xr.testing.assert_identical(out, ref)
+
+
+class TestPrefetcher(unittest.TestCase):
+    def setUp(self):
+        """prefetcher test setup with FGM files."""
+        self.data_path = tempfile.mkdtemp()
+        self.var_strs = ["B_gse_fgm_brst_l2", "B_gsm_fgm_brst_l2"]
+        self.events = [([f"2019-09-14T08:{start:02d}:10.000",
+                         f"2019-09-14T08:{start:02d}:50.000"], 1,
+                        self.var_strs) for start in range(4)]
+
+        for start in range(4):
+            _write_fgm(self.data_path, start)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def test_get_data(self):
+        """prefetched variables match those loaded by get_data"""
+        refs = [mms.get_data_many(self.var_strs, tint, 1, verbose=False,
+                                  data_path=self.data_path)
+                for tint, _, _ in self.events]
+
+        get_data_module = sys.modules["pyrfu.mms.get_data"]
+
+        with mms.Prefetcher(self.events, depth=2,
+                            data_path=self.data_path) as prefetcher, \
+                mock.patch.object(get_data_module, "list_files",
+                                  side_effect=AssertionError):
+            for (tint, _, _), ref in zip(self.events, refs):
+                for var_str in self.var_strs:
+                    out = mms.get_data(var_str, tint, 1, verbose=False,
+                                       data_path=self.data_path)
+                    xr.testing.assert_identical(out, ref[var_str])
+
+                if tint == self.events[0][0]:
+                    self.assertEqual(sorted(prefetcher._futures), [0, 1, 2])
+
+    def test_max_memory(self):
+        """events being read count in the memory budget"""
+        tints = [[f"2019-09-14T08:00:{i:02d}.000",
+                  f"2019-09-14T08:00:{i + 1:02d}.000"] for i in range(5)]
+        released = [threading.Event() for _ in tints]
+        released[0].set()
+
+        def _read(var_strs, tint, *args):
+            released[tints.index(tint)].wait()
+            return {var_str: np.zeros(1000) for var_str in var_strs}
+
+        events = [(tint, 1, ["B_gse_fgm_brst_l2"]) for tint in tints]
+        prefetcher_module = sys.modules["pyrfu.mms.prefetcher"]
+
+        with mock.patch.object(prefetcher_module, "get_data_many", _read), \
+                mms.Prefetcher(events, depth=2, max_memory=12000) as pref:
+            try:
+                pref.get("B_gse_fgm_brst_l2", tints[0], 1)
+
+                released[1].set()
+                pref.get("B_gse_fgm_brst_l2", tints[1], 1)
+
+                # Events 1 and 2 use 16000 bytes
+                self.assertEqual(sorted(pref._futures), [1, 2])
+            finally:
+                for event in released:
+                    event.set()
+
+    def test_data_path(self):
+        """data of another data path are not served by the prefetcher"""
+        tint = self.events[0][0]
+
+        with mms.Prefetcher(self.events, data_path=self.data_path) as pref:
+            self.assertIsNone(pref.get(self.var_strs[0], tint, 1,
+                                       tempfile.gettempdir()))
+            self.assertIsNotNone(pref.get(self.var_strs[0], tint, 1,
+                                          f"{self.data_path}{os.sep}"))
+
+    def test_error(self):
+        """errors raised while reading an event are not hidden"""
+        events = [(["2019-09-15T08:00:10.000", "2019-09-15T08:00:50.000"],
+                   1, self.var_strs)]
+
+        with mms.Prefetcher(events, data_path=self.data_path) as pref:
+            with self.assertRaises(AssertionError):
+                pref.get(self.var_strs[0], events[0][0], 1, self.data_path)
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        """metadata cache test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.file_path = _touch(self.data_path, "mms1_fgm_brst_l2.cdf")
+        self.calls = []
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        shutil.rmtree(self.data_path)
+
+    def _read(self):
+        self.calls.append(1)
+        return {"LABLAXIS": "comp"}
+
+    def test_memoize(self):
+        """metadata are read once per file and returned as copies"""
+        out = CachedCDF(self.file_path).memoize("atts", self._read)
+        out["LABLAXIS"] = "rcomp"
+        out = CachedCDF(self.file_path).memoize("atts", self._read)
+
+        self.assertEqual(out, {"LABLAXIS": "comp"})
+        self.assertEqual(len(self.calls), 1)
+
+    def test_invalidate(self):
+        """metadata are read again when the file changes"""
+        CachedCDF(self.file_path).memoize("atts", self._read)
+        os.utime(self.file_path, (0, os.stat(self.file_path).st_mtime + 1))
+        CachedCDF(self.file_path).memoize("atts", self._read)
+
+        self.assertEqual(len(self.calls), 2)
+
+
+class TestCDFCache(unittest.TestCase):
+    def setUp(self):
+        """decoded variables cache test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.config = dict(CONFIG)
+        CONFIG["cache_dir"] = os.path.join(self.data_path, "cache")
+
+        self.tint = ["2019-09-14T08:00:30.000", "2019-09-14T08:01:10.000"]
+        self.files = [_write_fgm(self.data_path, start)
+                      for start in range(3)]
+        _write_fpi_dist(self.data_path, 0)
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        CONFIG.update(self.config)
+        shutil.rmtree(self.data_path)
+
+    def _entries(self):
+        return sorted(os.listdir(CONFIG["cache_dir"]))
+
+    def test_read_through(self):
+        """variables served from the cache match those read from the files"""
+        for var_str in ["B_gse_fgm_brst_l2", "PDi_fpi_brst_l2"]:
+            cache_dir, CONFIG["cache_dir"] = [CONFIG["cache_dir"], None]
+            ref = mms.get_data(var_str, self.tint, 1, verbose=False,
+                               data_path=self.data_path)
+            CONFIG["cache_dir"] = cache_dir
+
+            for _ in range(2):
+                out = mms.get_data(var_str, self.tint, 1, verbose=False,
+                                   data_path=self.data_path)
+
+                xr.testing.assert_identical(out, ref)
+
+    def test_evict(self):
+        """the cache is walked only when its estimated size is over budget"""
+        args = ("mms1_fgm_b_gse_brst_l2", self.tint)
+
+        with mock.patch.object(cdf_cache, "_dir_size",
+                               wraps=cdf_cache._dir_size) as dir_size:
+            mms.get_ts(self.files[0], *args)
+            entry = self._entries()
+            CONFIG["cache_size"] = 2.5 * dir_size(os.path.join(
+                CONFIG["cache_dir"], entry[0]))
+            dir_size.reset_mock()
+
+            # Under budget
+            mms.get_ts(self.files[1], *args)
+            self.assertEqual(dir_size.call_count, 0)
+
+            # Over budget, the least recently used entry is evicted
+            mms.get_ts(self.files[2], *args)
+            self.assertEqual(dir_size.call_count, 3)
+
+        self.assertEqual(len(self._entries()), 2)
+        self.assertNotIn(entry[0], self._entries())
+
+
+class TestAncillary(unittest.TestCase):
+    def setUp(self):
+        """ancillary test setup with two versions of a DEFEPH file."""
+        self.data_path = tempfile.mkdtemp()
+        self.config = dict(CONFIG)
+        CONFIG["cache_dir"] = os.path.join(self.data_path, "cache")
+
+        dir_path = os.path.join(self.data_path, "ancillary", "mms1",
+                                "defeph")
+        os.makedirs(dir_path)
+
+        for version in [0, 1]:
+            lines = ["header"] * 14
+            lines += [f"2019-257/{h_:02d}:{m_:02d}:30.250 0 {version:d} 2 3 "
+                      f"{h_:d} {m_:d} 6" for h_ in range(24)
+                      for m_ in range(0, 60, 10)]
+            lines.append("DATA_STOP")
+
+            with open(os.path.join(dir_path, "MMS1_DEFEPH_2019257_2019258."
+                                             f"V{version:02d}"), "w") as fs:
+                fs.write("\n".join(lines))
+
+        self.tint = ["2019-09-14T07:54:00.000", "2019-09-14T08:11:00.000"]
+
+    def tearDown(self):
+        mms.clear_cdf_cache()
+        CONFIG.update(self.config)
+        shutil.rmtree(self.data_path)
+
+    def test_load(self):
+        """latest version in the interval, served from the binary cache"""
+        for _ in range(2):
+            out = mms.load_ancillary(["defeph"], self.tint, 1,
+                                     verbose=False,
+                                     data_path=self.data_path)["defeph"]
+
+            self.assertEqual(list(out.time.data.astype(str)),
+                             ["2019-09-14T08:00:30.250000000",
+                              "2019-09-14T08:10:30.250000000"])
+            self.assertTrue((out.x.data == 1).all())
+            self.assertEqual(list(out.vy.data), [0, 10])
+
+        self.assertTrue(os.path.isdir(os.path.join(
+            CONFIG["cache_dir"], "ancillary_MMS1_DEFEPH_2019257_2019258.V01")))
+
+
+class TestMirrorCache(unittest.TestCase):
+    def setUp(self):
+        """tiered storage test setup."""
+        self.mirror_path = tempfile.mkdtemp()
+        self.data_path = tempfile.mkdtemp()
+        self.var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+
+        for start in ["080000", "090000", "100000"]:
+            _touch(self.mirror_path,
+                   f"mms1/fgm/brst/l2/2019/09/14/mms1_fgm_brst_l2_"
+                   f"20190914{start}_v5.207.0.cdf")
+
+        self.config = dict(CONFIG)
+        CONFIG["mirror_data_dir"] = self.mirror_path
+        CONFIG["mirror_cache_size"] = 3
+        mirror_cache._MIN_AGE = 0.
+
+    def tearDown(self):
+        CONFIG.update(self.config)
+        mirror_cache._MIN_AGE = 600.
+        shutil.rmtree(self.mirror_path)
+        shutil.rmtree(self.data_path)
+
+    def test_read_through(self):
+        """files are copied from the mirror on first access"""
+        files = mms.list_files(["2019-09-14T08:10:00.000",
+                                "2019-09-14T08:20:00.000"], 1, self.var,
+                               self.data_path)
+
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].startswith(self.data_path))
+
+    def test_evict(self):
+        """least recently used copies are evicted over the size budget"""
+        tint = ["2019-09-14T08:10:00.000", "2019-09-14T08:20:00.000"]
+        old_file = mms.list_files(tint, 1, self.var, self.data_path)[0]
+
+        tint = ["2019-09-14T09:10:00.000", "2019-09-14T09:20:00.000"]
+        mms.list_files(tint, 1, self.var, self.data_path)
+
+        self.assertFalse(os.path.exists(old_file))
+
+    def test_evict_in_use(self):
+        """files used by another process before their lock are kept"""
+        tint = ["2019-09-14T08:10:00.000", "2019-09-14T08:20:00.000"]
+        old_file = mms.list_files(tint, 1, self.var, self.data_path)[0]
+
+        index_path = os.path.join(self.data_path, mirror_cache.INDEX_NAME)
+        lock = mirror_cache._lock
+
+        def _access(path, age):
+            with contextlib.closing(sqlite3.connect(index_path)) as conn:
+                with conn:
+                    conn.execute("UPDATE files SET last_access = ? "
+                                 "WHERE path = ?", (time.time() - age, path))
+
+        _access(old_file, 120.)
+
+        # The file is read by another process after the candidates of the
+        # eviction are selected and before the file is locked
+        def _lock_after_access(path):
+            if path == old_file:
+                _access(path, 0.)
+
+            return lock(path)
+
+        mirror_cache._MIN_AGE = 60.
+
+        with mock.patch.object(mirror_cache, "_lock", _lock_after_access):
+            tint = ["2019-09-14T09:10:00.000", "2019-09-14T09:20:00.000"]
+            mms.list_files(tint, 1, self.var, self.data_path)
+
+        self.assertTrue(os.path.exists(old_file))
+
+    def test_keep_local(self):
+        """files which were in data_path before the mirror are not evicted"""
+        local_file = _touch(self.data_path,
+                            "mms1/fgm/brst/l2/2019/09/14/mms1_fgm_brst_l2_"
+                            "20190914080000_v5.207.0.cdf")
+
+        for hour in ["08", "09", "10"]:
+            tint = [f"2019-09-14T{hour}:10:00.000",
+                    f"2019-09-14T{hour}:20:00.000"]
+            files = mms.list_files(tint, 1, self.var, self.data_path)
+
+        self.assertTrue(os.path.exists(local_file))
+        self.assertEqual(len(files), 1)
+        self.assertTrue(os.path.exists(files[0]))
+
+
+class TestCopyFiles(unittest.TestCase):
+    def setUp(self):
+        """bulk copy test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.target_dir = tempfile.mkdtemp()
+        self.var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+        self.tint = ["2019-09-14T08:01:00.000", "2019-09-14T09:30:00.000"]
+
+        for start in ["080000", "090000"]:
+            _touch(self.data_path,
+                   f"mms1/fgm/brst/l2/2019/09/14/mms1_fgm_brst_l2_"
+                   f"20190914{start}_v5.207.0.cdf")
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+        shutil.rmtree(self.target_dir)
+
+    def test_dry_run(self):
+        """dry run plans the copies without copying"""
+        plan = mms.copy_files(self.var, self.tint, 1, self.target_dir,
+                              self.data_path, dry_run=True, verbose=False)
+
+        self.assertEqual((len(plan["files"]), plan["size"]), (2, 6))
+        self.assertEqual(os.listdir(self.target_dir), [])
+
+    def test_skip(self):
+        """files already copied are skipped"""
+        mms.copy_files(self.var, self.tint, 1, self.target_dir,
+                       self.data_path, verbose=False)
+        plan = mms.copy_files(self.var, self.tint, 1, self.target_dir,
+                              self.data_path, link=True, verbose=False)
+
+        self.assertEqual(plan["files"], [])
+        self.assertTrue(os.path.isfile(os.path.join(
+            self.target_dir, "mms1/fgm/brst/l2/2019/09/14/"
+                             "mms1_fgm_brst_l2_20190914090000_v5.207.0.cdf")))
+
+    def test_compare(self):
+        """invalid compare is rejected even if no file is in the target"""
+        with self.assertRaises(ValueError):
+            mms.copy_files(self.var, self.tint, 1, self.target_dir,
+                           self.data_path, compare="sha256", verbose=False)
+
+        self.assertEqual(os.listdir(self.target_dir), [])
+
+
+class _SDCHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    files = {}
+    ranges = []
+    clients = set()
+
+    def do_GET(self):
+        self.clients.add(self.client_address)
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+
+        if url.path.endswith("file_info/science"):
+            files = [{"file_name": k, "file_size": len(v), "timetag": ""}
+                     for k, v in self.files.items()]
+            status, content = [200, json.dumps({"files": files}).encode()]
+        else:
+            content = self.files[query["file"][0]]
+            status = 200
+
+            if "Range" in self.headers:
+                self.ranges.append(self.headers["Range"])
+                content = content[int(self.headers["Range"][6:-1]):]
+                status = 206
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self):
+        """downloader test setup with a local stand-in of the SDC."""
+        self.data_path = tempfile.mkdtemp()
+        self.var = {"inst": "fgm", "tmmode": "brst", "lev": "l2", "dtype": ""}
+        self.tint = ["2019-09-14T08:01:00.000", "2019-09-14T08:05:00.000"]
+
+        _SDCHandler.files = {
+            f"mms1_fgm_brst_l2_20190914{start}_v5.207.0.cdf": os.urandom(
+                100000) for start in ["080000", "080300"]}
+        _SDCHandler.ranges = []
+        _SDCHandler.clients = set()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _SDCHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+        self.config = dict(CONFIG)
+        CONFIG["sdc_url"] = f"http://127.0.0.1:{self.server.server_port:d}/"
+        CONFIG["no_download"] = False
+
+    def tearDown(self):
+        CONFIG.update(self.config)
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.data_path)
+
+    def test_download(self):
+        """missing files are downloaded in the local data layout"""
+        files = mms.list_files(self.tint, 1, self.var, self.data_path)
+
+        self.assertEqual([os.path.relpath(file, self.data_path)
+                          for file in files],
+                         [os.path.join("mms1/fgm/brst/l2/2019/09/14", k)
+                          for k in sorted(_SDCHandler.files)])
+
+        for file in files:
+            with open(file, "rb") as fs:
+                self.assertEqual(fs.read(),
+                                 _SDCHandler.files[os.path.basename(file)])
+
+        self.assertEqual(mms.download_data(self.tint, 1, self.var,
+                                           self.data_path), [])
+
+    def test_connections(self):
+        """the connections of the download workers are kept between
+        calls"""
+        files = mms.download_data(self.tint, 1, self.var, self.data_path,
+                                  n_workers=1, verbose=False)
+        os.remove(files[0])
+
+        mms.download_data(self.tint, 1, self.var, self.data_path,
+                          n_workers=1, verbose=False)
+
+        # One connection for the queries and one for the downloads
+        self.assertEqual(len(_SDCHandler.clients), 2)
+
+    def test_resume(self):
+        """interrupted downloads are resumed"""
+        file_name = sorted(_SDCHandler.files)[0]
+        local_path = os.path.join(self.data_path,
+                                  "mms1/fgm/brst/l2/2019/09/14", file_name)
+        os.makedirs(os.path.dirname(local_path))
+
+        with open(f"{local_path}.part", "wb") as file:
+            file.write(_SDCHandler.files[file_name][:1234])
+
+        mms.download_data(self.tint, 1, self.var, self.data_path,
+                          verbose=False)
+
+        self.assertEqual(_SDCHandler.ranges, ["bytes=1234-"])
+
+        with open(local_path, "rb") as file:
+            self.assertEqual(file.read(), _SDCHandler.files[file_name])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,12 +12,23 @@
 # copies of the Software, and to permit persons to whom the Software is
 # furnished to do so.
 
-from pyrfu import mms, pyrf
-
+import os
+import bisect
+import shutil
+import tempfile
 import unittest
+import importlib
+import threading
+import urllib.parse
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pyrfu import mms, pyrf
 
 import numpy as np
 
+from scipy import interpolate
+
 
 class TestPyrf(unittest.TestCase):
     def setUp(self):
@@ -52,5 +63,389 @@ class TestPyrf(unittest.TestCase):
         self.assertTrue((pyrf.resample(e_xyz, self.b_xyz).time.data == self.b_xyz.time.data).all())
 
 
+def _synthetic_ts(n_samples: int = 100, fs: float = 128.):
+    time = np.datetime64("2019-09-14T08:00:00.000", "ns")
+    time += (np.arange(n_samples) * 1e9 / fs).astype("timedelta64[ns]")
+
+    return pyrf.ts_vec_xyz(time, np.random.randn(n_samples, 3),
+                           attrs={"UNITS": "nT"})
+
+
+class TestConcat(unittest.TestCase):
+    def test_concat_many(self):
+        """concatenation of many time series matches repeated ts_append"""
+        b_xyz = _synthetic_ts()
+        parts = [b_xyz[:10], b_xyz[10:57], b_xyz[57:]]
+
+        out = pyrf.concat_many(parts)
+        ref = pyrf.ts_append(pyrf.ts_append(parts[0], parts[1]), parts[2])
+
+        self.assertTrue(out.equals(ref))
+
+    def test_dist_concat_many(self):
+        """concatenation of many skymaps matches repeated dist_append"""
+        time = _synthetic_ts(30).time.data
+        vdf = pyrf.ts_skymap(time, np.random.rand(30, 32, 16, 8),
+                             np.random.rand(30, 32), np.random.rand(30, 16),
+                             np.arange(8.))
+        vdf.attrs["tmmode"] = "fast"
+        parts = [vdf.isel(time=slice(0, 12)), vdf.isel(time=slice(12, 30))]
+
+        out = pyrf.dist_concat_many(parts)
+
+        self.assertTrue(out.equals(pyrf.dist_append(*parts)))
+
+
+class TestResample(unittest.TestCase):
+    def test_average(self):
+        """window averages ignore NaNs and the points outside thresh*std"""
+        b_xyz = _synthetic_ts(1280)
+        b_xyz.data[::10, 1] = np.nan
+        b_xyz.data[5, 0] = 1e3
+
+        ref = b_xyz[::32]
+
+        with self.assertWarns(UserWarning):
+            out = pyrf.resample(b_xyz, ref, f_s=4.)
+            out_thresh = pyrf.resample(b_xyz, ref, f_s=4., thresh=2.)
+
+        # Samples within +/- 1/8 s of the first reference time
+        idx = np.arange(17)
+        window = b_xyz.data[idx, :]
+
+        self.assertTrue(np.isclose(out.data[0, 1],
+                                   np.mean(window[idx % 10 != 0, 1])))
+        self.assertTrue(np.isclose(out_thresh.data[0, 0],
+                                   np.mean(window[idx != 5, 0])))
+
+    def test_resample_many(self):
+        """time series with different samplings are resampled as one by
+        one"""
+        b_xyz, e_xyz = [_synthetic_ts(100), _synthetic_ts(300, 300.)]
+        inps = [b_xyz, e_xyz, pyrf.norm(b_xyz)]
+
+        out = pyrf.ResamplePlan.resample_many(inps, e_xyz)
+
+        for inp, out_ in zip(inps, out):
+            ref = pyrf.ResamplePlan(inp, e_xyz).apply(inp)
+            np.testing.assert_array_equal(out_.data, ref.data)
+
+    def test_lazy_average(self):
+        """window averages of chunked time series match the eager ones"""
+        b_xyz = _synthetic_ts(1280)
+        b_lazy = b_xyz.chunk({"time": 300})
+
+        # Windows bounds on the samples
+        ref = b_xyz[::32]
+
+        with self.assertWarns(UserWarning):
+            plan = pyrf.ResamplePlan(b_xyz, ref, f_s=4.)
+
+        out, out_lazy = plan.apply([b_xyz, b_lazy])
+
+        self.assertIsNotNone(out_lazy.chunks)
+        np.testing.assert_allclose(out_lazy.data.compute(), out.data,
+                                   rtol=0., atol=1e-12)
+
+    def test_plan(self):
+        """a plan applied to several time series matches resample"""
+        b_xyz, e_xyz = [_synthetic_ts(100), _synthetic_ts(300, 300.)]
+        b_mag = pyrf.norm(b_xyz)
+
+        plan = pyrf.ResamplePlan(b_xyz, e_xyz)
+        out = plan.apply([b_xyz, b_mag])
+
+        # Linear interpolation of each component, extrapolated at the end
+        inp_time, ref_time = [b_xyz.time.data.view("i8") * 1e-9,
+                              e_xyz.time.data.view("i8") * 1e-9]
+        ref = [interpolate.interp1d(inp_time, data_, axis=0,
+                                    fill_value="extrapolate")(ref_time)
+               for data_ in [b_xyz.data, b_mag.data]]
+
+        np.testing.assert_allclose(out[0].data, ref[0], atol=1e-12)
+        np.testing.assert_allclose(out[1].data, ref[1], atol=1e-12)
+        np.testing.assert_array_equal(out[0].time.data, e_xyz.time.data)
+
+        with self.assertRaises(ValueError):
+            plan.apply(e_xyz)
+
+
+class TestTimeIndex(unittest.TestCase):
+    def test_clip(self):
+        """time clips are views and the index is computed once"""
+        b_xyz = _synthetic_ts(1000)
+        tint = ["2019-09-14T08:00:01.000", "2019-09-14T08:00:02.000"]
+
+        out = pyrf.time_clip(b_xyz, tint)
+
+        self.assertEqual(len(out), 129)
+        self.assertTrue(np.shares_memory(out.data, b_xyz.data))
+        self.assertIs(pyrf.TimeIndex.of(b_xyz), pyrf.TimeIndex.of(b_xyz))
+
+    def test_nearest(self):
+        """nearest samples and evaluation at arrays of times"""
+        b_xyz = _synthetic_ts(100)
+        times = b_xyz.time.data[[3, 50]] + np.timedelta64(5, "ms")
+
+        index = pyrf.TimeIndex.of(b_xyz)
+
+        self.assertEqual(list(index.nearest(times)), [4, 51])
+        self.assertEqual(list(index.bracket(times)[0]), [3, 50])
+        self.assertTrue((pyrf.t_eval(b_xyz, times).data
+                         == b_xyz.data[[4, 51]]).all())
+
+    def test_unsorted(self):
+        """slightly unsorted times are bisected as they are"""
+        b_xyz = _synthetic_ts(100)
+        times = b_xyz.time.data.copy()
+        times[[40, 41]] = times[[41, 40]]
+        b_xyz = b_xyz.assign_coords(time=times)
+
+        tint = [times[10], times[60]]
+        idx = [bisect.bisect_left(times, tint[0]),
+               bisect.bisect_right(times, tint[1])]
+
+        out = pyrf.time_clip(b_xyz, tint)
+        self.assertTrue(out.equals(b_xyz[idx[0]:idx[1]]))
+
+        # Outside of the swapped samples
+        idx = [bisect.bisect_left(times, t_) for t_ in times[[5, 80]]]
+        np.testing.assert_array_equal(
+            pyrf.t_eval(b_xyz, times[[5, 80]]).data, b_xyz.data[idx])
+
+
+class TestBuffer(unittest.TestCase):
+    def test_time_series_buffer(self):
+        """appending blocks to a buffer matches repeated ts_append"""
+        b_xyz = _synthetic_ts(1000)
+        b_xyz.attrs["quality"] = np.arange(1000)
+        bounds = [0, 10, 300, 301, 750, 1000]
+
+        buffer = pyrf.TimeSeriesBuffer(capacity=16, record_attrs=["quality"])
+        ref = None
+
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            block = b_xyz[start:stop]
+            block.attrs["quality"] = b_xyz.attrs["quality"][start:stop]
+            buffer.append(block)
+            ref = pyrf.ts_append(ref, block)
+
+        out = buffer.view()
+
+        self.assertTrue(out.equals(ref))
+        self.assertTrue((out.attrs["quality"] == np.arange(1000)).all())
+        self.assertEqual(out.attrs["UNITS"], "nT")
+
+    def test_static_attrs(self):
+        """arrays not varying with the records are those of the first
+        block"""
+        b_xyz = _synthetic_ts(1000)
+        b_xyz.attrs["axis"] = np.array([0., 0., 1.])
+
+        buffer = pyrf.TimeSeriesBuffer(max_duration=1., capacity=16)
+
+        # First block with as many records as elements of the array
+        for start, stop in [(0, 3), (3, 500), (500, 1000)]:
+            buffer.append(b_xyz[start:stop])
+
+        out = buffer.view(b_xyz.time.data[[-10, -1]])
+
+        self.assertEqual(len(out), 10)
+        np.testing.assert_array_equal(out.attrs["axis"], [0., 0., 1.])
+
+    def test_max_duration(self):
+        """only the records within max_duration of the last one are kept"""
+        b_xyz = _synthetic_ts(1000)
+        buffer = pyrf.TimeSeriesBuffer(max_duration=1.)
+
+        for start in range(0, 1000, 100):
+            buffer.append(b_xyz[start:start + 100])
+
+        self.assertTrue(buffer.view().equals(b_xyz[-129:]))
+
+    def test_skymap_buffer(self):
+        """appending skymaps to a buffer leaves the blocks unchanged"""
+        time = _synthetic_ts(30).time.data
+        vdf = pyrf.ts_skymap(time, np.random.rand(30, 32, 16, 8), None,
+                             np.random.rand(30, 16), np.arange(8.),
+                             energy0=np.arange(32.),
+                             energy1=np.arange(32.) + .5,
+                             esteptable=np.arange(30) % 2)
+        vdf.attrs["tmmode"] = "brst"
+
+        parts = []
+
+        for idx in [slice(0, 12), slice(12, 30)]:
+            part = vdf.isel(time=idx)
+            part.attrs = {**vdf.attrs,
+                          "esteptable": vdf.attrs["esteptable"][idx]}
+            parts.append(part)
+
+        buffer = pyrf.SkymapBuffer()
+
+        for part in parts:
+            buffer.append(part)
+
+        self.assertTrue(buffer.view().equals(pyrf.dist_append(*parts)))
+        self.assertEqual(len(parts[0].attrs["esteptable"]), 12)
+
+
+class TestFilt(unittest.TestCase):
+    def test_chunked(self):
+        """filtering by chunks matches filtering the whole time series"""
+        e_xyz = _synthetic_ts(20000, 8192.)
+
+        for f_min, f_max in [(0., 100.), (100., 0.), (10., 100.)]:
+            out = pyrf.filt(e_xyz, f_min, f_max, 3)
+            out_chunked = pyrf.filt(e_xyz, f_min, f_max, 3, chunk_size=3000)
+
+            self.assertTrue(np.allclose(out.data, out_chunked.data,
+                                        atol=1e-8 * np.abs(out.data).max()))
+
+    def test_lazy(self):
+        """filtering a dask backed time series matches filtering it in
+        memory, also with an overlap longer than the time series"""
+        e_xyz = _synthetic_ts(20000, 8192.)
+        e_lazy = e_xyz.chunk({"time": 3000})
+
+        for f_min, f_max, order in [(10., 100., 3), (1., 0., -1)]:
+            out = pyrf.filt(e_xyz, f_min, f_max, order)
+            out_lazy = pyrf.filt(e_lazy, f_min, f_max, order)
+
+            self.assertIsNotNone(out_lazy.chunks)
+            self.assertTrue(np.allclose(out.data, out_lazy.data.compute(),
+                                        atol=1e-8 * np.abs(out.data).max()))
+
+
+class TestTT2000(unittest.TestCase):
+    def test_ttns2datetime64(self):
+        """conversion to datetime64 matches cdflib around a leap second"""
+        from cdflib import cdfepoch
+
+        leap = cdfepoch.parse("2016-12-31T23:59:60.500000000")
+        time = leap + np.arange(-3000, 3000) * 1000000
+        ref = cdfepoch.to_datetime(time, to_np=True)
+
+        self.assertTrue((pyrf.ttns2datetime64(time) == ref).all())
+
+    def test_round_trip(self):
+        """datetime64 -> tt2000 -> datetime64 is the identity"""
+        time = _synthetic_ts().time.data
+
+        self.assertTrue((pyrf.ttns2datetime64(pyrf.datetime642ttns(time))
+                         == time).all())
+
+
+class _OMNIHandler(BaseHTTPRequestHandler):
+    requests = []
+    # Last time with data on the server
+    end = None
+
+    def do_GET(self):
+        query = urllib.parse.parse_qs(urllib.parse.urlsplit(self.path).query)
+        self.requests.append(query)
+
+        start, end = [np.datetime64(f"{d_[:4]}-{d_[4:6]}-{d_[6:8]}")
+                      for d_ in [query["start_date"][0],
+                                 query["end_date"][0]]]
+        time = np.arange(start, end + 1, np.timedelta64(1, "h"))
+
+        if self.end is not None:
+            time = time[time <= np.datetime64(self.end)]
+
+        # Each variable is its word number times the hour of the year
+        hours = (time - time.astype("<M8[Y]")).astype(int)
+        lines = ["YEAR DOY HR " + " ".join(query["vars"])]
+
+        for t_, hour in zip(time.astype("<M8[h]"), hours):
+            doy = (t_.astype("<M8[D]") - t_.astype("<M8[Y]")).astype(int) + 1
+            values = " ".join(f"{int(v_) * hour:d}" for v_ in query["vars"])
+            lines.append(f"{str(t_)[:4]} {doy:d} {str(t_)[11:13]} {values}")
+
+        content = ("<pre>" + "\n".join(lines) + "\n</pre>").encode()
+
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestOMNI(unittest.TestCase):
+    def setUp(self):
+        """OMNI test setup with a local stand-in of OMNIWeb."""
+        self.module = importlib.import_module("pyrfu.pyrf.get_omni_data")
+        self.url = self.module.OMNI_URL
+        self.cache_dir = tempfile.mkdtemp()
+
+        _OMNIHandler.requests = []
+        _OMNIHandler.end = None
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _OMNIHandler)
+        threading.Thread(target=self.server.serve_forever,
+                         daemon=True).start()
+
+        self.module.OMNI_URL = f"http://127.0.0.1:" \
+                               f"{self.server.server_port:d}/cgi/nx1.cgi"
+
+    def tearDown(self):
+        self.module.OMNI_URL = self.url
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_cache(self):
+        """missing months are fetched once and then read from the cache"""
+        tints = [["2019-01-31T22:30:00", "2019-02-01T01:00:00"],
+                 ["2019-09-14T07:54:00", "2019-09-14T08:11:00"]]
+
+        out = pyrf.get_omni_data(["p", "bzgsm"], tints,
+                                 cache_dir=self.cache_dir)
+
+        # One request per run of consecutive months
+        self.assertEqual(len(_OMNIHandler.requests), 2)
+
+        hours = (out[0].time.data
+                 - np.datetime64("2019-01-01")) // np.timedelta64(1, "h")
+        self.assertEqual(list(out[0].time.data.astype("<M8[h]").astype(str)),
+                         ["2019-01-31T22", "2019-01-31T23", "2019-02-01T00",
+                          "2019-02-01T01"])
+        self.assertTrue((out[0].p.data == 28 * hours).all())
+        self.assertTrue((out[0].bzgsm.data == 16 * hours).all())
+        self.assertEqual(len(out[1].time), 2)
+
+        again = pyrf.get_omni_data(["bzgsm", "p"], tints[1],
+                                   cache_dir=self.cache_dir)
+
+        self.assertEqual(len(_OMNIHandler.requests), 2)
+        self.assertTrue(again.equals(out[1]))
+
+    def test_incomplete(self):
+        """months without data up to their end are not cached"""
+        tints = [["2019-03-01T00:00:00", "2019-03-02T00:00:00"],
+                 ["2019-05-01T00:00:00", "2019-05-02T00:00:00"]]
+
+        # OMNIWeb not updated beyond the middle of March
+        _OMNIHandler.end = "2019-03-15T12:00"
+
+        out = pyrf.get_omni_data(["p"], tints, cache_dir=self.cache_dir)
+
+        self.assertTrue(np.isnan(out[1].p.data).all())
+        self.assertFalse(os.listdir(self.cache_dir))
+
+        _OMNIHandler.end = None
+
+        out = pyrf.get_omni_data(["p"], tints, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(_OMNIHandler.requests), 4)
+        self.assertFalse(np.isnan(out[1].p.data).any())
+
+        pyrf.get_omni_data(["p"], tints, cache_dir=self.cache_dir)
+
+        self.assertEqual(len(_OMNIHandler.requests), 4)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# MIT License
+#
+# Copyright (c) 2020 Louis Richard
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from cdflib import cdfepoch, cdfread
+
+from pyrfu import solo
+from pyrfu.pyrf import ttns2datetime64
+
+from .test_mms import _write_cdf, _CDF_DOUBLE, _CDF_TIME_TT2000, _CDF_UINT1
+
+# CDF data types
+_CDF_INT4 = 4
+
+
+def _write_tnr(file_path, n_sweeps: int = 20, zero_sweep: int = 7):
+    r"""TNR file with sweeps of 4 bands measured alternately by the two
+    channels. The channels of the sensor V1 - V2 are zero during the sweep
+    zero_sweep."""
+
+    n_records = 8 * n_sweeps
+
+    epochs = cdfepoch.compute_tt2000([2020, 6, 1, 0, 0, 0, 0, 0, 0])
+    epochs += np.arange(n_records, dtype=np.int64) * 125000000
+
+    sweep_num = np.repeat(np.arange(n_sweeps), 8).astype(np.int32)
+    tnr_band = np.tile(np.repeat(np.arange(4), 2), n_sweeps)
+    sensor_config = np.tile([[4, 5], [5, 4]], (4 * n_sweeps, 1))
+    front_end = np.ones(n_records, dtype=np.uint8)
+    front_end[::13] = 0
+
+    auto1, auto2 = [np.random.rand(n_records, 32) for _ in range(2)]
+    auto1[(sweep_num == zero_sweep) & (sensor_config[:, 0] == 4)] = 0.
+    auto2[(sweep_num == zero_sweep) & (sensor_config[:, 1] == 4)] = 0.
+
+    # Missing channel
+    auto1[9, 3] = 0.
+
+    return _write_cdf(file_path, [
+        ("Epoch", _CDF_TIME_TT2000, epochs, {}),
+        ("TNR_BAND_FREQ", _CDF_DOUBLE,
+         np.logspace(3.6, 6.2, 128).reshape(4, 32), {}),
+        ("SWEEP_NUM", _CDF_INT4, sweep_num, {"DEPEND_0": "Epoch"}),
+        ("TNR_BAND", _CDF_INT4, tnr_band.astype(np.int32),
+         {"DEPEND_0": "Epoch"}),
+        ("SENSOR_CONFIG", _CDF_INT4, sensor_config.astype(np.int32),
+         {"DEPEND_0": "Epoch"}),
+        ("FRONT_END", _CDF_UINT1, front_end, {"DEPEND_0": "Epoch"}),
+        ("AUTO1", _CDF_DOUBLE, auto1, {"DEPEND_0": "Epoch"}),
+        ("AUTO2", _CDF_DOUBLE, auto2, {"DEPEND_0": "Epoch"})])
+
+
+def _sweeps_loop(file_path, sensor):
+    r"""Sweeps assembled with the former loop over the sweep numbers. The
+    time of a sweep is kept only with its spectrum."""
+
+    with cdfread.CDF(file_path) as file:
+        data = {k_.lower(): file.varget(k_)
+                for k_ in file.cdf_info()["zVariables"]}
+
+    puntical = data["front_end"] == 1
+
+    timet_ = data["epoch"][puntical]
+    confg_ = data["sensor_config"][puntical]
+    auto1_, auto2_ = [data["auto1"][puntical], data["auto2"][puntical]]
+    sweep_num, bande_ = [data["sweep_num"][puntical],
+                         data["tnr_band"][puntical]]
+
+    sens0_, sens1_ = [np.where(confg_[:, i] == sensor)[0] for i in range(2)]
+
+    auto_calib = np.vstack([auto1_[sens0_, :], auto2_[sens1_, :]])
+    sens_ = np.hstack([sens0_, sens1_])
+    timet_ici = np.hstack([timet_[sens0_], timet_[sens1_]])
+
+    ord_time = np.argsort(timet_ici)
+    time_rr = timet_ici[ord_time]
+    sens_ = sens_[ord_time]
+    auto_calib = auto_calib[ord_time, :]
+
+    bande_e = bande_[sens_]
+    sweep_num = sweep_num[sens_]
+
+    v_, time = [[], []]
+
+    for ind_sweep in range(np.min(sweep_num), np.max(sweep_num)):
+        v1_ = np.zeros(128)
+        p_punt = np.where(sweep_num == ind_sweep)[0]
+
+        for indband in range(p_punt.size):
+            idx_l = 32 * bande_e[p_punt[indband]]
+            v1_[idx_l:idx_l + 32] = auto_calib[p_punt[indband], :]
+
+        if np.sum(v1_) > 0.0:
+            v1_[v1_ == 0.0] = np.nan
+            v_.append(v1_)
+            time.append(time_rr[np.min(p_punt)])
+
+    return np.stack(v_), np.array(time)
+
+
+class TestReadTNR(unittest.TestCase):
+    def setUp(self):
+        """TNR reader test setup."""
+        self.data_path = tempfile.mkdtemp()
+        self.file_path = _write_tnr(os.path.join(
+            self.data_path, "solo_L2_rpw-tnr-surv_20200601_V02.cdf"))
+        self.tint = ["2020-06-01T00:00:00.000", "2020-06-01T00:01:00.000"]
+
+    def tearDown(self):
+        shutil.rmtree(self.data_path)
+
+    def test_sweeps(self):
+        """sweeps scattered at once match the former per sweep loop"""
+        out = solo.read_tnr(self.file_path, self.tint, sensor=4)
+        v_, time = _sweeps_loop(self.file_path, 4)
+
+        # The last sweep and the sweep with all channels at zero are dropped
+        self.assertEqual(len(out), 18)
+        np.testing.assert_array_equal(out.data, v_)
+        np.testing.assert_array_equal(out[out.dims[0]].data,
+                                      ttns2datetime64(time))
+
+    def test_sensors(self):
+        """several sensors read at once match the sensors read one by one"""
+        out = solo.read_tnr([self.file_path], self.tint, sensor=[4, 5])
+
+        for sensor in [4, 5]:
+            ref = solo.read_tnr(self.file_path, self.tint, sensor=sensor)
+            self.assertTrue(out[sensor].identical(ref))
+
+
+if __name__ == "__main__":
+    unittest.main()